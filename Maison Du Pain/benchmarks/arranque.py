@@ -0,0 +1,91 @@
+"""
+Benchmark de arranque: archivos JSON frente a instantáneas binarias
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.arranque [--repeticiones 3] [--borrar]
+
+Mide, cada vez en un proceso nuevo (sin cachés en memoria), lo que tarda
+cargar productos, pedidos y detalles de pedidos del directorio datos/:
+1. Desde los archivos JSON (opción "instantaneas" desactivada).
+2. La primera vez con instantáneas: se lee el JSON y se escriben.
+3. Con las instantáneas ya vigentes.
+Las instantáneas quedan escritas junto a los JSON salvo con --borrar.
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from rich.console import Console
+from rich.table import Table
+
+from modulos.configuracion import BASE_DIR, DATOS_DIR
+from modulos.instantaneas import SUFIJO_INSTANTANEA
+
+# Instancia de consola para la visualización
+console = Console()
+
+# Lo que se ejecuta en cada proceso; imprime los tiempos en JSON
+CODIGO_MEDICION = """
+import json, time
+inicio = time.perf_counter()
+from modulos.gestion_archivos import cargar_datos, cargar_pedidos, cargar_detalles_pedidos
+tiempos = {"importar": time.perf_counter() - inicio}
+for nombre, cargar in (("datos", cargar_datos), ("pedidos", cargar_pedidos),
+                       ("detalles", cargar_detalles_pedidos)):
+    inicio = time.perf_counter()
+    cargar()
+    tiempos[nombre] = time.perf_counter() - inicio
+print(json.dumps(tiempos))
+"""
+
+ETAPAS = ("importar", "datos", "pedidos", "detalles")
+
+def medir(con_instantaneas):
+    """Carga los datos en un proceso nuevo y devuelve los segundos de cada etapa"""
+    entorno = dict(os.environ, MAISON_INSTANTANEAS="1" if con_instantaneas else "0")
+    resultado = subprocess.run(
+        [sys.executable, "-c", CODIGO_MEDICION],
+        cwd=BASE_DIR, env=entorno, capture_output=True, text=True, check=True,
+    )
+    return json.loads(resultado.stdout)
+
+def borrar_instantaneas():
+    for ruta in glob.glob(os.path.join(DATOS_DIR, "**", "*" + SUFIJO_INSTANTANEA), recursive=True):
+        os.remove(ruta)
+
+def mediana(mediciones):
+    """Mediana de cada etapa y del total"""
+    resumen = {etapa: statistics.median(medicion[etapa] for medicion in mediciones) for etapa in ETAPAS}
+    resumen["total"] = statistics.median(sum(medicion.values()) for medicion in mediciones)
+    return resumen
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque con JSON y con instantáneas")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Mediciones de cada forma de carga")
+    parser.add_argument("--borrar", action="store_true", help="Borra las instantáneas al terminar")
+    argumentos = parser.parse_args()
+
+    borrar_instantaneas()
+    filas = [
+        ("JSON", mediana([medir(False) for _ in range(argumentos.repeticiones)])),
+        ("Instantánea (primera vez)", mediana([medir(True)])),
+        ("Instantánea vigente", mediana([medir(True) for _ in range(argumentos.repeticiones)])),
+    ]
+    if argumentos.borrar:
+        borrar_instantaneas()
+
+    tabla = Table(title=f"Arranque (mediana de {argumentos.repeticiones} procesos, segundos)")
+    tabla.add_column("Carga", style="cyan")
+    for etapa in ETAPAS + ("total",):
+        tabla.add_column(etapa.capitalize(), justify="right")
+    for nombre, resumen in filas:
+        tabla.add_row(nombre, *(f"{resumen[etapa]:.3f}" for etapa in ETAPAS + ("total",)))
+    console.print(tabla)
+    console.print(f"Arranque con instantáneas: {filas[0][1]['total'] / filas[2][1]['total']:.1f} veces más rápido")
+
+if __name__ == "__main__":
+    main()
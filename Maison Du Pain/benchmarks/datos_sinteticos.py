@@ -0,0 +1,231 @@
+"""
+Generador de datos sintéticos de la panadería para los benchmarks
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.datos_sinteticos DESTINO [--escala pequena|grande]
+                                          [--productos N] [--pedidos N] [--semilla 1]
+
+Escribe en DESTINO un directorio datos/ completo:
+    datos_panaderia.json
+    pedidos/pedidos.json
+    pedidos/detalles_pedidos.json
+con el mismo formato que guarda el programa, y sintetico.json con los
+tamaños y la semilla usados. Con la misma semilla y los mismos
+tamaños el contenido es siempre idéntico, así dos versiones del programa se
+miden sobre los mismos datos. Los pedidos tienen fechas crecientes (un año y
+medio hacia atrás desde FECHA_FINAL), de una a seis líneas cada uno, y los
+más antiguos están entregados.
+
+Los pedidos y sus detalles se escriben a medida que se generan, sin tenerlos
+todos en memoria (con la escala grande son un millón de pedidos).
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import random
+import sys
+
+from rich.console import Console
+
+# Instancia de consola para la visualización
+console = Console()
+
+# Escala -> (productos, pedidos)
+ESCALAS = {
+    "pequena": (1_000, 10_000),
+    "grande": (100_000, 1_000_000),
+}
+
+SEMILLA_POR_DEFECTO = 1
+
+# Archivo que identifica un directorio de datos sintéticos
+MARCA = "sintetico.json"
+
+# Los pedidos se reparten entre FECHA_FINAL - DIAS_DE_HISTORIA y FECHA_FINAL
+FECHA_FINAL = datetime(2025, 6, 30, 20, 0, 0)
+DIAS_DE_HISTORIA = 545
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+# Prefijo de código de cada categoría (como servicios.CATEGORIAS)
+PREFIJOS = {"pan": "PAN", "pastel": "PT", "postre": "PS"}
+
+TIPOS = {
+    "pan": ("Pan", "Baguette", "Hogaza", "Chapata", "Bollo", "Focaccia", "Brioche", "Pan de molde"),
+    "pastel": ("Pastel", "Torta", "Tarta", "Bizcocho", "Selva negra", "Milhojas"),
+    "postre": ("Croissant", "Éclair", "Macaron", "Flan", "Mousse", "Galleta", "Alfajor", "Muffin"),
+}
+SABORES = (
+    "integral", "de centeno", "de chocolate", "de vainilla", "de almendras", "de frutos rojos",
+    "de limón", "de avena", "con semillas", "de masa madre", "de canela", "de nuez",
+    "de queso", "de zanahoria", "de café", "de coco", "multicereal", "de maíz",
+)
+DESCRIPCIONES = (
+    "horneado cada mañana", "receta tradicional francesa", "sin azúcar añadida",
+    "con harina orgánica", "de fermentación lenta", "con cobertura cremosa",
+    "relleno de crema pastelera", "ideal para desayunos", "edición de temporada",
+    "con mantequilla de granja",
+)
+PROVEEDORES = tuple(f"Proveedor {letra}" for letra in "ABCDEFGHIJKLMNOPQRST")
+
+# Estado de los pedidos según su antigüedad (en días)
+DIAS_ENTREGADO = 7
+
+def tamanos(escala=None, productos=None, pedidos=None):
+    """Tamaños a generar: los de la escala, con productos y pedidos si se indican"""
+    por_defecto = ESCALAS[escala or "pequena"]
+    return (productos or por_defecto[0], pedidos or por_defecto[1])
+
+def generar_productos(aleatorio, cantidad):
+    """Lista de productos; los códigos se numeran por categoría (PAN-001, PT-001...)"""
+    productos = []
+    contadores = {categoria: 0 for categoria in PREFIJOS}
+    categorias = tuple(PREFIJOS)
+    for indice in range(cantidad):
+        categoria = categorias[indice % len(categorias)]
+        contadores[categoria] += 1
+        precio_proveedor = round(aleatorio.uniform(0.3, 20.0), 2)
+        productos.append({
+            "codigo_producto": f"{PREFIJOS[categoria]}-{contadores[categoria]:03d}",
+            "nombre": f"{aleatorio.choice(TIPOS[categoria])} {aleatorio.choice(SABORES)} {contadores[categoria]}",
+            "categoria": categoria,
+            "descripcion": f"{aleatorio.choice(DESCRIPCIONES).capitalize()}, {aleatorio.choice(DESCRIPCIONES)}",
+            "proveedor": aleatorio.choice(PROVEEDORES),
+            # Uno de cada diez productos con stock bajo
+            "cantidad_en_stock": aleatorio.randint(0, 4) if aleatorio.random() < 0.1 else aleatorio.randint(5, 500),
+            "precio_venta": round(precio_proveedor * aleatorio.uniform(1.3, 2.5), 2),
+            "precio_proveedor": precio_proveedor,
+        })
+    return productos
+
+def generar_pedidos(aleatorio, productos, cantidad):
+    """Genera (pedido, detalles_pedido) uno por uno, con fechas crecientes"""
+    inicio = FECHA_FINAL - timedelta(days=DIAS_DE_HISTORIA)
+    paso = timedelta(days=DIAS_DE_HISTORIA) / max(cantidad, 1)
+    clientes = max(100, cantidad // 20)
+    for numero in range(1, cantidad + 1):
+        fecha = inicio + paso * numero
+        antiguedad = (FECHA_FINAL - fecha).days
+        if antiguedad > DIAS_ENTREGADO:
+            estado = "entregado"
+        else:
+            estado = aleatorio.choice(("pendiente", "en_proceso", "entregado"))
+        codigo_pedido = f"PED-{numero:03d}"
+        lineas = []
+        for numero_linea in range(1, aleatorio.randint(1, 6) + 1):
+            producto = aleatorio.choice(productos)
+            cantidad_linea = aleatorio.randint(1, 5)
+            lineas.append({
+                "numero_linea": numero_linea,
+                "codigo_producto": producto["codigo_producto"],
+                "cantidad": cantidad_linea,
+                "precio_unidad": producto["precio_venta"],
+                "subtotal": cantidad_linea * producto["precio_venta"],
+            })
+        pedido = {
+            "codigo_pedido": codigo_pedido,
+            "codigo_cliente": f"CLI-{aleatorio.randint(1, clientes):04d}",
+            "fecha_pedido": fecha.strftime(FORMATO_FECHA),
+            "estado": estado,
+            "total": sum(linea["subtotal"] for linea in lineas),
+        }
+        yield pedido, {"codigo_pedido": codigo_pedido, "detalles": lineas}
+
+# Sangría de cada elemento dentro de la lista (dos niveles de indent=4)
+SANGRIA_ELEMENTO = " " * 8
+
+class _EscritorLista:
+    """Escribe {"clave": [...]} elemento por elemento con sangría de 4 espacios"""
+
+    def __init__(self, ruta_archivo, clave):
+        self.archivo = open(ruta_archivo, "w", encoding="utf-8")
+        self.archivo.write("{\n" + " " * 4 + json.dumps(clave) + ": [")
+        self.primero = True
+
+    def escribir(self, elemento):
+        texto = json.dumps(elemento, indent=4, ensure_ascii=False).replace("\n", "\n" + SANGRIA_ELEMENTO)
+        self.archivo.write(("\n" if self.primero else ",\n") + SANGRIA_ELEMENTO + texto)
+        self.primero = False
+
+    def cerrar(self):
+        self.archivo.write("]\n}" if self.primero else "\n" + " " * 4 + "]\n}")
+        self.archivo.close()
+
+def generar(destino, productos, pedidos, semilla=SEMILLA_POR_DEFECTO):
+    """Escribe los archivos de datos en destino y devuelve un resumen
+
+    Si destino ya tiene datos sintéticos de antes, se borran todos sus
+    archivos (secuencias, diario, instantáneas, base SQLite...) para empezar
+    siempre del mismo estado. Un directorio con otros datos no se toca.
+    """
+    if os.path.isdir(destino) and os.listdir(destino):
+        if not os.path.exists(os.path.join(destino, MARCA)):
+            raise ValueError(f"{destino} no está vacío ni tiene datos sintéticos; use otro directorio")
+        _limpiar(destino)
+    aleatorio = random.Random(semilla)
+    directorio_pedidos = os.path.join(destino, "pedidos")
+    os.makedirs(directorio_pedidos, exist_ok=True)
+
+    lista_productos = generar_productos(aleatorio, productos)
+    with open(os.path.join(destino, "datos_panaderia.json"), "w", encoding="utf-8") as archivo:
+        json.dump({"productos": lista_productos, "pedidos": []}, archivo, indent=4, ensure_ascii=False)
+
+    escritor_pedidos = _EscritorLista(os.path.join(directorio_pedidos, "pedidos.json"), "pedidos")
+    escritor_detalles = _EscritorLista(
+        os.path.join(directorio_pedidos, "detalles_pedidos.json"), "detalles_pedidos"
+    )
+    lineas = 0
+    try:
+        for pedido, detalles_pedido in generar_pedidos(aleatorio, lista_productos, pedidos):
+            escritor_pedidos.escribir(pedido)
+            escritor_detalles.escribir(detalles_pedido)
+            lineas += len(detalles_pedido["detalles"])
+    finally:
+        escritor_pedidos.cerrar()
+        escritor_detalles.cerrar()
+
+    resumen = {
+        "semilla": semilla,
+        "productos": productos,
+        "pedidos": pedidos,
+        "lineas": lineas,
+        "bytes": {
+            nombre: os.path.getsize(os.path.join(destino, nombre))
+            for nombre in ("datos_panaderia.json", "pedidos/pedidos.json", "pedidos/detalles_pedidos.json")
+        },
+    }
+    with open(os.path.join(destino, MARCA), "w", encoding="utf-8") as archivo:
+        json.dump(resumen, archivo, indent=4)
+    return resumen
+
+def _limpiar(destino):
+    """Borra todo el contenido de un directorio de datos sintéticos"""
+    for directorio, subdirectorios, archivos in os.walk(destino, topdown=False):
+        for nombre in archivos:
+            os.remove(os.path.join(directorio, nombre))
+        for nombre in subdirectorios:
+            os.rmdir(os.path.join(directorio, nombre))
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de la panadería")
+    parser.add_argument("destino", help="Directorio de datos a crear (vacío o con datos sintéticos)")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena",
+                        help="pequena: 1.000 productos y 10.000 pedidos; grande: 100.000 y 1.000.000")
+    parser.add_argument("--productos", type=int, help="Cantidad de productos (en lugar de la escala)")
+    parser.add_argument("--pedidos", type=int, help="Cantidad de pedidos (en lugar de la escala)")
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO, help="Semilla del generador")
+    argumentos = parser.parse_args()
+
+    productos, pedidos = tamanos(argumentos.escala, argumentos.productos, argumentos.pedidos)
+    try:
+        resumen = generar(argumentos.destino, productos, pedidos, argumentos.semilla)
+    except ValueError as error:
+        console.print(f"[bold red]❌ {error}[/bold red]")
+        sys.exit(1)
+    console.print(
+        f"[bold green]✅ {resumen['productos']} productos, {resumen['pedidos']} pedidos y "
+        f"{resumen['lineas']} líneas escritos en {argumentos.destino}[/bold green]"
+    )
+
+if __name__ == "__main__":
+    main()
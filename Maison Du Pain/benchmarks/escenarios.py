@@ -0,0 +1,195 @@
+"""
+Escenarios de la suite de benchmarks (ver benchmarks/suite.py)
+
+Uso (lo ejecuta la suite, un proceso por escenario):
+    MAISON_DATOS_DIR=DIR python -m benchmarks.escenarios NOMBRE [--repeticiones 5]
+
+Cada escenario llama a las funciones reales del programa sobre el directorio
+de datos sintéticos DIR y mide solo la operación, no lo que la prepara. Los
+escenarios de menú (buscar producto, crear pedido, ver detalles) responden
+los input() con un guion y descartan lo que se muestra. La última línea que
+se imprime es un JSON con los tiempos en segundos y la configuración usada.
+
+"preparar" en lugar de un escenario migra los datos al motor configurado
+("sqlite" o "mensual"); con "json" no hace nada.
+
+Para no modificar datos reales, solo se ejecuta sobre un directorio creado
+por benchmarks.datos_sinteticos.
+"""
+import argparse
+from contextlib import contextmanager
+import io
+import json
+import os
+import sys
+import time
+
+from benchmarks.datos_sinteticos import MARCA
+from modulos import gestion_pedidos, gestion_productos
+from modulos.configuracion import DATOS_DIR, obtener_configuracion, obtener_opcion
+from modulos.gestion_archivos import (
+    cargar_datos, cargar_pedidos, cargar_detalles_pedidos, guardar_datos, migrar_json_a_sqlite,
+    particionar_pedidos, vaciar_cache
+)
+from modulos.secuencias import RUTA_SECUENCIAS
+from modulos.servicios import CATEGORIAS, generar_codigo_pedido, generar_codigo_producto
+
+# Textos que se buscan en el catálogo, uno por repetición
+CONSULTAS = ("chocolate", "pan integral", "masa madre", "PT-042", "croissant de canela")
+
+@contextmanager
+def entrada_guionada(respuestas):
+    """Responde los input() con las respuestas dadas y descarta lo que se muestra
+
+    Si el menú no lee todas las respuestas, el guion ya no coincide con el
+    menú y se lanza RuntimeError.
+    """
+    entrada, salida = sys.stdin, sys.stdout
+    sys.stdin = io.StringIO("".join(f"{respuesta}\n" for respuesta in respuestas))
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as nulo:
+            sys.stdout = nulo
+            yield
+            sobrante = sys.stdin.read()
+    finally:
+        sys.stdin, sys.stdout = entrada, salida
+    if sobrante:
+        raise RuntimeError(f"El menú no leyó todo el guion: {sobrante!r}")
+
+def medir(repeticiones, operacion, preparar=None):
+    """Segundos de cada repetición de operacion(numero); preparar(numero) no se mide"""
+    tiempos = []
+    for numero in range(repeticiones):
+        if preparar is not None:
+            preparar(numero)
+        inicio = time.perf_counter()
+        operacion(numero)
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+def _borrar_secuencias(_numero=None):
+    try:
+        os.remove(RUTA_SECUENCIAS)
+    except FileNotFoundError:
+        pass
+
+def _vaciar_cache(_numero=None):
+    vaciar_cache()
+
+def escenario_cargar_datos(repeticiones):
+    return medir(repeticiones, lambda _: cargar_datos(), _vaciar_cache)
+
+def escenario_cargar_pedidos(repeticiones):
+    def operacion(_):
+        cargar_pedidos()
+        cargar_detalles_pedidos()
+    return medir(repeticiones, operacion, _vaciar_cache)
+
+def escenario_guardar_datos(repeticiones):
+    datos = cargar_datos()
+    return medir(repeticiones, lambda _: guardar_datos(datos))
+
+def escenario_codigo_pedido_inicial(repeticiones):
+    # Sin secuencias.json se parte del mayor código existente
+    datos_pedidos = cargar_pedidos()
+    return medir(repeticiones, lambda _: generar_codigo_pedido(datos_pedidos), _borrar_secuencias)
+
+def escenario_codigo_pedido(repeticiones):
+    datos_pedidos = cargar_pedidos()
+    generar_codigo_pedido(datos_pedidos)
+    return medir(repeticiones, lambda _: generar_codigo_pedido(datos_pedidos))
+
+def escenario_codigo_producto(repeticiones):
+    datos = cargar_datos()
+    categorias = tuple(CATEGORIAS)
+    for categoria in categorias:
+        generar_codigo_producto(datos, categoria)
+    return medir(repeticiones, lambda numero: generar_codigo_producto(datos, categorias[numero % len(categorias)]))
+
+def _buscar_producto(datos, numero):
+    with entrada_guionada([CONSULTAS[numero % len(CONSULTAS)]]):
+        gestion_productos.buscar_producto(datos)
+
+def escenario_buscar_producto_inicial(repeticiones):
+    # Cada repetición con el catálogo recién cargado: incluye armar el índice de texto
+    catalogos = {}
+    def preparar(numero):
+        catalogos["datos"] = cargar_datos()
+    return medir(repeticiones, lambda numero: _buscar_producto(catalogos["datos"], numero), preparar)
+
+def escenario_buscar_producto(repeticiones):
+    datos = cargar_datos()
+    _buscar_producto(datos, 0)
+    return medir(repeticiones, lambda numero: _buscar_producto(datos, numero))
+
+def escenario_crear_pedido(repeticiones):
+    datos = cargar_datos()
+    # Dos productos con stock suficiente para todas las repeticiones
+    codigos = [
+        producto["codigo_producto"] for producto in datos["productos"]
+        if producto["cantidad_en_stock"] >= 3 * repeticiones
+    ][:2]
+    antes = len(cargar_pedidos()["pedidos"])
+    guion = ["CLI-BENCH", codigos[0], "2", codigos[1], "1", "fin"]
+    def operacion(_):
+        with entrada_guionada(guion):
+            gestion_pedidos.crear_pedido(datos)
+    tiempos = medir(repeticiones, operacion)
+    vaciar_cache()
+    if len(cargar_pedidos()["pedidos"]) != antes + repeticiones:
+        raise RuntimeError("El menú no creó todos los pedidos del guion")
+    return tiempos
+
+def escenario_detalle_pedido(repeticiones):
+    # Primer, medio y último pedido, cada vez sin la caché de lectura
+    pedidos = cargar_pedidos()["pedidos"]
+    codigos = [pedidos[posicion]["codigo_pedido"] for posicion in (0, len(pedidos) // 2, -1)]
+    def operacion(numero):
+        with entrada_guionada([]):
+            gestion_pedidos.mostrar_detalles_pedido(codigos[numero % len(codigos)])
+    return medir(repeticiones, operacion, _vaciar_cache)
+
+# Nombre -> (descripción, función); en el orden en que los ejecuta la suite
+# (primero los que solo leen)
+ESCENARIOS = {
+    "cargar_datos": ("cargar_datos() del catálogo", escenario_cargar_datos),
+    "cargar_pedidos": ("cargar_pedidos() y cargar_detalles_pedidos() sin caché", escenario_cargar_pedidos),
+    "buscar_producto_inicial": ("Menú Buscar Producto con el índice de texto por armar",
+                                escenario_buscar_producto_inicial),
+    "buscar_producto": ("Menú Buscar Producto con el índice ya armado", escenario_buscar_producto),
+    "detalle_pedido": ("Detalles de un pedido (primero, del medio, último) sin caché",
+                       escenario_detalle_pedido),
+    "codigo_pedido_inicial": ("generar_codigo_pedido() sin secuencias.json", escenario_codigo_pedido_inicial),
+    "codigo_pedido": ("generar_codigo_pedido() con la secuencia iniciada", escenario_codigo_pedido),
+    "codigo_producto": ("generar_codigo_producto() con la secuencia iniciada", escenario_codigo_producto),
+    "guardar_datos": ("guardar_datos() del catálogo completo", escenario_guardar_datos),
+    "crear_pedido": ("Menú Crear Pedido con dos líneas (incluye guardar)", escenario_crear_pedido),
+}
+
+def preparar_almacenamiento():
+    """Pasa los datos sintéticos (JSON) al motor de almacenamiento configurado"""
+    almacenamiento = obtener_opcion("almacenamiento")
+    if almacenamiento == "sqlite":
+        migrar_json_a_sqlite()
+    elif almacenamiento == "mensual":
+        particionar_pedidos()
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta un escenario de la suite de benchmarks")
+    parser.add_argument("escenario", choices=list(ESCENARIOS) + ["preparar"])
+    parser.add_argument("--repeticiones", type=int, default=5, help="Veces que se mide la operación")
+    argumentos = parser.parse_args()
+
+    if not os.path.exists(os.path.join(DATOS_DIR, MARCA)):
+        print(f"{DATOS_DIR} no tiene datos sintéticos (defina MAISON_DATOS_DIR)", file=sys.stderr)
+        sys.exit(1)
+
+    if argumentos.escenario == "preparar":
+        preparar_almacenamiento()
+        tiempos = []
+    else:
+        tiempos = ESCENARIOS[argumentos.escenario][1](argumentos.repeticiones)
+    print(json.dumps({"tiempos": tiempos, "configuracion": obtener_configuracion()}, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
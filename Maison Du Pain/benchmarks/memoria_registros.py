@@ -0,0 +1,100 @@
+"""
+Benchmark de memoria: diccionarios frente a registros con __slots__
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.memoria_registros [--lineas 1000000]
+
+Crea las mismas líneas de pedido (y un pedido cada cuatro líneas) primero
+como diccionarios, tal como quedan al leer el JSON, y luego como registros
+LineaPedido y Pedido. Con tracemalloc se mide la memoria que ocupa cada
+representación y el tiempo de convertir los diccionarios en registros.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from rich.console import Console
+from rich.table import Table
+
+from modulos.registros import LineaPedido, Pedido, convertir_pedidos, convertir_detalles
+
+# Instancia de consola para la visualización
+console = Console()
+
+ESTADOS = ("pendiente", "en_proceso", "entregado")
+
+def generar_datos(cantidad_lineas):
+    """Genera pedidos.json y detalles_pedidos.json en memoria, como diccionarios
+
+    Cada texto se arma por separado, igual que al decodificar el JSON (donde
+    cada "codigo_producto" repetido es un objeto distinto).
+    """
+    pedidos = []
+    detalles_pedidos = []
+    for numero in range(1, cantidad_lineas // 4 + 1):
+        codigo = f"PED-{numero:07d}"
+        pedidos.append({
+            "codigo_pedido": codigo,
+            "codigo_cliente": f"CLI-{numero % 2000:04d}",
+            "fecha_pedido": f"2024-{numero % 12 + 1:02d}-{numero % 28 + 1:02d} 10:00:00",
+            # join arma un texto nuevo, como el decodificador JSON
+            "estado": "".join(ESTADOS[numero % 3]),
+            "total": 0.0,
+        })
+        lineas = []
+        for numero_linea in range(1, 5):
+            lineas.append({
+                "numero_linea": numero_linea,
+                "codigo_producto": f"PN-{(numero * 7 + numero_linea) % 500:03d}",
+                "cantidad": numero_linea,
+                "precio_unidad": 3.5,
+                "subtotal": numero_linea * 3.5,
+            })
+        detalles_pedidos.append({"codigo_pedido": codigo, "detalles": lineas})
+    return {"pedidos": pedidos}, {"detalles_pedidos": detalles_pedidos}
+
+def medir(funcion):
+    """Ejecuta funcion y devuelve (resultado, bytes que quedan ocupados, segundos)"""
+    gc.collect()
+    antes = tracemalloc.get_traced_memory()[0]
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    gc.collect()
+    return resultado, tracemalloc.get_traced_memory()[0] - antes, segundos
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria de diccionarios frente a registros")
+    parser.add_argument("--lineas", type=int, default=1_000_000, help="Líneas de pedido a generar")
+    argumentos = parser.parse_args()
+
+    tracemalloc.start()
+    (datos_pedidos, datos_detalles), bytes_dicts, segundos_generar = medir(
+        lambda: generar_datos(argumentos.lineas)
+    )
+    cantidad_lineas = sum(len(bloque["detalles"]) for bloque in datos_detalles["detalles_pedidos"])
+    cantidad_pedidos = len(datos_pedidos["pedidos"])
+
+    # La conversión reemplaza las listas: los diccionarios se liberan al terminar
+    _, diferencia, segundos_convertir = medir(
+        lambda: (convertir_pedidos(datos_pedidos), convertir_detalles(datos_detalles))
+    )
+    bytes_registros = bytes_dicts + diferencia
+    tracemalloc.stop()
+
+    assert isinstance(datos_pedidos["pedidos"][0], Pedido)
+    assert isinstance(next(iter(datos_detalles["detalles_pedidos"][0]["detalles"])), LineaPedido)
+
+    tabla = Table(title=f"Memoria de {cantidad_lineas:,} líneas y {cantidad_pedidos:,} pedidos")
+    tabla.add_column("Representación", style="cyan")
+    tabla.add_column("Memoria (MB)", justify="right")
+    tabla.add_column("Bytes por línea", justify="right")
+    tabla.add_row("Diccionarios", f"{bytes_dicts / 2**20:,.1f}", f"{bytes_dicts / cantidad_lineas:,.0f}")
+    tabla.add_row("Registros __slots__", f"{bytes_registros / 2**20:,.1f}", f"{bytes_registros / cantidad_lineas:,.0f}")
+    console.print(tabla)
+    console.print(f"Ahorro: {1 - bytes_registros / bytes_dicts:.0%}")
+    console.print(f"Generar diccionarios: {segundos_generar:.2f} s · convertir en registros: {segundos_convertir:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Suite de benchmarks sobre datos sintéticos
+
+Uso (desde la carpeta del proyecto):
+    python -m benchmarks.suite [--escala pequena|grande] [--productos N] [--pedidos N]
+                               [--semilla 1] [--repeticiones 5] [--escenarios a,b,...]
+                               [--datos DIR] [--resultados resultados_benchmark.json]
+                               [--comparar anterior.json] [--umbral 0.1]
+
+1. Genera los datos sintéticos (benchmarks.datos_sinteticos) en DIR o en un
+   directorio temporal que se borra al terminar.
+2. Ejecuta cada escenario (benchmarks.escenarios) en un proceso nuevo con
+   MAISON_DATOS_DIR apuntando a esos datos; las demás variables MAISON_* se
+   respetan, así se pueden medir los motores y opciones (por ejemplo
+   MAISON_ALMACENAMIENTO=sqlite o MAISON_LECTURA_DETALLES=indice).
+3. Escribe los resultados en un archivo JSON: versión del programa (commit),
+   tamaños de los datos, configuración y, por escenario, los tiempos de cada
+   repetición con su mediana, mínimo y máximo.
+
+Con --comparar se muestran los cambios de mediana respecto de otro archivo de
+resultados; si algún escenario empeora más que --umbral (10 % por defecto)
+el comando termina con código 1.
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.datos_sinteticos import ESCALAS, SEMILLA_POR_DEFECTO, generar, tamanos
+from benchmarks.escenarios import ESCENARIOS
+from modulos.configuracion import BASE_DIR
+
+# Instancia de consola para la visualización
+console = Console()
+
+# Versión del formato del archivo de resultados
+FORMATO_RESULTADOS = 1
+
+def version_programa():
+    """Commit actual del repositorio (con "+cambios" si hay cambios sin guardar), o None"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        cambios = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no", "."],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("+cambios" if cambios else "")
+
+def ejecutar(escenario, directorio_datos, repeticiones):
+    """Ejecuta un escenario en un proceso nuevo y devuelve lo que imprimió (JSON)"""
+    entorno = dict(os.environ, MAISON_DATOS_DIR=directorio_datos)
+    resultado = subprocess.run(
+        [sys.executable, "-m", "benchmarks.escenarios", escenario, "--repeticiones", str(repeticiones)],
+        cwd=BASE_DIR, env=entorno, capture_output=True, text=True,
+    )
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1] if resultado.stderr.strip() else
+                           f"código de salida {resultado.returncode}")
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+def resumir(tiempos):
+    return {
+        "tiempos": tiempos,
+        "mediana": statistics.median(tiempos),
+        "minimo": min(tiempos),
+        "maximo": max(tiempos),
+    }
+
+def _milisegundos(segundos):
+    return f"{segundos * 1000:.1f} ms"
+
+def mostrar_resultados(resultados):
+    tabla = Table(title=f"Benchmarks ({resultados['datos']['productos']} productos, "
+                        f"{resultados['datos']['pedidos']} pedidos)")
+    tabla.add_column("Escenario", style="cyan")
+    tabla.add_column("Mediana", justify="right")
+    tabla.add_column("Mínimo", justify="right")
+    tabla.add_column("Máximo", justify="right")
+    for nombre, escenario in resultados["escenarios"].items():
+        if "error" in escenario:
+            tabla.add_row(nombre, f"[red]{escenario['error']}[/red]", "", "")
+        else:
+            tabla.add_row(nombre, *(_milisegundos(escenario[clave]) for clave in ("mediana", "minimo", "maximo")))
+    console.print(tabla)
+
+def comparar(resultados, anteriores, umbral):
+    """Muestra el cambio de cada mediana y devuelve los escenarios que empeoraron más que umbral"""
+    datos, datos_anteriores = resultados["datos"], anteriores["datos"]
+    if any(datos.get(clave) != datos_anteriores.get(clave) for clave in ("productos", "pedidos", "semilla")):
+        console.print("[bold yellow]⚠ Los resultados anteriores se midieron con otros datos[/bold yellow]")
+
+    tabla = Table(title=f"Comparación con {anteriores.get('version') or 'resultados anteriores'}")
+    tabla.add_column("Escenario", style="cyan")
+    tabla.add_column("Antes", justify="right")
+    tabla.add_column("Ahora", justify="right")
+    tabla.add_column("Cambio", justify="right")
+    regresiones = []
+    for nombre, escenario in resultados["escenarios"].items():
+        anterior = anteriores["escenarios"].get(nombre)
+        if "error" in escenario or not anterior or "error" in anterior:
+            continue
+        cambio = escenario["mediana"] / anterior["mediana"] - 1 if anterior["mediana"] else 0.0
+        estilo = "red" if cambio > umbral else "green" if cambio < -umbral else "white"
+        if cambio > umbral:
+            regresiones.append(nombre)
+        tabla.add_row(nombre, _milisegundos(anterior["mediana"]), _milisegundos(escenario["mediana"]),
+                      f"[{estilo}]{cambio:+.1%}[/{estilo}]")
+    console.print(tabla)
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks sobre datos sintéticos")
+    parser.add_argument("--escala", choices=ESCALAS, default="pequena",
+                        help="pequena: 1.000 productos y 10.000 pedidos; grande: 100.000 y 1.000.000")
+    parser.add_argument("--productos", type=int, help="Cantidad de productos (en lugar de la escala)")
+    parser.add_argument("--pedidos", type=int, help="Cantidad de pedidos (en lugar de la escala)")
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO, help="Semilla del generador")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Mediciones de cada escenario")
+    parser.add_argument("--escenarios", help=f"Escenarios separados por comas (por defecto todos: {', '.join(ESCENARIOS)})")
+    parser.add_argument("--datos", help="Directorio para los datos sintéticos (se conserva al terminar)")
+    parser.add_argument("--resultados", default="resultados_benchmark.json", help="Archivo JSON de resultados")
+    parser.add_argument("--comparar", help="Archivo de resultados anterior con el que comparar")
+    parser.add_argument("--umbral", type=float, default=0.1,
+                        help="Empeoramiento de la mediana que cuenta como regresión (0.1 = 10 %%)")
+    argumentos = parser.parse_args()
+
+    nombres = argumentos.escenarios.split(",") if argumentos.escenarios else list(ESCENARIOS)
+    desconocidos = [nombre for nombre in nombres if nombre not in ESCENARIOS]
+    if desconocidos:
+        console.print(f"[bold red]❌ Escenarios desconocidos: {', '.join(desconocidos)}[/bold red]")
+        sys.exit(1)
+    anteriores = None
+    if argumentos.comparar:
+        with open(argumentos.comparar, "r", encoding="utf-8") as archivo:
+            anteriores = json.load(archivo)
+
+    productos, pedidos = tamanos(argumentos.escala, argumentos.productos, argumentos.pedidos)
+    directorio_datos = os.path.abspath(argumentos.datos or tempfile.mkdtemp(prefix="maison_benchmark_"))
+    try:
+        console.print(f"[cyan]Generando {productos} productos y {pedidos} pedidos en {directorio_datos}...[/cyan]")
+        inicio = time.perf_counter()
+        try:
+            datos = generar(directorio_datos, productos, pedidos, argumentos.semilla)
+        except ValueError as error:
+            console.print(f"[bold red]❌ {error}[/bold red]")
+            sys.exit(1)
+        datos["segundos_generacion"] = time.perf_counter() - inicio
+        configuracion = ejecutar("preparar", directorio_datos, 1)["configuracion"]
+
+        resultados = {
+            "formato": FORMATO_RESULTADOS,
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+            "version": version_programa(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "repeticiones": argumentos.repeticiones,
+            "datos": datos,
+            "configuracion": configuracion,
+            "escenarios": {},
+        }
+        for nombre in nombres:
+            console.print(f"[cyan]Midiendo {nombre}: {ESCENARIOS[nombre][0]}[/cyan]")
+            try:
+                salida = ejecutar(nombre, directorio_datos, argumentos.repeticiones)
+                resultados["escenarios"][nombre] = resumir(salida["tiempos"])
+            except RuntimeError as error:
+                console.print(f"[bold red]❌ {nombre}: {error}[/bold red]")
+                resultados["escenarios"][nombre] = {"error": str(error)}
+    finally:
+        if not argumentos.datos:
+            shutil.rmtree(directorio_datos, ignore_errors=True)
+
+    with open(argumentos.resultados, "w", encoding="utf-8") as archivo:
+        json.dump(resultados, archivo, indent=4, ensure_ascii=False)
+    mostrar_resultados(resultados)
+    console.print(f"[bold green]✅ Resultados guardados en {argumentos.resultados}[/bold green]")
+
+    regresiones = comparar(resultados, anteriores, argumentos.umbral) if anteriores else []
+    if regresiones:
+        console.print(f"[bold red]❌ Regresiones: {', '.join(regresiones)}[/bold red]")
+    if regresiones or any("error" in escenario for escenario in resultados["escenarios"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,459 @@
+"""
+Herramientas de línea de comandos del sistema "Maison du Pain"
+Tareas de mantenimiento que no necesitan el menú interactivo
+
+Uso:
+    python herramientas.py migrar-sqlite
+    python herramientas.py particionar-pedidos
+    python herramientas.py archivar-pedidos [--dias 90] [--compresion gzip|lzma]
+    python herramientas.py compactar-diario
+    python herramientas.py lote [archivo.jsonl] [--continuar]
+    python herramientas.py importar-csv productos.csv [--rechazos rechazos.csv]
+    python herramientas.py exportar-csv productos.csv
+    python herramientas.py servidor [--host 127.0.0.1] [--puerto 8080]
+    python herramientas.py generar-carga [--url http://127.0.0.1:8080] [--clientes 10] [--peticiones 100]
+    python herramientas.py reporte-ventas [--agrupar producto|categoria|mes|estado]
+        [--desde AAAA-MM-DD] [--hasta AAAA-MM-DD] [--mes-anterior] [--estado ESTADO] [--json]
+    python herramientas.py ventas-del-dia [--dia AAAA-MM-DD]
+    python herramientas.py reconstruir-agregados [--solo-verificar]
+    python herramientas.py metricas [--archivo datos/metricas.jsonl]
+    python herramientas.py reabastecimiento [--json]
+"""
+import argparse
+import json
+import sys
+
+from rich.console import Console
+
+# Instancia de consola para la visualización
+console = Console()
+
+def comando_migrar_sqlite(argumentos):
+    """Copia los archivos JSON a la base de datos SQLite"""
+    from modulos.gestion_archivos import migrar_json_a_sqlite
+
+    resumen = migrar_json_a_sqlite()
+    console.print("\n[bold green]✅ Migración a SQLite completada[/bold green]")
+    console.print(f"Productos: {resumen['productos']}")
+    console.print(f"Pedidos: {resumen['pedidos']}")
+    console.print(f"Líneas de pedido: {resumen['lineas']}")
+    console.print("\nPara usarla, configure \"almacenamiento\": \"sqlite\" en datos/configuracion.json")
+
+def comando_particionar_pedidos(argumentos):
+    """Reparte los pedidos en archivos mensuales"""
+    from modulos.gestion_archivos import particionar_pedidos
+
+    resumen = particionar_pedidos()
+    console.print("\n[bold green]✅ Pedidos repartidos por mes[/bold green]")
+    console.print(f"Meses: {len(resumen['meses'])}" + (
+        f" ({resumen['meses'][0]} a {resumen['meses'][-1]})" if resumen["meses"] else ""
+    ))
+    console.print(f"Pedidos: {resumen['pedidos']}")
+    console.print(f"Líneas de pedido: {resumen['lineas']}")
+    console.print("\nPara usarlos, configure \"almacenamiento\": \"mensual\" en datos/configuracion.json")
+
+def comando_archivar_pedidos(argumentos):
+    """Pasa los pedidos entregados antiguos al archivo comprimido"""
+    from modulos.gestion_archivos import archivar_pedidos
+
+    try:
+        resumen = archivar_pedidos(argumentos.dias, argumentos.compresion)
+    except ValueError as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        sys.exit(1)
+    if not resumen["segmentos"]:
+        console.print("\n[bold yellow]⚠ No hay pedidos entregados para archivar[/bold yellow]")
+        return
+    console.print("\n[bold green]✅ Pedidos archivados[/bold green]")
+    segmentos = resumen["segmentos"]
+    console.print(f"Segmentos: {len(segmentos)} ({segmentos[0]}" + (f" a {segmentos[-1]})" if len(segmentos) > 1 else ")"))
+    console.print(f"Pedidos: {resumen['pedidos']}")
+    console.print(f"Líneas de pedido: {resumen['lineas']}")
+    console.print(f"Pedidos que siguen en los archivos de pedidos: {resumen['conservados']}")
+
+def comando_compactar_diario(argumentos):
+    """Incorpora el diario de pedidos a los archivos JSON"""
+    from modulos.gestion_archivos import compactar_diario
+
+    compactados = compactar_diario()
+    console.print(f"\n[bold green]✅ Diario compactado ({compactados} eventos incorporados)[/bold green]")
+
+def comando_lote(argumentos):
+    """Aplica comandos JSON Lines (uno por línea) y guarda todo al final"""
+    from modulos.servicios import Sesion, ErrorServicio, aplicar_comando
+
+    if argumentos.archivo in (None, "-"):
+        entrada = sys.stdin
+    else:
+        entrada = open(argumentos.archivo, "r", encoding="utf-8")
+
+    sesion = Sesion()
+    aplicados = 0
+    errores = []
+    # Un ErrorServicio se lanza antes de modificar nada; cualquier otro error
+    # puede dejar el comando aplicado a medias en la sesión
+    a_medias = False
+    with entrada:
+        for numero, linea in enumerate(entrada, 1):
+            if not linea.strip():
+                continue
+            try:
+                aplicar_comando(sesion, json.loads(linea))
+                aplicados += 1
+            except (json.JSONDecodeError, ErrorServicio) as error:
+                errores.append((numero, str(error)))
+                if not argumentos.continuar:
+                    break
+            except (TypeError, ValueError) as error:
+                errores.append((numero, f"Comando no válido: {error}"))
+                a_medias = True
+                break
+
+    for numero, mensaje in errores:
+        console.print(f"[bold red]❌ Línea {numero}: {mensaje}[/bold red]")
+
+    # Sin --continuar un error cancela el lote completo; con --continuar
+    # también, si la sesión pudo quedar a medias
+    if errores and (a_medias or not argumentos.continuar):
+        sesion.descartar_cambios()
+        console.print("\n[bold yellow]⚠ Lote cancelado: no se guardó ningún cambio[/bold yellow]")
+        sys.exit(1)
+
+    try:
+        sesion.confirmar()
+    except ErrorServicio as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        console.print("\n[bold yellow]⚠ Lote cancelado: no se guardó ningún cambio[/bold yellow]")
+        sys.exit(1)
+    console.print(f"\n[bold green]✅ Lote aplicado ({aplicados} comandos, {len(errores)} con errores)[/bold green]")
+
+def comando_importar_csv(argumentos):
+    """Importa productos desde un CSV"""
+    from modulos.intercambio_csv import importar_productos_csv
+    from modulos.servicios import ErrorServicio
+
+    try:
+        resumen = importar_productos_csv(argumentos.archivo, argumentos.rechazos)
+    except (OSError, ErrorServicio) as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        sys.exit(1)
+    console.print("\n[bold green]✅ Importación completada[/bold green]")
+    console.print(f"Productos agregados: {resumen['agregados']}")
+    console.print(f"Productos actualizados: {resumen['actualizados']}")
+    console.print(f"Filas rechazadas: {resumen['rechazados']}")
+    if resumen["rechazos"]:
+        console.print(f"Detalle de los rechazos en: {resumen['rechazos']}")
+
+def comando_exportar_csv(argumentos):
+    """Exporta el catálogo de productos a un CSV"""
+    from modulos.intercambio_csv import exportar_productos_csv
+
+    cantidad = exportar_productos_csv(argumentos.archivo)
+    console.print(f"\n[bold green]✅ {cantidad} productos exportados a {argumentos.archivo}[/bold green]")
+
+def comando_servidor(argumentos):
+    """Atiende la API HTTP/JSON hasta que se presione Ctrl+C"""
+    import asyncio
+    from modulos.servidor_api import ejecutar_servidor
+
+    def al_iniciar(servidor):
+        console.print(f"\n[bold green]✅ Servidor escuchando en http://{argumentos.host}:{argumentos.puerto}[/bold green]")
+        console.print("Presione Ctrl+C para detenerlo")
+
+    try:
+        asyncio.run(ejecutar_servidor(argumentos.host, argumentos.puerto, al_iniciar))
+    except KeyboardInterrupt:
+        console.print("\n[bold cyan]Servidor detenido[/bold cyan]")
+
+def comando_generar_carga(argumentos):
+    """Lanza clientes simultáneos contra el servidor y muestra los resultados"""
+    import asyncio
+    from rich.table import Table
+    from modulos.generador_carga import generar_carga
+
+    try:
+        resumen = asyncio.run(generar_carga(argumentos.url, argumentos.clientes, argumentos.peticiones))
+    except (OSError, ValueError) as error:
+        console.print(f"\n[bold red]❌ No se pudo generar la carga: {error}[/bold red]")
+        sys.exit(1)
+
+    tabla = Table(title="Resultados de la prueba de carga")
+    tabla.add_column("Petición", style="cyan")
+    tabla.add_column("Cantidad", justify="right")
+    tabla.add_column("p50 (ms)", justify="right")
+    tabla.add_column("p95 (ms)", justify="right")
+    tabla.add_column("p99 (ms)", justify="right")
+    filas = list(resumen["por_tipo"].items()) + [("Total", resumen)]
+    for tipo, datos in filas:
+        tabla.add_row(
+            tipo, str(datos["peticiones"]), f"{datos['p50_ms']:.1f}",
+            f"{datos['p95_ms']:.1f}", f"{datos['p99_ms']:.1f}"
+        )
+    console.print(tabla)
+    console.print(f"Peticiones por segundo: {resumen['peticiones_por_segundo']:.0f}")
+    console.print(f"Pedidos rechazados por falta de stock: {resumen['rechazados_sin_stock']}")
+    for tipo, cantidad in resumen["errores"].items():
+        console.print(f"[bold red]❌ {tipo}: {cantidad}[/bold red]")
+    if resumen["stock_negativo"]:
+        console.print(f"[bold red]❌ Productos con stock negativo: {', '.join(resumen['stock_negativo'])}[/bold red]")
+        sys.exit(1)
+    console.print("[bold green]✅ Ningún producto quedó con stock negativo[/bold green]")
+
+def comando_reporte_ventas(argumentos):
+    """Muestra ingresos, unidades y margen de las ventas agrupados"""
+    import math
+    from datetime import datetime, timedelta
+    from modulos.analisis_ventas import ErrorReporte, cargar_ventas, reporte_ventas, rango_mes_anterior
+    from modulos.gestion_reportes import mostrar_reporte
+
+    try:
+        if argumentos.mes_anterior:
+            desde, hasta = rango_mes_anterior()
+        else:
+            desde = datetime.strptime(argumentos.desde, "%Y-%m-%d") if argumentos.desde else None
+            # La fecha final se incluye completa
+            hasta = datetime.strptime(argumentos.hasta, "%Y-%m-%d") + timedelta(days=1) if argumentos.hasta else None
+    except ValueError:
+        console.print("\n[bold red]❌ Fecha no válida (use AAAA-MM-DD)[/bold red]")
+        sys.exit(1)
+
+    try:
+        ventas = cargar_ventas()
+        filas, totales = reporte_ventas(ventas, argumentos.agrupar, desde, hasta, argumentos.estado)
+    except ErrorReporte as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        sys.exit(1)
+
+    if argumentos.json:
+        # NaN no es JSON válido: el margen desconocido se escribe como null
+        for fila in filas + [totales]:
+            for clave, valor in fila.items():
+                if isinstance(valor, float) and math.isnan(valor):
+                    fila[clave] = None
+        print(json.dumps({"filas": filas, "totales": totales}, ensure_ascii=False, indent=2))
+        return
+    titulo = f"Ventas por {argumentos.agrupar}"
+    mostrar_reporte(filas, totales, titulo, ventas.nombres_producto if argumentos.agrupar == "producto" else None)
+
+def comando_ventas_del_dia(argumentos):
+    """Muestra las ventas de un día desde los agregados"""
+    from datetime import datetime
+    from modulos.gestion_archivos import cargar_datos
+    from modulos.gestion_reportes import mostrar_ventas_del_dia
+
+    if argumentos.dia:
+        try:
+            datetime.strptime(argumentos.dia, "%Y-%m-%d")
+        except ValueError:
+            console.print("\n[bold red]❌ Fecha no válida (use AAAA-MM-DD)[/bold red]")
+            sys.exit(1)
+    nombres = {producto["codigo_producto"]: producto["nombre"] for producto in cargar_datos()["productos"]}
+    mostrar_ventas_del_dia(argumentos.dia, nombres)
+
+def comando_reconstruir_agregados(argumentos):
+    """Recalcula los agregados desde todos los pedidos y los compara con los guardados"""
+    from modulos.gestion_archivos import reconstruir_agregados
+
+    calculados, diferencias = reconstruir_agregados(guardar=not argumentos.solo_verificar)
+    dias = len(calculados["ventas_por_dia"])
+    if not diferencias:
+        console.print(f"\n[bold green]✅ Los agregados coinciden con los pedidos ({dias} días con ventas)[/bold green]")
+        return
+
+    console.print(f"\n[bold yellow]⚠ {len(diferencias)} diferencias con el recálculo completo:[/bold yellow]")
+    for diferencia in diferencias[:20]:
+        console.print(f"  {diferencia}")
+    if len(diferencias) > 20:
+        console.print(f"  ... y {len(diferencias) - 20} más")
+    if argumentos.solo_verificar:
+        sys.exit(1)
+    console.print(f"[bold green]✅ Agregados reconstruidos ({dias} días con ventas)[/bold green]")
+
+def comando_metricas(argumentos):
+    """Resume el registro de métricas de todas las sesiones"""
+    from modulos import metricas
+    from modulos.gestion_diagnostico import mostrar_metricas
+
+    ruta = argumentos.archivo or metricas.RUTA_METRICAS
+    mostrar_metricas(metricas.resumen_registro(ruta), f"🩺 Operaciones registradas en {ruta}")
+
+def comando_reabastecimiento(argumentos):
+    """Lista los productos con menos stock que su mínimo, agrupados por proveedor"""
+    from modulos import servicios
+    from modulos.gestion_archivos import cargar_datos
+    from modulos.gestion_productos import mostrar_reabastecimiento
+
+    datos = cargar_datos()
+    if not argumentos.json:
+        mostrar_reabastecimiento(datos)
+        return
+    sesion = servicios.Sesion(datos)
+    reporte = {
+        proveedor: [
+            {
+                "codigo_producto": producto["codigo_producto"],
+                "nombre": producto["nombre"],
+                "cantidad_en_stock": producto["cantidad_en_stock"],
+                "stock_minimo": sesion.catalogo.stock_minimo(producto),
+            }
+            for producto in productos
+        ]
+        for proveedor, productos in servicios.productos_para_reabastecer(sesion).items()
+    }
+    print(json.dumps(reporte, ensure_ascii=False, indent=2))
+
+def crear_parser():
+    """Crea el analizador de argumentos con todos los subcomandos"""
+    parser = argparse.ArgumentParser(
+        description="Herramientas de mantenimiento de Maison du Pain"
+    )
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    migrar = subcomandos.add_parser(
+        "migrar-sqlite",
+        help="Copia los datos de los archivos JSON a SQLite (datos/panaderia.db)"
+    )
+    migrar.set_defaults(funcion=comando_migrar_sqlite)
+
+    particionar = subcomandos.add_parser(
+        "particionar-pedidos",
+        help="Reparte los pedidos en un archivo por mes (datos/pedidos/meses/)"
+    )
+    particionar.set_defaults(funcion=comando_particionar_pedidos)
+
+    archivar = subcomandos.add_parser(
+        "archivar-pedidos",
+        help="Pasa los pedidos entregados antiguos a un archivo comprimido (datos/pedidos/archivo/)"
+    )
+    archivar.add_argument(
+        "--dias", type=int,
+        help="Antigüedad mínima en días (por defecto, la opción \"dias_para_archivar\")"
+    )
+    archivar.add_argument(
+        "--compresion", choices=("gzip", "lzma"),
+        help="Compresión del segmento (por defecto, la opción \"compresion_archivo\")"
+    )
+    archivar.set_defaults(funcion=comando_archivar_pedidos)
+
+    compactar = subcomandos.add_parser(
+        "compactar-diario",
+        help="Incorpora los eventos del diario de pedidos a los archivos JSON"
+    )
+    compactar.set_defaults(funcion=comando_compactar_diario)
+
+    lote = subcomandos.add_parser(
+        "lote",
+        help="Aplica operaciones en formato JSON Lines y las guarda de una sola vez"
+    )
+    lote.add_argument(
+        "archivo", nargs="?",
+        help="Archivo con un comando JSON por línea (por defecto, la entrada estándar)"
+    )
+    lote.add_argument(
+        "--continuar", action="store_true",
+        help="Omite los comandos con errores en lugar de cancelar el lote"
+    )
+    lote.set_defaults(funcion=comando_lote)
+
+    importar = subcomandos.add_parser(
+        "importar-csv",
+        help="Agrega o actualiza productos desde un CSV"
+    )
+    importar.add_argument("archivo", help="CSV con una fila por producto")
+    importar.add_argument(
+        "--rechazos",
+        help="Archivo donde se escriben las filas rechazadas (por defecto <archivo>.rechazos.csv)"
+    )
+    importar.set_defaults(funcion=comando_importar_csv)
+
+    exportar = subcomandos.add_parser(
+        "exportar-csv",
+        help="Escribe el catálogo de productos en un CSV"
+    )
+    exportar.add_argument("archivo", help="CSV de destino")
+    exportar.set_defaults(funcion=comando_exportar_csv)
+
+    servidor = subcomandos.add_parser(
+        "servidor",
+        help="Atiende la API HTTP/JSON de productos y pedidos"
+    )
+    servidor.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto 127.0.0.1)")
+    servidor.add_argument("--puerto", type=int, default=8080, help="Puerto de escucha (por defecto 8080)")
+    servidor.set_defaults(funcion=comando_servidor)
+
+    carga = subcomandos.add_parser(
+        "generar-carga",
+        help="Prueba el servidor con varios clientes simultáneos"
+    )
+    carga.add_argument("--url", default="http://127.0.0.1:8080", help="Dirección del servidor")
+    carga.add_argument("--clientes", type=int, default=10, help="Clientes simultáneos (por defecto 10)")
+    carga.add_argument("--peticiones", type=int, default=100, help="Peticiones por cliente (por defecto 100)")
+    carga.set_defaults(funcion=comando_generar_carga)
+
+    reporte = subcomandos.add_parser(
+        "reporte-ventas",
+        help="Ingresos, unidades, margen y valor medio por pedido (necesita NumPy)"
+    )
+    reporte.add_argument(
+        "--agrupar", choices=("producto", "categoria", "mes", "estado"), default="producto",
+        help="Cómo agrupar las ventas (por defecto: producto)"
+    )
+    reporte.add_argument("--desde", help="Fecha inicial AAAA-MM-DD")
+    reporte.add_argument("--hasta", help="Fecha final AAAA-MM-DD (incluida)")
+    reporte.add_argument("--mes-anterior", action="store_true", help="Solo el mes calendario anterior")
+    reporte.add_argument(
+        "--estado", action="append",
+        help="Solo pedidos en este estado (se puede repetir)"
+    )
+    reporte.add_argument("--json", action="store_true", help="Escribir el reporte en JSON")
+    reporte.set_defaults(funcion=comando_reporte_ventas)
+
+    ventas_dia = subcomandos.add_parser(
+        "ventas-del-dia",
+        help="Unidades e ingresos de un día por producto, desde los agregados"
+    )
+    ventas_dia.add_argument("--dia", help="Día AAAA-MM-DD (por defecto: hoy)")
+    ventas_dia.set_defaults(funcion=comando_ventas_del_dia)
+
+    reconstruir = subcomandos.add_parser(
+        "reconstruir-agregados",
+        help="Recalcula los agregados de ventas desde los pedidos y muestra las diferencias"
+    )
+    reconstruir.add_argument(
+        "--solo-verificar", action="store_true",
+        help="Solo comparar, sin reemplazar los guardados (termina con error si hay diferencias)"
+    )
+    reconstruir.set_defaults(funcion=comando_reconstruir_agregados)
+
+    resumen_metricas = subcomandos.add_parser(
+        "metricas",
+        help="Resume las duraciones y los bytes leídos y escritos del registro de métricas"
+    )
+    resumen_metricas.add_argument(
+        "--archivo",
+        help="Registro a resumir (por defecto datos/metricas.jsonl)"
+    )
+    resumen_metricas.set_defaults(funcion=comando_metricas)
+
+    reabastecimiento = subcomandos.add_parser(
+        "reabastecimiento",
+        help="Productos con menos stock que su mínimo, agrupados por proveedor"
+    )
+    reabastecimiento.add_argument("--json", action="store_true", help="Escribir el reporte en JSON")
+    reabastecimiento.set_defaults(funcion=comando_reabastecimiento)
+
+    return parser
+
+def main():
+    """Función principal de las herramientas"""
+    from modulos.gestion_archivos import ErrorArchivoDanado
+
+    argumentos = crear_parser().parse_args()
+    try:
+        argumentos.funcion(argumentos)
+    except ErrorArchivoDanado as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,11 @@ from rich.console import Console
 from rich.text import Text
 from rich.panel import Panel
 
-from modulos.gestion_archivos import cargar_datos, guardar_datos
+from modulos.gestion_archivos import cargar_datos, recargar_datos, ErrorArchivoDanado
 from modulos.gestion_productos import gestionar_productos
 from modulos.gestion_pedidos import gestionar_pedidos
+from modulos.gestion_reportes import gestionar_reportes
+from modulos.gestion_diagnostico import mostrar_diagnostico
 
 # Instancia de consola para la visualización
 console = Console()
@@ -49,7 +51,9 @@ def mostrar_menu_principal():
     console.print("\n[bold cyan]=== MENÚ PRINCIPAL ===[/bold cyan]")
     console.print("1️⃣ Gestión de Productos")
     console.print("2️⃣ Gestión de Pedidos")
-    console.print("3️⃣ 👋 Salir")
+    console.print("3️⃣ 📈 Reportes")
+    console.print("4️⃣ 🩺 Diagnóstico")
+    console.print("5️⃣ 👋 Salir")
     return input("\n⚡ Seleccione una opción: ")
 
 def main():
@@ -58,21 +62,31 @@ def main():
     mostrar_banner()
     
     # Cargar datos desde el archivo JSON
-    datos = cargar_datos()
+    try:
+        datos = cargar_datos()
+    except ErrorArchivoDanado as error:
+        # Sin catálogo no se sigue: cualquier guardado pisaría el apartado
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        return
     
     # Menú principal
     while True:
         opcion = mostrar_menu_principal()
         
         if opcion == "1":
+            # Releemos los productos por si otra terminal los modificó
+            # (cada operación guarda sus propios cambios al terminar)
+            recargar_datos(datos)
             gestionar_productos(datos)
-            # Guardamos los cambios después de gestionar productos
-            guardar_datos(datos)
         elif opcion == "2":
+            recargar_datos(datos)
             gestionar_pedidos(datos)
-            # Guardamos los cambios después de gestionar pedidos
-            guardar_datos(datos)
         elif opcion == "3":
+            recargar_datos(datos)
+            gestionar_reportes(datos)
+        elif opcion == "4":
+            mostrar_diagnostico()
+        elif opcion == "5":
             break
         else:
             console.print("\n[bold yellow]⚠ Opción no válida[/bold yellow]")
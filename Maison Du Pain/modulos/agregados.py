@@ -0,0 +1,133 @@
+"""
+Módulo de agregados de ventas
+Unidades e ingresos por producto y día, y cantidad de pedidos por estado
+
+Los agregados se guardan aparte y se mantienen con deltas: cada operación
+sobre pedidos anota un evento "agregados" con lo que suma o resta, y
+gestion_archivos lo aplica al confirmar, en la misma transacción que los
+pedidos. Así consultar las ventas de un día no recorre el historial.
+calcular() los rehace desde cero para verificarlos o reconstruirlos.
+
+Con archivos JSON las ventas se reparten en un archivo por mes y los pedidos
+por estado van en otro (datos/agregados/), así cada operación solo reescribe
+el mes de su pedido; con el diario activo los deltas se anotan en el diario
+y se incorporan a esos archivos al compactar. En SQLite se guardan en dos
+tablas de la misma base.
+
+Los deltas salen de lo que la sesión tenía en memoria: si dos terminales
+modifican a la vez el mismo pedido (igual que con el stock de sus líneas) los
+agregados pueden desviarse; `python herramientas.py reconstruir-agregados`
+los compara con el recálculo completo y los corrige.
+
+Estructura:
+    {
+        "ventas_por_dia": {"2024-03-21": {"PN-001": {"unidades": 3, "ingresos": 10.5}}},
+        "pedidos_por_estado": {"pendiente": 4, "entregado": 10}
+    }
+"""
+
+from modulos.particiones import mes_de
+
+# Diferencia de ingresos que se tolera al comparar (sumas de decimales)
+TOLERANCIA = 0.005
+
+def vacios():
+    return {"ventas_por_dia": {}, "pedidos_por_estado": {}}
+
+def dia_de(pedido):
+    """Día (AAAA-MM-DD) al que se asignan las ventas de un pedido"""
+    return pedido["fecha_pedido"][:10]
+
+def mes_de_dia(dia):
+    """Mes (AAAA-MM) en cuyo archivo se guardan las ventas de un día"""
+    return mes_de(dia)
+
+def dividir_por_mes(agregados):
+    """Reparte las ventas por mes: {mes: {"ventas_por_dia": {...}}}"""
+    meses = {}
+    for dia, ventas in agregados["ventas_por_dia"].items():
+        meses.setdefault(mes_de_dia(dia), {"ventas_por_dia": {}})["ventas_por_dia"][dia] = ventas
+    return meses
+
+def del_mes(agregados, mes):
+    """Los agregados con las ventas de los días de ese mes solamente"""
+    return {
+        "ventas_por_dia": {
+            dia: ventas for dia, ventas in agregados["ventas_por_dia"].items() if mes_de_dia(dia) == mes
+        },
+        "pedidos_por_estado": agregados["pedidos_por_estado"],
+    }
+
+def _sumar_venta(agregados, dia, codigo_producto, unidades, ingresos):
+    ventas_dia = agregados["ventas_por_dia"].setdefault(dia, {})
+    venta = ventas_dia.setdefault(codigo_producto, {"unidades": 0, "ingresos": 0.0})
+    venta["unidades"] += unidades
+    venta["ingresos"] = round(venta["ingresos"] + ingresos, 6)
+    # Los productos y días que quedan en cero se quitan
+    if venta["unidades"] == 0 and abs(venta["ingresos"]) < TOLERANCIA:
+        del ventas_dia[codigo_producto]
+        if not ventas_dia:
+            del agregados["ventas_por_dia"][dia]
+
+def _sumar_estado(agregados, estado, cantidad):
+    por_estado = agregados["pedidos_por_estado"]
+    por_estado[estado] = por_estado.get(estado, 0) + cantidad
+    if por_estado[estado] == 0:
+        del por_estado[estado]
+
+def aplicar(agregados, eventos):
+    """Aplica los deltas de los eventos "agregados" sobre la estructura"""
+    for datos_evento in eventos:
+        for codigo_producto, unidades, ingresos in datos_evento["ventas"]:
+            _sumar_venta(agregados, datos_evento["dia"], codigo_producto, unidades, ingresos)
+        for estado, cantidad in datos_evento["estados"].items():
+            _sumar_estado(agregados, estado, cantidad)
+    return agregados
+
+def calcular(datos_pedidos, datos_detalles):
+    """Calcula los agregados desde cero a partir de todos los pedidos"""
+    agregados = vacios()
+    pedidos = {}
+    for pedido in datos_pedidos["pedidos"]:
+        pedidos[pedido["codigo_pedido"]] = pedido
+        _sumar_estado(agregados, pedido["estado"], 1)
+    for bloque in datos_detalles["detalles_pedidos"]:
+        pedido = pedidos.get(bloque["codigo_pedido"])
+        if pedido is None:
+            continue
+        for linea in bloque["detalles"]:
+            _sumar_venta(agregados, dia_de(pedido), linea["codigo_producto"],
+                         linea["cantidad"], linea["subtotal"])
+    return agregados
+
+def comparar(esperados, actuales):
+    """Devuelve la lista de diferencias entre dos agregados (vacía si coinciden)"""
+    diferencias = []
+    estados = set(esperados["pedidos_por_estado"]) | set(actuales["pedidos_por_estado"])
+    for estado in sorted(estados):
+        esperado = esperados["pedidos_por_estado"].get(estado, 0)
+        actual = actuales["pedidos_por_estado"].get(estado, 0)
+        if esperado != actual:
+            diferencias.append(f"Pedidos {estado}: {actual} (debería ser {esperado})")
+
+    dias = set(esperados["ventas_por_dia"]) | set(actuales["ventas_por_dia"])
+    for dia in sorted(dias):
+        ventas_esperadas = esperados["ventas_por_dia"].get(dia, {})
+        ventas_actuales = actuales["ventas_por_dia"].get(dia, {})
+        for codigo_producto in sorted(set(ventas_esperadas) | set(ventas_actuales)):
+            esperada = ventas_esperadas.get(codigo_producto, {"unidades": 0, "ingresos": 0.0})
+            actual = ventas_actuales.get(codigo_producto, {"unidades": 0, "ingresos": 0.0})
+            if (esperada["unidades"] != actual["unidades"] or
+                    abs(esperada["ingresos"] - actual["ingresos"]) > TOLERANCIA):
+                diferencias.append(
+                    f"{dia} {codigo_producto}: {actual['unidades']} u. / ${actual['ingresos']:.2f} "
+                    f"(debería ser {esperada['unidades']} u. / ${esperada['ingresos']:.2f})"
+                )
+    return diferencias
+
+def ventas_del_dia(agregados, dia):
+    """Devuelve (unidades, ingresos, ventas por producto) de un día AAAA-MM-DD"""
+    ventas = agregados["ventas_por_dia"].get(dia, {})
+    unidades = sum(venta["unidades"] for venta in ventas.values())
+    ingresos = sum(venta["ingresos"] for venta in ventas.values())
+    return unidades, ingresos, ventas
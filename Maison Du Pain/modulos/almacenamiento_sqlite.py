@@ -0,0 +1,484 @@
+"""
+Módulo de almacenamiento en SQLite
+Guarda productos, pedidos y líneas de pedido en datos/panaderia.db
+
+Expone las mismas estructuras que los archivos JSON para que
+gestion_archivos pueda usarlo como motor alternativo.
+"""
+import json
+import os
+import sqlite3
+
+from modulos import agregados
+from modulos.configuracion import DATOS_DIR
+
+RUTA_BASE_DATOS = os.path.join(DATOS_DIR, "panaderia.db")
+
+CAMPOS_PRODUCTO = (
+    "codigo_producto", "nombre", "categoria", "descripcion",
+    "proveedor", "cantidad_en_stock", "precio_venta", "precio_proveedor"
+)
+CAMPOS_PEDIDO = ("codigo_pedido", "codigo_cliente", "fecha_pedido", "estado", "total")
+CAMPOS_LINEA = ("numero_linea", "codigo_producto", "cantidad", "precio_unidad", "subtotal")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS productos (
+    codigo_producto TEXT PRIMARY KEY,
+    nombre TEXT,
+    categoria TEXT,
+    descripcion TEXT,
+    proveedor TEXT,
+    cantidad_en_stock INTEGER,
+    precio_venta REAL,
+    precio_proveedor REAL
+);
+CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos (categoria);
+
+CREATE TABLE IF NOT EXISTS pedidos (
+    codigo_pedido TEXT PRIMARY KEY,
+    codigo_cliente TEXT,
+    fecha_pedido TEXT,
+    estado TEXT,
+    total REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (codigo_cliente);
+
+CREATE TABLE IF NOT EXISTS lineas_pedido (
+    codigo_pedido TEXT NOT NULL,
+    numero_linea INTEGER NOT NULL,
+    codigo_producto TEXT,
+    cantidad INTEGER,
+    precio_unidad REAL,
+    subtotal REAL,
+    PRIMARY KEY (codigo_pedido, numero_linea)
+);
+CREATE INDEX IF NOT EXISTS idx_lineas_producto ON lineas_pedido (codigo_producto);
+
+-- Claves adicionales de datos_panaderia.json que no son productos
+CREATE TABLE IF NOT EXISTS extras (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+
+-- Agregados de ventas (ver modulos/agregados.py)
+CREATE TABLE IF NOT EXISTS ventas_por_dia (
+    dia TEXT NOT NULL,
+    codigo_producto TEXT NOT NULL,
+    unidades INTEGER,
+    ingresos REAL,
+    PRIMARY KEY (dia, codigo_producto)
+);
+
+CREATE TABLE IF NOT EXISTS pedidos_por_estado (
+    estado TEXT PRIMARY KEY,
+    cantidad INTEGER
+);
+"""
+
+# PRAGMA user_version de una base cuyas tablas de agregados ya se calcularon
+# (las bases anteriores las tienen vacías hasta el primer cálculo)
+VERSION_CON_AGREGADOS = 1
+
+def conectar(ruta=None):
+    """Abre la base de datos y crea las tablas si no existen"""
+    ruta = ruta or RUTA_BASE_DATOS
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(ESQUEMA)
+    return conexion
+
+def _fila(registro, campos):
+    """Convierte un diccionario en una tupla con el orden de las columnas"""
+    return tuple(registro.get(campo) for campo in campos)
+
+def _reemplazar_tabla(conexion, tabla, campos, filas):
+    """Reemplaza todas las filas de una tabla dentro de la transacción en curso"""
+    columnas = ", ".join(campos)
+    marcadores = ", ".join("?" for _ in campos)
+    conexion.execute(f"DELETE FROM {tabla}")
+    conexion.executemany(f"INSERT INTO {tabla} ({columnas}) VALUES ({marcadores})", filas)
+
+def cargar_datos(conexion=None):
+    """Carga los productos (y claves extra) con la estructura de datos_panaderia.json"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        columnas = ", ".join(CAMPOS_PRODUCTO)
+        filas = conexion.execute(f"SELECT {columnas} FROM productos ORDER BY rowid").fetchall()
+        datos = {"productos": [dict(zip(CAMPOS_PRODUCTO, fila)) for fila in filas]}
+        for clave, valor in conexion.execute("SELECT clave, valor FROM extras"):
+            datos[clave] = json.loads(valor)
+        return datos
+    finally:
+        if propia:
+            conexion.close()
+
+def _guardar_datos(conexion, datos):
+    """Reemplaza los productos y las claves extra dentro de la transacción en curso"""
+    _reemplazar_tabla(conexion, "productos", CAMPOS_PRODUCTO,
+                      [_fila(producto, CAMPOS_PRODUCTO) for producto in datos["productos"]])
+    _reemplazar_tabla(conexion, "extras", ("clave", "valor"), [
+        (clave, json.dumps(valor, ensure_ascii=False))
+        for clave, valor in datos.items() if clave != "productos"
+    ])
+
+def guardar_datos(datos, conexion=None):
+    """Reemplaza todos los productos por los de datos"""
+    guardar_cambios(datos=datos, conexion=conexion)
+
+def cargar_pedidos(conexion=None):
+    """Carga los pedidos con la estructura de pedidos.json"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        columnas = ", ".join(CAMPOS_PEDIDO)
+        filas = conexion.execute(f"SELECT {columnas} FROM pedidos ORDER BY rowid").fetchall()
+        return {"pedidos": [dict(zip(CAMPOS_PEDIDO, fila)) for fila in filas]}
+    finally:
+        if propia:
+            conexion.close()
+
+def _guardar_pedidos(conexion, datos):
+    """Reemplaza los pedidos dentro de la transacción en curso"""
+    _reemplazar_tabla(conexion, "pedidos", CAMPOS_PEDIDO,
+                      [_fila(pedido, CAMPOS_PEDIDO) for pedido in datos["pedidos"]])
+
+def guardar_pedidos(datos, conexion=None):
+    """Reemplaza todos los pedidos por los de datos"""
+    guardar_cambios(datos_pedidos=datos, conexion=conexion)
+
+def cargar_detalles_pedidos(conexion=None):
+    """Carga las líneas de pedido con la estructura de detalles_pedidos.json"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        columnas = ", ".join(CAMPOS_LINEA)
+        detalles_por_pedido = {}
+        for fila in conexion.execute(
+            f"SELECT codigo_pedido, {columnas} FROM lineas_pedido "
+            "ORDER BY codigo_pedido, numero_linea"
+        ):
+            detalles_por_pedido.setdefault(fila[0], []).append(fila[1:])
+
+        # Respetamos el orden de creación de los pedidos
+        orden = [codigo for (codigo,) in conexion.execute("SELECT codigo_pedido FROM pedidos ORDER BY rowid")]
+        con_pedido = set(orden)
+        orden += [codigo for codigo in detalles_por_pedido if codigo not in con_pedido]
+
+        detalles_pedidos = []
+        for codigo in orden:
+            lineas = detalles_por_pedido.get(codigo)
+            if lineas is None:
+                continue
+            detalles_pedidos.append({
+                "codigo_pedido": codigo,
+                "detalles": [dict(zip(CAMPOS_LINEA, linea)) for linea in lineas]
+            })
+        return {"detalles_pedidos": detalles_pedidos}
+    finally:
+        if propia:
+            conexion.close()
+
+def cargar_detalle_pedido(codigo_pedido, conexion=None):
+    """Carga solo las líneas de un pedido usando la clave primaria"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        columnas = ", ".join(CAMPOS_LINEA)
+        filas = conexion.execute(
+            f"SELECT {columnas} FROM lineas_pedido WHERE codigo_pedido = ? ORDER BY numero_linea",
+            (codigo_pedido,)
+        ).fetchall()
+        if not filas:
+            return None
+        return {
+            "codigo_pedido": codigo_pedido,
+            "detalles": [dict(zip(CAMPOS_LINEA, fila)) for fila in filas]
+        }
+    finally:
+        if propia:
+            conexion.close()
+
+def _guardar_detalles_pedidos(conexion, datos):
+    """Reemplaza las líneas de todos los pedidos dentro de la transacción en curso"""
+    _reemplazar_tabla(conexion, "lineas_pedido", ("codigo_pedido",) + CAMPOS_LINEA, [
+        (detalle_pedido["codigo_pedido"],) + _fila(linea, CAMPOS_LINEA)
+        for detalle_pedido in datos["detalles_pedidos"]
+        for linea in detalle_pedido["detalles"]
+    ])
+
+def guardar_detalles_pedidos(datos, conexion=None):
+    """Reemplaza todas las líneas de pedido por las de datos"""
+    guardar_cambios(datos_detalles=datos, conexion=conexion)
+
+def guardar_cambios(datos=None, datos_pedidos=None, datos_detalles=None, conexion=None):
+    """Reemplaza productos, pedidos y/o líneas completos en una única transacción
+
+    Es para guardar estructuras enteras (migración, archivado); las
+    operaciones del día a día usan aplicar_eventos(). Los argumentos que son
+    None no se modifican. Si algo falla, la transacción se deshace completa y
+    la base queda como estaba.
+    """
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        with conexion:
+            if datos is not None:
+                _guardar_datos(conexion, datos)
+            if datos_pedidos is not None:
+                _guardar_pedidos(conexion, datos_pedidos)
+            if datos_detalles is not None:
+                _guardar_detalles_pedidos(conexion, datos_detalles)
+    finally:
+        if propia:
+            conexion.close()
+
+def agregados_iniciados(conexion=None):
+    """Indica si las tablas de agregados ya tienen los agregados calculados"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        return conexion.execute("PRAGMA user_version").fetchone()[0] >= VERSION_CON_AGREGADOS
+    finally:
+        if propia:
+            conexion.close()
+
+def _donde(columna, valores):
+    """Cláusula WHERE y parámetros para las filas con esos valores (todas si es None)"""
+    if valores is None:
+        return "", []
+    valores = list(valores)
+    return f" WHERE {columna} IN ({', '.join('?' for _ in valores)})", valores
+
+def _leer_agregados(conexion, dias=None, estados=None):
+    """Lee los agregados de esos días y estados (todos si son None)"""
+    datos_agregados = agregados.vacios()
+    donde, parametros = _donde("dia", dias)
+    consulta = "SELECT dia, codigo_producto, unidades, ingresos FROM ventas_por_dia"
+    for dia, codigo_producto, unidades, ingresos in conexion.execute(consulta + donde, parametros):
+        datos_agregados["ventas_por_dia"].setdefault(dia, {})[codigo_producto] = {
+            "unidades": unidades, "ingresos": ingresos
+        }
+    donde, parametros = _donde("estado", estados)
+    datos_agregados["pedidos_por_estado"] = dict(
+        conexion.execute("SELECT estado, cantidad FROM pedidos_por_estado" + donde, parametros)
+    )
+    return datos_agregados
+
+def cargar_agregados(mes=None, conexion=None):
+    """Carga los agregados de ventas; con mes ("AAAA-MM") solo los días de ese mes"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        dias = None
+        if mes is not None:
+            dias = [fila[0] for fila in conexion.execute(
+                "SELECT DISTINCT dia FROM ventas_por_dia WHERE dia BETWEEN ? AND ?", (f"{mes}-00", f"{mes}-99")
+            )]
+        return _leer_agregados(conexion, dias)
+    finally:
+        if propia:
+            conexion.close()
+
+def _escribir_agregados(conexion, datos_agregados, dias, estados):
+    """Reemplaza las filas de esos días y estados por las de datos_agregados"""
+    for dia in dias:
+        conexion.execute("DELETE FROM ventas_por_dia WHERE dia = ?", (dia,))
+        conexion.executemany(
+            "INSERT INTO ventas_por_dia (dia, codigo_producto, unidades, ingresos) VALUES (?, ?, ?, ?)",
+            [(dia, codigo_producto, venta["unidades"], venta["ingresos"])
+             for codigo_producto, venta in datos_agregados["ventas_por_dia"].get(dia, {}).items()]
+        )
+    for estado in estados:
+        conexion.execute("DELETE FROM pedidos_por_estado WHERE estado = ?", (estado,))
+        if estado in datos_agregados["pedidos_por_estado"]:
+            conexion.execute(
+                "INSERT INTO pedidos_por_estado (estado, cantidad) VALUES (?, ?)",
+                (estado, datos_agregados["pedidos_por_estado"][estado])
+            )
+
+def _guardar_agregados(conexion, datos_agregados):
+    """Reemplaza los agregados completos dentro de la transacción en curso"""
+    conexion.execute("DELETE FROM ventas_por_dia")
+    conexion.execute("DELETE FROM pedidos_por_estado")
+    _escribir_agregados(conexion, datos_agregados, datos_agregados["ventas_por_dia"],
+                        datos_agregados["pedidos_por_estado"])
+    conexion.execute(f"PRAGMA user_version = {VERSION_CON_AGREGADOS}")
+
+def guardar_agregados(datos_agregados, conexion=None):
+    """Reemplaza todos los agregados de ventas por los indicados"""
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        with conexion:
+            _guardar_agregados(conexion, datos_agregados)
+    finally:
+        if propia:
+            conexion.close()
+
+def _aplicar_agregados(conexion, eventos):
+    """Suma los deltas de los eventos "agregados" leyendo solo las filas que tocan"""
+    dias = {datos_evento["dia"] for datos_evento in eventos if datos_evento["ventas"]}
+    estados = {estado for datos_evento in eventos for estado in datos_evento["estados"]}
+    datos_agregados = agregados.aplicar(_leer_agregados(conexion, dias, estados), eventos)
+    _escribir_agregados(conexion, datos_agregados, dias, estados)
+
+def _insertar_linea(conexion, codigo_pedido, linea):
+    """Inserta (o reemplaza) una línea si el pedido existe"""
+    columnas = ", ".join(("codigo_pedido",) + CAMPOS_LINEA)
+    marcadores = ", ".join("?" for _ in range(len(CAMPOS_LINEA) + 1))
+    conexion.execute(
+        f"INSERT OR REPLACE INTO lineas_pedido ({columnas}) SELECT {marcadores} "
+        "WHERE EXISTS (SELECT 1 FROM pedidos WHERE codigo_pedido = ?)",
+        (codigo_pedido,) + _fila(linea, CAMPOS_LINEA) + (codigo_pedido,)
+    )
+
+def _renumerar_lineas(conexion, codigo_pedido):
+    """Vuelve a numerar desde 1 las líneas que le quedan a un pedido"""
+    columnas = ", ".join(CAMPOS_LINEA[1:])
+    filas = conexion.execute(
+        f"SELECT {columnas} FROM lineas_pedido WHERE codigo_pedido = ? ORDER BY numero_linea",
+        (codigo_pedido,)
+    ).fetchall()
+    conexion.execute("DELETE FROM lineas_pedido WHERE codigo_pedido = ?", (codigo_pedido,))
+    for numero_linea, fila in enumerate(filas, 1):
+        _insertar_linea(conexion, codigo_pedido, dict(zip(CAMPOS_LINEA, (numero_linea,) + fila)))
+
+def _aplicar_evento(conexion, datos_evento):
+    """Traduce un evento del diario a sentencias sobre las filas que toca
+
+    Devuelve False si es el alta de un pedido cuyo código ya existe.
+    """
+    tipo = datos_evento["tipo"]
+    if tipo == "stock":
+        conexion.execute(
+            "UPDATE productos SET cantidad_en_stock = cantidad_en_stock + ? WHERE codigo_producto = ?",
+            (datos_evento["delta"], datos_evento["codigo_producto"])
+        )
+    elif tipo == "agregar_producto":
+        columnas = ", ".join(CAMPOS_PRODUCTO)
+        marcadores = ", ".join("?" for _ in CAMPOS_PRODUCTO)
+        conexion.execute(
+            f"INSERT OR IGNORE INTO productos ({columnas}) VALUES ({marcadores})",
+            _fila(datos_evento["producto"], CAMPOS_PRODUCTO)
+        )
+    elif tipo == "editar_producto":
+        campos = [campo for campo in datos_evento["campos"] if campo in CAMPOS_PRODUCTO[1:]]
+        if campos:
+            asignaciones = ", ".join(f"{campo} = ?" for campo in campos)
+            conexion.execute(
+                f"UPDATE productos SET {asignaciones} WHERE codigo_producto = ?",
+                [datos_evento["campos"][campo] for campo in campos] + [datos_evento["codigo_producto"]]
+            )
+    elif tipo == "eliminar_producto":
+        conexion.execute("DELETE FROM productos WHERE codigo_producto = ?", (datos_evento["codigo_producto"],))
+    elif tipo == "crear_pedido":
+        pedido = datos_evento["pedido"]
+        columnas = ", ".join(CAMPOS_PEDIDO)
+        marcadores = ", ".join("?" for _ in CAMPOS_PEDIDO)
+        insertado = conexion.execute(
+            f"INSERT OR IGNORE INTO pedidos ({columnas}) VALUES ({marcadores})",
+            _fila(pedido, CAMPOS_PEDIDO)
+        ).rowcount
+        if not insertado:
+            return False
+        # Líneas que hubieran quedado de un pedido anterior con ese código
+        conexion.execute("DELETE FROM lineas_pedido WHERE codigo_pedido = ?", (pedido["codigo_pedido"],))
+        for linea in datos_evento["detalles"]["detalles"]:
+            _insertar_linea(conexion, pedido["codigo_pedido"], linea)
+    elif tipo == "eliminar_pedido":
+        conexion.execute("DELETE FROM pedidos WHERE codigo_pedido = ?", (datos_evento["codigo_pedido"],))
+        conexion.execute("DELETE FROM lineas_pedido WHERE codigo_pedido = ?", (datos_evento["codigo_pedido"],))
+    elif tipo == "cambiar_estado":
+        conexion.execute(
+            "UPDATE pedidos SET estado = ? WHERE codigo_pedido = ?",
+            (datos_evento["estado"], datos_evento["codigo_pedido"])
+        )
+    elif tipo in ("agregar_linea", "cambiar_cantidad", "eliminar_linea"):
+        codigo_pedido = datos_evento["codigo_pedido"]
+        if tipo == "agregar_linea":
+            _insertar_linea(conexion, codigo_pedido, datos_evento["linea"])
+        elif tipo == "cambiar_cantidad":
+            conexion.execute(
+                "UPDATE lineas_pedido SET cantidad = ?, subtotal = ? WHERE codigo_pedido = ? AND numero_linea = ?",
+                (datos_evento["cantidad"], datos_evento["subtotal"], codigo_pedido, datos_evento["numero_linea"])
+            )
+        else:
+            conexion.execute(
+                "DELETE FROM lineas_pedido WHERE codigo_pedido = ? AND numero_linea = ?",
+                (codigo_pedido, datos_evento["numero_linea"])
+            )
+            # Los eventos anotados antes de que las líneas conservaran su
+            # número no traen "renumerar" (ver diario.aplicar_a_detalles)
+            if datos_evento.get("renumerar", True):
+                _renumerar_lineas(conexion, codigo_pedido)
+        conexion.execute(
+            "UPDATE pedidos SET total = ? WHERE codigo_pedido = ?", (datos_evento["total"], codigo_pedido)
+        )
+    return True
+
+def aplicar_eventos(eventos, conexion=None, agregados_iniciales=None):
+    """Guarda una operación aplicando sus eventos fila a fila en una única transacción
+
+    Cada evento se traduce a sentencias sobre las filas que toca (el stock
+    se suma con UPDATE, los pedidos se insertan o borran por código), sin
+    leer las tablas completas; los deltas de los agregados se suman en la
+    misma transacción. Si las tablas de agregados todavía no se calcularon,
+    agregados_iniciales (los agregados antes de la operación) se guardan
+    primero; sin ellos los deltas no se aplican. Si al final un producto
+    vendido quedó con stock negativo, o un pedido nuevo usa un código que ya
+    existía, la transacción se deshace y se devuelve el conflicto: ("stock",
+    codigo_producto) o ("pedido", codigo_pedido). Si no, se confirma y se
+    devuelve None.
+    """
+    propia = conexion is None
+    conexion = conexion or conectar()
+    try:
+        conflicto = None
+        deltas = [datos_evento for datos_evento in eventos if datos_evento["tipo"] == "agregados"]
+        with conexion:
+            if agregados_iniciales is not None:
+                _guardar_agregados(conexion, agregados_iniciales)
+            if deltas and (agregados_iniciales is not None or agregados_iniciados(conexion)):
+                _aplicar_agregados(conexion, deltas)
+            for datos_evento in eventos:
+                if not _aplicar_evento(conexion, datos_evento):
+                    conflicto = ("pedido", datos_evento["pedido"]["codigo_pedido"])
+                    break
+            else:
+                vendidos = {
+                    datos_evento["codigo_producto"] for datos_evento in eventos
+                    if datos_evento["tipo"] == "stock" and datos_evento["delta"] < 0
+                }
+                for codigo_producto in vendidos:
+                    fila = conexion.execute(
+                        "SELECT cantidad_en_stock FROM productos WHERE codigo_producto = ?", (codigo_producto,)
+                    ).fetchone()
+                    if fila is not None and fila[0] < 0:
+                        conflicto = ("stock", codigo_producto)
+                        break
+            if conflicto is not None:
+                conexion.rollback()
+        return conflicto
+    finally:
+        if propia:
+            conexion.close()
+
+def migrar_desde_json(datos, datos_pedidos, datos_detalles, ruta=None):
+    """Copia de una sola vez el contenido de los archivos JSON a la base de datos
+
+    Reemplaza lo que hubiera en las tablas. Devuelve un resumen con la
+    cantidad de registros migrados.
+    """
+    conexion = conectar(ruta)
+    try:
+        guardar_cambios(datos, datos_pedidos, datos_detalles, conexion)
+
+        resumen = {
+            "productos": len(datos["productos"]),
+            "pedidos": len(datos_pedidos["pedidos"]),
+            "lineas": sum(len(d["detalles"]) for d in datos_detalles["detalles_pedidos"]),
+        }
+        return resumen
+    finally:
+        conexion.close()
@@ -0,0 +1,229 @@
+"""
+Módulo de análisis de ventas
+Ingresos, unidades y margen agrupados por producto, categoría, mes o estado
+
+Las líneas de pedido se cargan una sola vez en columnas de NumPy (índice del
+producto, cantidad, precio por unidad, fecha y estado del pedido) y cada
+reporte se calcula con operaciones vectorizadas (np.bincount agrupa las sumas
+sin recorrer las líneas en Python).
+
+El margen usa el precio_proveedor actual del catálogo; las líneas de productos
+que ya no están en el catálogo suman ingresos pero su margen queda sin calcular.
+
+NumPy es opcional: solo lo necesitan los reportes (pip install numpy).
+"""
+from datetime import datetime, timedelta
+
+from modulos.gestion_archivos import unir_archivados
+from modulos.indices_pedidos import convertir_fecha
+from modulos.servicios import ESTADOS_PEDIDO, Sesion
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Formas de agrupar un reporte
+AGRUPACIONES = ("producto", "categoria", "mes", "estado")
+
+# Grupo de las líneas de productos que ya no están en el catálogo
+SIN_CATALOGO = "(sin catálogo)"
+
+
+class ErrorReporte(ValueError):
+    """El reporte no se puede calcular (el mensaje se puede mostrar al usuario)"""
+
+
+def numpy_disponible():
+    return np is not None
+
+def _fechas_a_columna(textos):
+    """Convierte los textos de fecha_pedido en datetime64 (NaT si no son válidos)"""
+    try:
+        return np.array(textos, dtype="datetime64[s]")
+    except ValueError:
+        fechas = [convertir_fecha(texto) for texto in textos]
+        return np.array(
+            [np.datetime64(fecha, "s") if fecha else np.datetime64("NaT") for fecha in fechas],
+            dtype="datetime64[s]",
+        )
+
+
+class VentasColumnares:
+    """Líneas de pedido en columnas de NumPy
+
+    Columnas por línea (todas del mismo largo):
+    - producto: índice en codigos_producto
+    - pedido: índice en codigos_pedido
+    - cantidad, precio_unidad
+    - fecha (datetime64) y estado (índice en ESTADOS_PEDIDO) de su pedido
+
+    Columnas por producto: categoria (índice en categorias) y costo_unidad
+    (precio_proveedor, NaN si el producto no está en el catálogo).
+    """
+
+    def __init__(self, datos, datos_pedidos, datos_detalles):
+        if np is None:
+            raise ErrorReporte("Los reportes necesitan NumPy (pip install numpy)")
+
+        # Productos del catálogo y sus columnas
+        self.codigos_producto = []
+        indice_producto = {}
+        categorias = {}
+        categoria_producto = []
+        costo_producto = []
+        self.nombres_producto = {}
+        for producto in datos["productos"]:
+            codigo = producto["codigo_producto"]
+            indice_producto[codigo] = len(self.codigos_producto)
+            self.codigos_producto.append(codigo)
+            self.nombres_producto[codigo] = producto["nombre"]
+            categoria_producto.append(categorias.setdefault(producto["categoria"], len(categorias)))
+            costo_producto.append(float(producto["precio_proveedor"]))
+
+        # Pedidos: fecha y estado se guardan una vez por pedido
+        self.codigos_pedido = []
+        indice_pedido = {}
+        textos_fecha = []
+        estado_pedido = []
+        indice_estado = {estado: numero for numero, estado in enumerate(ESTADOS_PEDIDO)}
+        for pedido in datos_pedidos["pedidos"]:
+            indice_pedido[pedido["codigo_pedido"]] = len(self.codigos_pedido)
+            self.codigos_pedido.append(pedido["codigo_pedido"])
+            textos_fecha.append(pedido["fecha_pedido"])
+            estado_pedido.append(indice_estado.get(pedido["estado"], -1))
+
+        # Líneas; las de pedidos que no están en pedidos.json se ignoran
+        producto_linea = []
+        pedido_linea = []
+        cantidades = []
+        precios = []
+        for bloque in datos_detalles["detalles_pedidos"]:
+            numero_pedido = indice_pedido.get(bloque["codigo_pedido"])
+            if numero_pedido is None:
+                continue
+            for linea in bloque["detalles"]:
+                codigo = linea["codigo_producto"]
+                numero_producto = indice_producto.get(codigo)
+                if numero_producto is None:
+                    # Producto eliminado o de datos antiguos: va a su propio índice
+                    numero_producto = indice_producto[codigo] = len(self.codigos_producto)
+                    self.codigos_producto.append(codigo)
+                    categoria_producto.append(categorias.setdefault(SIN_CATALOGO, len(categorias)))
+                    costo_producto.append(float("nan"))
+                producto_linea.append(numero_producto)
+                pedido_linea.append(numero_pedido)
+                cantidades.append(linea["cantidad"])
+                precios.append(linea["precio_unidad"])
+
+        self.categorias = list(categorias)
+        self.categoria = np.array(categoria_producto, dtype=np.int32)
+        self.costo_unidad = np.array(costo_producto, dtype=np.float64)
+
+        self.producto = np.array(producto_linea, dtype=np.int32)
+        self.pedido = np.array(pedido_linea, dtype=np.int32)
+        self.cantidad = np.array(cantidades, dtype=np.float64)
+        self.precio_unidad = np.array(precios, dtype=np.float64)
+        fechas_pedido = _fechas_a_columna(textos_fecha)
+        estados_pedido = np.array(estado_pedido, dtype=np.int8)
+        self.fecha = fechas_pedido[self.pedido]
+        self.estado = estados_pedido[self.pedido]
+
+    def __len__(self):
+        return len(self.producto)
+
+    def filtro(self, desde=None, hasta=None, estados=None):
+        """Máscara de las líneas con fecha en [desde, hasta) y alguno de los estados"""
+        mascara = np.ones(len(self), dtype=bool)
+        if desde is not None:
+            mascara &= self.fecha >= np.datetime64(desde, "s")
+        if hasta is not None:
+            mascara &= self.fecha < np.datetime64(hasta, "s")
+        if estados:
+            invalidos = [estado for estado in estados if estado not in ESTADOS_PEDIDO]
+            if invalidos:
+                raise ErrorReporte(f"Estado no válido: {', '.join(invalidos)} (use {', '.join(ESTADOS_PEDIDO)})")
+            numeros = [ESTADOS_PEDIDO.index(estado) for estado in estados]
+            mascara &= np.isin(self.estado, numeros)
+        return mascara
+
+    def claves_grupo(self, agrupar, mascara):
+        """Devuelve (clave de grupo de cada línea filtrada, nombre de cada grupo)"""
+        if agrupar == "producto":
+            return self.producto[mascara], list(self.codigos_producto)
+        if agrupar == "categoria":
+            return self.categoria[self.producto[mascara]], list(self.categorias)
+        if agrupar == "mes":
+            meses, claves = np.unique(self.fecha[mascara].astype("datetime64[M]"), return_inverse=True)
+            return claves.reshape(-1), ["(sin fecha)" if np.isnat(mes) else str(mes) for mes in meses]
+        if agrupar == "estado":
+            # Los estados desconocidos van a un grupo al final
+            claves = self.estado[mascara].astype(np.int64)
+            claves[claves < 0] = len(ESTADOS_PEDIDO)
+            return claves, list(ESTADOS_PEDIDO) + ["(otro estado)"]
+        raise ErrorReporte(f"Agrupación no válida: {agrupar} (use {', '.join(AGRUPACIONES)})")
+
+
+def cargar_ventas(sesion=None):
+    """Carga productos, pedidos y líneas de la sesión en columnas
+
+    Se incluyen los pedidos archivados (ver archivo_pedidos).
+    """
+    sesion = sesion or Sesion()
+    return VentasColumnares(sesion.datos, *unir_archivados(sesion.datos_pedidos, sesion.datos_detalles))
+
+def _fila(grupo, unidades, ingresos, costo, pedidos):
+    margen = ingresos - costo
+    return {
+        "grupo": grupo,
+        "unidades": unidades,
+        "ingresos": ingresos,
+        "costo": costo,
+        "margen": margen,
+        "margen_pct": margen / ingresos * 100 if ingresos else 0.0,
+        "pedidos": pedidos,
+        "valor_medio_pedido": ingresos / pedidos if pedidos else 0.0,
+    }
+
+def reporte_ventas(ventas, agrupar="producto", desde=None, hasta=None, estados=None):
+    """Ingresos, unidades, margen y valor medio por pedido de cada grupo
+
+    Devuelve (filas, fila de totales). Las filas van ordenadas por ingresos
+    de mayor a menor, salvo al agrupar por mes (en orden cronológico).
+    El margen de un grupo con líneas de productos fuera del catálogo es NaN.
+    El valor medio por pedido cuenta cada pedido una vez por grupo.
+    """
+    mascara = ventas.filtro(desde, hasta, estados)
+    claves, nombres = ventas.claves_grupo(agrupar, mascara)
+    cantidad = ventas.cantidad[mascara]
+    ingresos_linea = cantidad * ventas.precio_unidad[mascara]
+    costo_linea = cantidad * ventas.costo_unidad[ventas.producto[mascara]]
+    pedido = ventas.pedido[mascara]
+
+    grupos = len(nombres)
+    unidades = np.bincount(claves, weights=cantidad, minlength=grupos)
+    ingresos = np.bincount(claves, weights=ingresos_linea, minlength=grupos)
+    costo = np.bincount(claves, weights=costo_linea, minlength=grupos)
+    # Pedidos distintos por grupo: pares (grupo, pedido) únicos
+    pares = np.unique(claves.astype(np.int64) * len(ventas.codigos_pedido) + pedido)
+    pedidos = np.bincount(pares // max(len(ventas.codigos_pedido), 1), minlength=grupos)
+
+    filas = [
+        _fila(nombres[numero], float(unidades[numero]), float(ingresos[numero]),
+              float(costo[numero]), int(pedidos[numero]))
+        for numero in np.flatnonzero(pedidos)
+    ]
+    if agrupar != "mes":
+        filas.sort(key=lambda fila: fila["ingresos"], reverse=True)
+    totales = _fila(
+        "Total", float(cantidad.sum()), float(ingresos_linea.sum()),
+        float(costo_linea.sum()), len(np.unique(pedido)),
+    )
+    return filas, totales
+
+def rango_mes_anterior(hoy=None):
+    """Devuelve (desde, hasta) del mes calendario anterior, hasta sin incluir"""
+    hoy = hoy or datetime.now()
+    hasta = datetime(hoy.year, hoy.month, 1)
+    desde = (hasta - timedelta(days=1)).replace(day=1)
+    return desde, hasta
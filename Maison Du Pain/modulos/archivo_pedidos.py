@@ -0,0 +1,166 @@
+"""
+Módulo del archivo de pedidos entregados
+Guarda los pedidos entregados antiguos en segmentos comprimidos
+
+Los pedidos "entregado" no se vuelven a editar, pero seguirían leyéndose en
+cada cargar_pedidos(). `python herramientas.py archivar-pedidos` los pasa,
+junto con sus detalles, a datos/pedidos/archivo/:
+    segmento_0001.json.gz   {"pedidos": [...], "detalles_pedidos": [...]}
+    indice.json
+Cada ejecución escribe segmentos nuevos (gzip o lzma, opción
+"compresion_archivo") de hasta PEDIDOS_POR_SEGMENTO pedidos, para que ver un
+pedido archivado solo descomprima un segmento chico; los segmentos no se
+modifican después. El índice
+guarda los segmentos y, por cada pedido, la posición de su segmento en esa
+lista y lo necesario para listarlo sin abrirlo (se escribe sin sangría):
+    {
+        "segmentos": [{"archivo": "segmento_0001.json.gz", "pedidos": 120, "lineas": 410,
+                       "desde": "2024-01-02 10:00:00", "hasta": "2024-03-30 18:00:00"}],
+        "pedidos": {"PED-001": [0, "CLI-1", "2024-01-02 10:00:00", 12.5]}
+    }
+
+Este módulo arma los segmentos y el índice y lee los archivos comprimidos;
+gestion_archivos decide cuándo escribirlos (con el bloqueo de los datos).
+"""
+import gzip
+import json
+import lzma
+import os
+
+from modulos import metricas
+from modulos.configuracion import DATOS_DIR
+from modulos.indices_pedidos import convertir_fecha
+
+DIRECTORIO_ARCHIVO = os.path.join(DATOS_DIR, "pedidos", "archivo")
+RUTA_INDICE_ARCHIVO = os.path.join(DIRECTORIO_ARCHIVO, "indice.json")
+
+# Compresión -> (extensión del segmento, función para abrirlo)
+COMPRESIONES = {
+    "gzip": (".json.gz", gzip.open),
+    "lzma": (".json.xz", lzma.open),
+}
+
+# Pedidos como máximo en cada segmento
+PEDIDOS_POR_SEGMENTO = 5000
+
+# Estado de los pedidos que se archivan
+ESTADO_ARCHIVABLE = "entregado"
+
+def indice_vacio():
+    return {"segmentos": [], "pedidos": {}}
+
+def ruta_segmento(nombre):
+    return os.path.join(DIRECTORIO_ARCHIVO, nombre)
+
+def _compresor(nombre):
+    """Función que abre un segmento según su extensión (gzip.open o lzma.open)"""
+    for extension, abrir in COMPRESIONES.values():
+        if nombre.endswith(extension):
+            return abrir
+    raise ValueError(f"Segmento con compresión desconocida: {nombre}")
+
+def escribir_segmento(ruta_archivo, contenido, compresion, default=None):
+    """Comprime el contenido en ruta_archivo y lo sincroniza con el disco"""
+    abrir = COMPRESIONES[compresion][1]
+    os.makedirs(os.path.dirname(ruta_archivo), exist_ok=True)
+    with open(ruta_archivo, "wb") as crudo:
+        with abrir(crudo, "wt", encoding="utf-8") as archivo:
+            json.dump(contenido, archivo, ensure_ascii=False, default=default)
+        crudo.flush()
+        os.fsync(crudo.fileno())
+        metricas.contar_escritura(crudo.tell())
+
+def leer_segmento(nombre):
+    """Lee y descomprime un segmento: {"pedidos": [...], "detalles_pedidos": [...]}"""
+    metricas.contar_lectura(os.path.getsize(ruta_segmento(nombre)))
+    with _compresor(nombre)(ruta_segmento(nombre), "rt", encoding="utf-8") as archivo:
+        return json.load(archivo)
+
+def nombre_siguiente_segmento(indice, compresion):
+    """Nombre del próximo segmento, numerado a continuación de los existentes"""
+    if compresion not in COMPRESIONES:
+        raise ValueError(f"Compresión no válida: {compresion} (use {', '.join(COMPRESIONES)})")
+    return f"segmento_{len(indice['segmentos']) + 1:04d}{COMPRESIONES[compresion][0]}"
+
+def seleccionar(datos_pedidos, datos_detalles, limite):
+    """Separa los pedidos entregados con fecha anterior a limite
+
+    Devuelve (archivados, conservados); cada uno es un par (datos_pedidos,
+    datos_detalles). Los pedidos con fecha no válida no se archivan.
+    """
+    codigos = set()
+    archivados = ({"pedidos": []}, {"detalles_pedidos": []})
+    conservados = ({"pedidos": []}, {"detalles_pedidos": []})
+    for pedido in datos_pedidos["pedidos"]:
+        fecha = convertir_fecha(pedido["fecha_pedido"])
+        if pedido["estado"] == ESTADO_ARCHIVABLE and fecha is not None and fecha < limite:
+            codigos.add(pedido["codigo_pedido"])
+            archivados[0]["pedidos"].append(pedido)
+        else:
+            conservados[0]["pedidos"].append(pedido)
+    for detalle_pedido in datos_detalles["detalles_pedidos"]:
+        destino = archivados if detalle_pedido["codigo_pedido"] in codigos else conservados
+        destino[1]["detalles_pedidos"].append(detalle_pedido)
+    return archivados, conservados
+
+def dividir_en_segmentos(datos_pedidos, datos_detalles):
+    """Reparte los pedidos a archivar en grupos de PEDIDOS_POR_SEGMENTO
+
+    Devuelve una lista de pares (datos_pedidos, datos_detalles).
+    """
+    detalles_por_codigo = {}
+    for detalle_pedido in datos_detalles["detalles_pedidos"]:
+        detalles_por_codigo.setdefault(detalle_pedido["codigo_pedido"], []).append(detalle_pedido)
+    grupos = []
+    pedidos = datos_pedidos["pedidos"]
+    for inicio in range(0, len(pedidos), PEDIDOS_POR_SEGMENTO):
+        grupo = pedidos[inicio:inicio + PEDIDOS_POR_SEGMENTO]
+        grupos.append(({"pedidos": grupo}, {"detalles_pedidos": [
+            detalle_pedido
+            for pedido in grupo for detalle_pedido in detalles_por_codigo.get(pedido["codigo_pedido"], ())
+        ]}))
+    return grupos
+
+def agregar_al_indice(indice, nombre, datos_pedidos, datos_detalles):
+    """Anota en el índice un segmento nuevo y sus pedidos"""
+    fechas = sorted(pedido["fecha_pedido"] for pedido in datos_pedidos["pedidos"])
+    posicion = len(indice["segmentos"])
+    indice["segmentos"].append({
+        "archivo": nombre,
+        "pedidos": len(datos_pedidos["pedidos"]),
+        "lineas": sum(len(bloque["detalles"]) for bloque in datos_detalles["detalles_pedidos"]),
+        "desde": fechas[0] if fechas else None,
+        "hasta": fechas[-1] if fechas else None,
+    })
+    for pedido in datos_pedidos["pedidos"]:
+        indice["pedidos"][pedido["codigo_pedido"]] = [
+            posicion, pedido["codigo_cliente"], pedido["fecha_pedido"], pedido["total"]
+        ]
+    return indice
+
+def segmento_de(indice, codigo_pedido):
+    """Nombre del segmento de un pedido archivado, o None si no está archivado"""
+    entrada = indice["pedidos"].get(codigo_pedido)
+    return None if entrada is None else indice["segmentos"][entrada[0]]["archivo"]
+
+def resumen_pedido(codigo_pedido, entrada):
+    """Pedido archivado armado con los datos del índice (sin abrir su segmento)"""
+    _, codigo_cliente, fecha_pedido, total = entrada
+    return {
+        "codigo_pedido": codigo_pedido,
+        "codigo_cliente": codigo_cliente,
+        "fecha_pedido": fecha_pedido,
+        "estado": ESTADO_ARCHIVABLE,
+        "total": total,
+    }
+
+def buscar(indice, texto):
+    """Pedidos archivados cuyo código o cliente contiene el texto"""
+    texto = texto.strip().lower()
+    if not texto:
+        return []
+    return [
+        resumen_pedido(codigo_pedido, entrada)
+        for codigo_pedido, entrada in indice["pedidos"].items()
+        if texto in codigo_pedido.lower() or texto in str(entrada[1]).lower()
+    ]
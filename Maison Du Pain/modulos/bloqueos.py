@@ -0,0 +1,52 @@
+"""
+Módulo de bloqueos entre procesos
+Bloqueo exclusivo sobre un archivo auxiliar para coordinar varias terminales
+"""
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SUFIJO_BLOQUEO = ".lock"
+
+@contextmanager
+def bloqueo_archivo(ruta_archivo, esperar=True):
+    """Mantiene un bloqueo exclusivo asociado a ruta_archivo mientras dura el bloque
+
+    El bloqueo se toma sobre ruta_archivo + ".lock", así el archivo de datos
+    se puede reemplazar con un renombrado sin perder el bloqueo. Es un
+    bloqueo consultivo: solo lo respetan los procesos que también lo piden.
+
+    Con esperar=False no se espera a que otro lo suelte: el bloque recibe
+    True si se obtuvo y False si ya estaba tomado (también por otra parte
+    de este mismo proceso).
+    """
+    ruta_bloqueo = ruta_archivo + SUFIJO_BLOQUEO
+    os.makedirs(os.path.dirname(ruta_bloqueo), exist_ok=True)
+    descriptor = os.open(ruta_bloqueo, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_EX if esperar else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            # msvcrt bloquea un rango de bytes; LK_LOCK reintenta hasta obtenerlo
+            msvcrt.locking(descriptor, msvcrt.LK_LOCK if esperar else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(descriptor)
+        if esperar:
+            raise
+        yield False
+        return
+    # Solo se suelta un bloqueo que se llegó a tomar
+    try:
+        yield True
+    finally:
+        if fcntl is not None:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+        else:
+            os.lseek(descriptor, 0, os.SEEK_SET)
+            msvcrt.locking(descriptor, msvcrt.LK_UNLCK, 1)
+        os.close(descriptor)
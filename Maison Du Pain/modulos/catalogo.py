@@ -0,0 +1,202 @@
+"""
+Módulo del catálogo de productos
+Mantiene un índice por código de producto para búsquedas en O(1)
+un índice de trigramas para buscar por texto y otro por margen de stock
+"""
+from modulos.configuracion import obtener_opcion
+from modulos.indice_busqueda import IndiceTrigramas
+from modulos.indice_stock import IndiceStock
+
+
+def normalizar_codigo(codigo):
+    """Normaliza un código de producto para usarlo como clave del índice"""
+    return codigo.strip().lower()
+
+def umbrales_stock():
+    """Stocks mínimos configurados: (general, por categoría, por código normalizado)"""
+    return (
+        obtener_opcion("stock_minimo"),
+        {categoria.lower(): minimo for categoria, minimo in obtener_opcion("stock_minimo_categorias").items()},
+        {normalizar_codigo(codigo): minimo for codigo, minimo in obtener_opcion("stock_minimo_productos").items()},
+    )
+
+def stock_minimo_de(producto, umbrales=None):
+    """Stock mínimo de un producto: el de su código, el de su categoría o el general"""
+    general, por_categoria, por_producto = umbrales or umbrales_stock()
+    minimo = por_producto.get(normalizar_codigo(producto["codigo_producto"]))
+    if minimo is None:
+        minimo = por_categoria.get(producto["categoria"].lower(), general)
+    return minimo
+
+
+class Catalogo(list):
+    """Lista de productos con un índice por código normalizado
+
+    Se comporta como la lista original de ``datos["productos"]`` (se recorre,
+    se guarda en JSON y se muestra igual), pero mantiene un diccionario
+    ``codigo -> producto`` sincronizado en cada alta y baja.
+
+    El índice de texto (código, nombre y descripción) se construye la primera
+    vez que se busca y desde ahí se mantiene en cada alta, baja y edición.
+    El índice de stock se construye la primera vez que se piden los productos
+    bajo su mínimo; quien cambie el stock de un producto debe avisar con
+    actualizar_stock().
+    """
+
+    def __init__(self, productos=()):
+        super().__init__(productos)
+        self._indice = {}
+        self._indice_texto = None
+        self._indice_stock = None
+        self._umbrales = None
+        self._reconstruir_indice()
+
+    def _reconstruir_indice(self):
+        """Reconstruye el índice a partir de la lista completa"""
+        self._indice = {
+            normalizar_codigo(producto["codigo_producto"]): producto
+            for producto in self
+        }
+        self._indice_texto = None
+        self._indice_stock = None
+
+    def _indexar(self, producto):
+        """Agrega un producto a los índices"""
+        clave = normalizar_codigo(producto["codigo_producto"])
+        self._indice[clave] = producto
+        if self._indice_texto is not None:
+            self._indice_texto.agregar(
+                clave, producto["codigo_producto"], producto["nombre"], producto["descripcion"]
+            )
+        if self._indice_stock is not None:
+            self._indice_stock.agregar(clave, self._margen_stock(producto))
+
+    def _desindexar(self, producto):
+        """Quita un producto de los índices"""
+        clave = normalizar_codigo(producto["codigo_producto"])
+        self._indice.pop(clave, None)
+        if self._indice_texto is not None:
+            self._indice_texto.eliminar(clave)
+        if self._indice_stock is not None:
+            self._indice_stock.eliminar(clave)
+
+    def _margen_stock(self, producto):
+        return producto["cantidad_en_stock"] - self.stock_minimo(producto)
+
+    def buscar(self, codigo):
+        """Devuelve el producto con ese código (sin distinguir mayúsculas) o None"""
+        return self._indice.get(normalizar_codigo(codigo))
+
+    def buscar_texto(self, consulta):
+        """Devuelve los productos cuyo código, nombre o descripción contienen la consulta
+
+        Los resultados vienen ordenados por relevancia (ver IndiceTrigramas.buscar).
+        """
+        if self._indice_texto is None:
+            self._indice_texto = IndiceTrigramas()
+            for clave, producto in self._indice.items():
+                self._indice_texto.agregar(
+                    clave, producto["codigo_producto"], producto["nombre"], producto["descripcion"]
+                )
+        return [self._indice[clave] for clave in self._indice_texto.buscar(consulta)]
+
+    def stock_minimo(self, producto):
+        """Stock mínimo de un producto según la configuración (ver stock_minimo_de)"""
+        if self._umbrales is None:
+            self._umbrales = umbrales_stock()
+        return stock_minimo_de(producto, self._umbrales)
+
+    def bajo_minimo(self):
+        """Devuelve los productos con menos stock que su mínimo, el más urgente primero
+
+        El más urgente es al que más unidades le faltan para llegar al mínimo.
+        """
+        if self._indice_stock is None:
+            self._indice_stock = IndiceStock({
+                clave: self._margen_stock(producto) for clave, producto in self._indice.items()
+            })
+        return [self._indice[clave] for clave in self._indice_stock.bajo_minimo()]
+
+    def __contains__(self, codigo):
+        if isinstance(codigo, str):
+            return normalizar_codigo(codigo) in self._indice
+        return super().__contains__(codigo)
+
+    def agregar(self, producto):
+        """Agrega un producto a la lista y al índice"""
+        self.append(producto)
+
+    def eliminar(self, codigo):
+        """Elimina el producto con ese código y lo devuelve (None si no existe)"""
+        producto = self.buscar(codigo)
+        if producto is not None:
+            self._desindexar(producto)
+            # Buscamos por identidad para no comparar diccionarios completos
+            for i, actual in enumerate(self):
+                if actual is producto:
+                    super().pop(i)
+                    break
+        return producto
+
+    def actualizar(self, producto):
+        """Actualiza los índices después de editar los campos de un producto"""
+        self._indexar(producto)
+
+    def actualizar_stock(self, producto):
+        """Actualiza el índice de stock después de cambiar la cantidad en stock de un producto"""
+        if self._indice_stock is not None:
+            self._indice_stock.agregar(normalizar_codigo(producto["codigo_producto"]), self._margen_stock(producto))
+
+    def cambiar_codigo(self, producto, codigo_nuevo):
+        """Cambia el código de un producto manteniendo el índice sincronizado"""
+        self._desindexar(producto)
+        producto["codigo_producto"] = codigo_nuevo
+        self._indexar(producto)
+
+    # Las operaciones de lista también mantienen el índice al día
+
+    def append(self, producto):
+        super().append(producto)
+        self._indexar(producto)
+
+    def extend(self, productos):
+        for producto in productos:
+            self.append(producto)
+
+    def insert(self, posicion, producto):
+        super().insert(posicion, producto)
+        self._indexar(producto)
+
+    def pop(self, posicion=-1):
+        producto = super().pop(posicion)
+        self._desindexar(producto)
+        return producto
+
+    def remove(self, producto):
+        super().remove(producto)
+        self._desindexar(producto)
+
+    def __iadd__(self, productos):
+        self.extend(productos)
+        return self
+
+    def clear(self):
+        super().clear()
+        self._reconstruir_indice()
+
+    def __setitem__(self, posicion, valor):
+        super().__setitem__(posicion, valor)
+        self._reconstruir_indice()
+
+    def __delitem__(self, posicion):
+        super().__delitem__(posicion)
+        self._reconstruir_indice()
+
+
+def obtener_catalogo(datos):
+    """Devuelve el catálogo de ``datos``, convirtiendo la lista si hace falta"""
+    productos = datos["productos"]
+    if not isinstance(productos, Catalogo):
+        productos = Catalogo(productos)
+        datos["productos"] = productos
+    return productos
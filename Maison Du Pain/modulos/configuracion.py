@@ -0,0 +1,97 @@
+"""
+Módulo de configuración del sistema
+Lee las opciones desde datos/configuracion.json y variables de entorno
+
+El directorio de datos es datos/ dentro del proyecto; la variable de entorno
+MAISON_DATOS_DIR permite usar otro (por ejemplo, los datos sintéticos de los
+benchmarks). Se lee al importar el módulo.
+"""
+import json
+import os
+
+# Obtener la ruta base del proyecto
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATOS_DIR = os.path.abspath(os.environ.get("MAISON_DATOS_DIR") or os.path.join(BASE_DIR, "datos"))
+RUTA_CONFIGURACION = os.path.join(DATOS_DIR, "configuracion.json")
+
+# Valores por defecto de cada opción
+CONFIGURACION_POR_DEFECTO = {
+    # Motor de almacenamiento: "json" (archivos), "sqlite" (datos/panaderia.db)
+    # o "mensual" (pedidos en un archivo por mes, en datos/pedidos/meses/)
+    "almacenamiento": "json",
+    # Registrar los cambios de pedidos en un diario JSON Lines en lugar de
+    # reescribir los archivos completos (solo con almacenamiento "json")
+    "diario": False,
+    # Cómo se leen los detalles de un solo pedido: "completa" (se carga todo
+    # el archivo), "streaming" (se recorre bloque a bloque hasta encontrarlo)
+    # o "indice" (se salta directo a su posición con un índice auxiliar)
+    "lectura_detalles": "completa",
+    # Guardar junto a cada archivo JSON de datos una instantánea binaria
+    # (pickle) que se carga en lugar del JSON mientras siga vigente
+    "instantaneas": False,
+    # Medir la duración y los bytes leídos y escritos de cada carga, guardado
+    # y operación de menú (menú "Diagnóstico" y datos/metricas.jsonl)
+    "metricas": False,
+    # Filas por página en los listados de productos y pedidos
+    "tamano_pagina": 20,
+    # Antigüedad (en días) a partir de la cual archivar-pedidos pasa los
+    # pedidos entregados al archivo comprimido, y su compresión: "gzip" o "lzma"
+    "dias_para_archivar": 90,
+    "compresion_archivo": "gzip",
+    # Stock mínimo de cada producto: por debajo se alerta de stock bajo y el
+    # producto aparece en el reporte de reabastecimiento. Se puede fijar por
+    # categoría ({"pastel": 2}) y por código de producto ({"PAN-001": 20});
+    # el del producto tiene prioridad sobre el de su categoría
+    "stock_minimo": 5,
+    "stock_minimo_categorias": {},
+    "stock_minimo_productos": {},
+}
+
+_configuracion = None
+
+def _convertir_valor(texto, valor_por_defecto):
+    """Convierte el texto de una variable de entorno al tipo del valor por defecto"""
+    if isinstance(valor_por_defecto, bool):
+        return texto.strip().lower() in ("1", "si", "sí", "true", "s", "yes")
+    if isinstance(valor_por_defecto, int):
+        return int(texto)
+    if isinstance(valor_por_defecto, float):
+        return float(texto)
+    if isinstance(valor_por_defecto, dict):
+        return json.loads(texto)
+    return texto.strip()
+
+def cargar_configuracion():
+    """Carga la configuración combinando valores por defecto, archivo y entorno
+
+    Cada opción se puede sobrescribir con una variable de entorno
+    MAISON_<OPCION> (por ejemplo MAISON_ALMACENAMIENTO=sqlite).
+    """
+    configuracion = dict(CONFIGURACION_POR_DEFECTO)
+    try:
+        with open(RUTA_CONFIGURACION, "r", encoding="utf-8") as archivo:
+            configuracion.update(json.load(archivo))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    for clave, valor in CONFIGURACION_POR_DEFECTO.items():
+        variable = "MAISON_" + clave.upper()
+        if variable in os.environ:
+            configuracion[clave] = _convertir_valor(os.environ[variable], valor)
+    return configuracion
+
+def obtener_configuracion():
+    """Devuelve la configuración del proceso (se lee una sola vez)"""
+    global _configuracion
+    if _configuracion is None:
+        _configuracion = cargar_configuracion()
+    return _configuracion
+
+def obtener_opcion(clave):
+    """Devuelve el valor de una opción de configuración"""
+    return obtener_configuracion().get(clave, CONFIGURACION_POR_DEFECTO.get(clave))
+
+def reiniciar_configuracion():
+    """Olvida la configuración leída para que se vuelva a cargar"""
+    global _configuracion
+    _configuracion = None
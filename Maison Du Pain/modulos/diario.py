@@ -0,0 +1,257 @@
+"""
+Módulo del diario de operaciones (JSON Lines)
+Registra cada cambio sobre pedidos y stock como una línea añadida al final
+
+En lugar de reescribir los tres archivos JSON en cada operación, los cambios
+se anotan en datos/pedidos/diario.jsonl. Al cargar, los eventos se vuelven a
+aplicar sobre la última copia completa (snapshot) de cada archivo, y la
+compactación los incorpora definitivamente a esos archivos.
+"""
+import json
+import os
+
+from modulos import metricas
+from modulos.configuracion import DATOS_DIR
+from modulos.registros import LineaPedido, LineasPedido, Pedido, Producto, a_json, convertir_detalle_pedido
+
+RUTA_DIARIO = os.path.join(DATOS_DIR, "pedidos", "diario.jsonl")
+RUTA_ESTADO_DIARIO = os.path.join(DATOS_DIR, "pedidos", "diario_estado.json")
+
+# Archivo de datos al que afecta cada tipo de evento
+ARCHIVOS_POR_EVENTO = {
+    "crear_pedido": ("pedidos", "detalles"),
+    "eliminar_pedido": ("pedidos", "detalles"),
+    "cambiar_estado": ("pedidos",),
+    "agregar_linea": ("pedidos", "detalles"),
+    "cambiar_cantidad": ("pedidos", "detalles"),
+    "eliminar_linea": ("pedidos", "detalles"),
+    "stock": ("datos",),
+    "agregar_producto": ("datos",),
+    "editar_producto": ("datos",),
+    "eliminar_producto": ("datos",),
+    # Deltas de los agregados de ventas (ver modulos/agregados.py)
+    "agregados": ("agregados",),
+}
+
+def evento(tipo, **campos):
+    """Crea un evento del diario
+
+    Los campos se copian como JSON simple: el evento debe reflejar el momento
+    en que ocurrió aunque el pedido o producto cambie después en la sesión.
+    """
+    campos = json.loads(json.dumps(campos, default=a_json))
+    campos["tipo"] = tipo
+    return campos
+
+def eventos_de(eventos, archivo_datos):
+    """Filtra los eventos que afectan al archivo indicado ("datos", "pedidos" o "detalles")"""
+    return [
+        datos_evento for datos_evento in eventos
+        if archivo_datos in ARCHIVOS_POR_EVENTO.get(datos_evento["tipo"], ())
+    ]
+
+def codigo_pedido_de(datos_evento):
+    """Devuelve el código del pedido al que se refiere un evento (None para stock)"""
+    if datos_evento["tipo"] == "crear_pedido":
+        return datos_evento["pedido"]["codigo_pedido"]
+    return datos_evento.get("codigo_pedido")
+
+def cargar_estado():
+    """Carga la secuencia actual y hasta dónde llega cada snapshot"""
+    try:
+        with open(RUTA_ESTADO_DIARIO, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"secuencia": 0, "aplicado": {"datos": 0, "pedidos": 0, "detalles": 0, "agregados": 0}}
+
+def guardar_estado(estado):
+    """Guarda el estado del diario reemplazando el archivo de una sola vez"""
+    os.makedirs(os.path.dirname(RUTA_ESTADO_DIARIO), exist_ok=True)
+    # Mismo sufijo que los temporales de gestion_archivos, para que
+    # recuperar_transaccion() lo borre si el proceso se interrumpe aquí
+    temporal = RUTA_ESTADO_DIARIO + ".nuevo"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(estado, archivo)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(temporal, RUTA_ESTADO_DIARIO)
+
+def registrar(eventos):
+    """Añade los eventos al final del diario con números de secuencia consecutivos
+
+    Solo se anotan los eventos que afectan a algún archivo de datos.
+    """
+    eventos = [datos_evento for datos_evento in eventos if ARCHIVOS_POR_EVENTO.get(datos_evento["tipo"])]
+    if not eventos:
+        return
+    estado = cargar_estado()
+    secuencia = estado["secuencia"]
+
+    lineas = []
+    for datos_evento in eventos:
+        secuencia += 1
+        lineas.append(json.dumps(dict(datos_evento, secuencia=secuencia), ensure_ascii=False))
+
+    os.makedirs(os.path.dirname(RUTA_DIARIO), exist_ok=True)
+    texto = "\n".join(lineas) + "\n"
+    with open(RUTA_DIARIO, "a", encoding="utf-8") as archivo:
+        archivo.write(texto)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    metricas.contar_escritura(len(texto.encode("utf-8")))
+
+    estado["secuencia"] = secuencia
+    guardar_estado(estado)
+
+def leer_eventos(archivo_datos):
+    """Devuelve los eventos que todavía no están incluidos en el snapshot indicado
+
+    archivo_datos es "datos", "pedidos", "detalles" o "agregados".
+    """
+    estado = cargar_estado()
+    aplicado = estado["aplicado"].get(archivo_datos, 0)
+    eventos = []
+    try:
+        with open(RUTA_DIARIO, "r", encoding="utf-8") as archivo:
+            for linea in archivo:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    datos_evento = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Una línea incompleta al final indica una escritura interrumpida
+                    break
+                if (datos_evento["secuencia"] > aplicado and
+                        archivo_datos in ARCHIVOS_POR_EVENTO.get(datos_evento["tipo"], ())):
+                    eventos.append(datos_evento)
+            metricas.contar_lectura(archivo.buffer.tell())
+    except FileNotFoundError:
+        pass
+    return eventos
+
+def estado_aplicado(*archivos_datos):
+    """Devuelve el estado indicando que esos snapshots incluyen todos los eventos
+
+    El estado no se guarda aquí: se escribe junto con los snapshots para que
+    ambos cambien a la vez.
+    """
+    estado = cargar_estado()
+    for archivo_datos in archivos_datos:
+        estado["aplicado"][archivo_datos] = estado["secuencia"]
+    return estado
+
+def vaciar_si_compactado():
+    """Vacía el diario si todos los snapshots ya incluyen todos sus eventos"""
+    estado = cargar_estado()
+    if all(valor == estado["secuencia"] for valor in estado["aplicado"].values()):
+        if os.path.exists(RUTA_DIARIO):
+            os.remove(RUTA_DIARIO)
+        return True
+    return False
+
+def hay_eventos_pendientes():
+    """Indica si el diario contiene eventos sin compactar"""
+    return os.path.exists(RUTA_DIARIO) and os.path.getsize(RUTA_DIARIO) > 0
+
+# Aplicación de eventos sobre cada estructura
+
+def aplicar_a_datos(datos, eventos):
+    """Aplica los cambios de stock y de productos sobre los datos de productos"""
+    from modulos.catalogo import obtener_catalogo
+
+    catalogo = obtener_catalogo(datos)
+    for datos_evento in eventos:
+        tipo = datos_evento["tipo"]
+        if tipo == "agregar_producto":
+            if datos_evento["producto"]["codigo_producto"] not in catalogo:
+                catalogo.agregar(Producto.desde_dict(datos_evento["producto"]))
+            continue
+
+        producto = catalogo.buscar(datos_evento["codigo_producto"])
+        if producto is None:
+            continue
+        if tipo == "stock":
+            producto["cantidad_en_stock"] += datos_evento["delta"]
+            catalogo.actualizar_stock(producto)
+        elif tipo == "editar_producto":
+            producto.update(datos_evento["campos"])
+            catalogo.actualizar(producto)
+        elif tipo == "eliminar_producto":
+            catalogo.eliminar(producto["codigo_producto"])
+    return datos
+
+def aplicar_a_pedidos(datos_pedidos, eventos):
+    """Aplica los eventos del diario sobre la lista de pedidos"""
+    if not eventos:
+        return datos_pedidos
+
+    # Índice por código para no recorrer la lista en cada evento
+    pedidos = {pedido["codigo_pedido"]: pedido for pedido in datos_pedidos["pedidos"]}
+    for datos_evento in eventos:
+        tipo = datos_evento["tipo"]
+        if tipo == "crear_pedido":
+            # Un código que ya existe no se reemplaza: confirmar_cambios()
+            # rechaza esas altas, así que solo pueden venir de un diario viejo
+            codigo_pedido = datos_evento["pedido"]["codigo_pedido"]
+            if codigo_pedido not in pedidos:
+                pedidos[codigo_pedido] = Pedido.desde_dict(datos_evento["pedido"])
+            continue
+
+        pedido = pedidos.get(datos_evento["codigo_pedido"])
+        if pedido is None:
+            continue
+        if tipo == "eliminar_pedido":
+            del pedidos[datos_evento["codigo_pedido"]]
+        elif tipo == "cambiar_estado":
+            pedido["estado"] = datos_evento["estado"]
+        elif "total" in datos_evento:
+            pedido["total"] = datos_evento["total"]
+
+    datos_pedidos["pedidos"] = list(pedidos.values())
+    return datos_pedidos
+
+def aplicar_a_detalles(datos_detalles, eventos):
+    """Aplica los eventos del diario sobre los detalles de pedidos"""
+    if not eventos:
+        return datos_detalles
+
+    # Índice por código para no recorrer la lista en cada evento
+    detalles_pedidos = {
+        detalle_pedido["codigo_pedido"]: detalle_pedido
+        for detalle_pedido in datos_detalles["detalles_pedidos"]
+    }
+    for datos_evento in eventos:
+        tipo = datos_evento["tipo"]
+        if tipo == "crear_pedido":
+            codigo_pedido = datos_evento["detalles"]["codigo_pedido"]
+            if codigo_pedido not in detalles_pedidos:
+                detalles_pedidos[codigo_pedido] = convertir_detalle_pedido(dict(datos_evento["detalles"]))
+            continue
+
+        detalle_pedido = detalles_pedidos.get(datos_evento["codigo_pedido"])
+        if detalle_pedido is None:
+            continue
+        lineas = detalle_pedido["detalles"]
+        if tipo == "eliminar_pedido":
+            del detalles_pedidos[datos_evento["codigo_pedido"]]
+        elif tipo == "agregar_linea":
+            lineas.agregar(LineaPedido.desde_dict(datos_evento["linea"]))
+        elif tipo == "cambiar_cantidad":
+            linea = lineas.get(datos_evento["numero_linea"])
+            if linea is not None:
+                linea["cantidad"] = datos_evento["cantidad"]
+                linea["subtotal"] = datos_evento["subtotal"]
+        elif tipo == "eliminar_linea":
+            lineas.quitar(datos_evento["numero_linea"])
+            # Las demás líneas conservan su número; los eventos anotados antes
+            # de que fuera así no traen "renumerar" y los siguientes cuentan
+            # con las líneas renumeradas
+            if datos_evento.get("renumerar", True):
+                restantes = list(lineas)
+                for i, linea in enumerate(restantes):
+                    linea["numero_linea"] = i + 1
+                detalle_pedido["detalles"] = LineasPedido(restantes)
+
+    datos_detalles["detalles_pedidos"] = list(detalles_pedidos.values())
+    return datos_detalles
@@ -0,0 +1,172 @@
+"""
+Módulo generador de carga para el servidor HTTP
+Simula varias tabletas haciendo consultas y pedidos a la vez
+
+Cada cliente abre una conexión keep-alive y envía una mezcla de consultas
+del catálogo, consultas de pedidos y creación de pedidos. Al terminar se
+informan las peticiones por segundo, la latencia (p50/p95/p99) y los
+errores, y se comprueba que ningún producto haya quedado con stock negativo.
+"""
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+# Proporción de cada tipo de petición en la mezcla
+MEZCLA_POR_DEFECTO = {"consultar_productos": 0.5, "consultar_pedido": 0.2, "crear_pedido": 0.3}
+
+
+class ClienteHTTP:
+    """Cliente HTTP/1.1 mínimo con una conexión keep-alive"""
+
+    def __init__(self, host, puerto):
+        self.host = host
+        self.puerto = puerto
+        self._lector = None
+        self._escritor = None
+
+    async def peticion(self, metodo, ruta, cuerpo=None):
+        """Envía una petición y devuelve (estado, respuesta JSON)"""
+        if self._escritor is None:
+            self._lector, self._escritor = await asyncio.open_connection(self.host, self.puerto)
+        datos = b"" if cuerpo is None else json.dumps(cuerpo).encode("utf-8")
+        self._escritor.write(
+            f"{metodo} {ruta} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(datos)}\r\n\r\n".encode("latin-1")
+            + datos
+        )
+        await self._escritor.drain()
+
+        linea = await self._lector.readline()
+        if not linea:
+            raise ConnectionError("El servidor cerró la conexión")
+        estado = int(linea.split()[1])
+        largo = 0
+        cerrar = False
+        while True:
+            linea = await self._lector.readline()
+            if linea in (b"\r\n", b"\n", b""):
+                break
+            clave, _, valor = linea.decode("latin-1").partition(":")
+            clave = clave.strip().lower()
+            if clave == "content-length":
+                largo = int(valor)
+            elif clave == "connection" and valor.strip().lower() == "close":
+                cerrar = True
+        respuesta = json.loads(await self._lector.readexactly(largo)) if largo else None
+        if cerrar:
+            await self.cerrar()
+        return estado, respuesta
+
+    async def cerrar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+            self._lector = None
+
+
+def percentil(valores_ordenados, porcentaje):
+    """Percentil por el método del rango más cercano"""
+    if not valores_ordenados:
+        return 0.0
+    posicion = max(0, -(-len(valores_ordenados) * porcentaje // 100) - 1)
+    return valores_ordenados[int(posicion)]
+
+async def _cliente(numero, http, peticiones, productos, mezcla, resultados):
+    """Ejecuta las peticiones de un cliente y anota latencias y errores"""
+    azar = random.Random(numero)
+    tipos = list(mezcla)
+    pesos = [mezcla[tipo] for tipo in tipos]
+    pedidos_creados = []
+    for _ in range(peticiones):
+        tipo = azar.choices(tipos, pesos)[0]
+        if tipo == "consultar_pedido" and not pedidos_creados:
+            tipo = "consultar_productos"
+
+        if tipo == "consultar_productos":
+            palabra = azar.choice(productos)["nombre"].split()[0]
+            metodo, ruta, cuerpo = "GET", f"/productos?q={palabra[:4]}", None
+        elif tipo == "consultar_pedido":
+            metodo, ruta, cuerpo = "GET", f"/pedidos/{azar.choice(pedidos_creados)}", None
+        else:
+            lineas = [
+                {"codigo_producto": producto["codigo_producto"], "cantidad": azar.randint(1, 3)}
+                for producto in azar.sample(productos, min(len(productos), azar.randint(1, 3)))
+            ]
+            metodo, ruta, cuerpo = "POST", "/pedidos", {"codigo_cliente": f"CLI-{numero:03d}", "lineas": lineas}
+
+        inicio = time.perf_counter()
+        try:
+            estado, respuesta = await http.peticion(metodo, ruta, cuerpo)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError) as error:
+            resultados["errores"][type(error).__name__] = resultados["errores"].get(type(error).__name__, 0) + 1
+            await http.cerrar()
+            continue
+        resultados["latencias"].setdefault(tipo, []).append(time.perf_counter() - inicio)
+
+        if estado == 201 and tipo == "crear_pedido":
+            pedidos_creados.append(respuesta["codigo_pedido"])
+        elif estado == 400 and tipo == "crear_pedido":
+            # Falta de stock: es una respuesta esperada, no un error del servidor
+            resultados["rechazados"] += 1
+        elif estado >= 400:
+            clave = f"HTTP {estado}"
+            resultados["errores"][clave] = resultados["errores"].get(clave, 0) + 1
+    await http.cerrar()
+
+async def generar_carga(url="http://127.0.0.1:8080", clientes=10, peticiones=100, mezcla=None):
+    """Lanza los clientes contra el servidor y devuelve un resumen de la prueba"""
+    partes = urlsplit(url)
+    host, puerto = partes.hostname or "127.0.0.1", partes.port or 80
+    mezcla = mezcla or MEZCLA_POR_DEFECTO
+
+    http = ClienteHTTP(host, puerto)
+    _, respuesta = await http.peticion("GET", "/productos?tamano=500")
+    await http.cerrar()
+    productos = respuesta["productos"]
+    if not productos:
+        raise ValueError("El servidor no tiene productos para generar pedidos")
+
+    resultados = {"latencias": {}, "errores": {}, "rechazados": 0}
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        _cliente(numero, ClienteHTTP(host, puerto), peticiones, productos, mezcla, resultados)
+        for numero in range(1, clientes + 1)
+    ))
+    duracion = time.perf_counter() - inicio
+
+    # Comprobamos que la concurrencia no haya vendido más de lo que había
+    http = ClienteHTTP(host, puerto)
+    negativos = []
+    pagina = 1
+    while True:
+        _, respuesta = await http.peticion("GET", f"/productos?tamano=500&pagina={pagina}")
+        negativos += [p["codigo_producto"] for p in respuesta["productos"] if p["cantidad_en_stock"] < 0]
+        if pagina * 500 >= respuesta["total"]:
+            break
+        pagina += 1
+    await http.cerrar()
+
+    todas = sorted(latencia for lista in resultados["latencias"].values() for latencia in lista)
+    por_tipo = {}
+    for tipo, lista in resultados["latencias"].items():
+        lista.sort()
+        por_tipo[tipo] = {
+            "peticiones": len(lista),
+            "p50_ms": percentil(lista, 50) * 1000,
+            "p95_ms": percentil(lista, 95) * 1000,
+            "p99_ms": percentil(lista, 99) * 1000,
+        }
+    return {
+        "peticiones": len(todas),
+        "duracion_s": duracion,
+        "peticiones_por_segundo": len(todas) / duracion if duracion else 0.0,
+        "p50_ms": percentil(todas, 50) * 1000,
+        "p95_ms": percentil(todas, 95) * 1000,
+        "p99_ms": percentil(todas, 99) * 1000,
+        "por_tipo": por_tipo,
+        "rechazados_sin_stock": resultados["rechazados"],
+        "errores": resultados["errores"],
+        "stock_negativo": negativos,
+    }
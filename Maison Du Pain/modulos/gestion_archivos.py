@@ -1,33 +1,534 @@
 """
 Módulo para la gestión de archivos JSON
 Maneja la carga y guardado de datos
+
+El motor de almacenamiento se elige con la opción "almacenamiento" de la
+configuración: "json" (por defecto), "sqlite" o "mensual" (los pedidos
+repartidos en un archivo por mes, ver modulos/particiones.py). Con la opción
+"diario" los cambios de pedidos se anotan en un diario y se aplican al cargar.
+Los pedidos entregados antiguos se pueden pasar a un archivo comprimido
+aparte (ver modulos/archivo_pedidos.py). Con la opción "instantaneas" cada
+archivo JSON de datos tiene al lado una copia binaria que se carga más
+rápido mientras siga vigente (ver modulos/instantaneas.py).
+
+Las escrituras de archivos JSON son atómicas: se escribe un archivo temporal,
+se sincroniza con el disco y se renombra sobre el original. Cuando una
+operación modifica varios archivos se usa una transacción con marca de
+confirmación para que todos cambien juntos aunque el programa se interrumpa.
+
+Varias terminales pueden usar el mismo directorio datos/: toda escritura se
+hace con el bloqueo de datos/panaderia.lock tomado, y los cambios de una
+sesión se guardan como eventos (deltas de stock, altas de pedidos...) que se
+aplican sobre lo que hay en disco en ese momento, no como una copia completa
+de lo que la sesión tenía en memoria.
 """
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import glob
 import json
 import os
+import threading
+import time
+
+from modulos import agregados, archivo_pedidos, diario, instantaneas, metricas, particiones, secuencias
+from modulos.bloqueos import bloqueo_archivo
+from modulos.catalogo import obtener_catalogo
+from modulos.configuracion import DATOS_DIR, obtener_opcion
+from modulos.registros import (
+    a_json, convertir_productos, convertir_pedidos, convertir_detalles, convertir_detalle_pedido
+)
+from modulos.repositorio_pedidos import obtener_repositorio, olvidar_repositorio
+
+# Rutas de los archivos de datos
+PEDIDOS_DIR = os.path.join(DATOS_DIR, "pedidos")
+RUTA_DATOS = os.path.join(DATOS_DIR, "datos_panaderia.json")
+RUTA_PEDIDOS = os.path.join(PEDIDOS_DIR, "pedidos.json")
+RUTA_DETALLES_PEDIDOS = os.path.join(PEDIDOS_DIR, "detalles_pedidos.json")
+
+# Por archivo de datos: ruta, estructura vacía, función que convierte lo
+# leído en registros y función que le aplica eventos
+ARCHIVOS_DATOS = {
+    "datos": (RUTA_DATOS, lambda: {"productos": [], "pedidos": []},
+              convertir_productos, diario.aplicar_a_datos),
+    "pedidos": (RUTA_PEDIDOS, lambda: {"pedidos": []},
+                convertir_pedidos, diario.aplicar_a_pedidos),
+    "detalles": (RUTA_DETALLES_PEDIDOS, lambda: {"detalles_pedidos": []},
+                 convertir_detalles, diario.aplicar_a_detalles),
+}
+
+# Archivos JSON que pueden tener instantánea binaria (además de los mensuales)
+RUTAS_CON_INSTANTANEA = (RUTA_DATOS, RUTA_PEDIDOS, RUTA_DETALLES_PEDIDOS)
+
+# Agregados de ventas por día y de pedidos por estado (ver modulos/agregados.py):
+# un archivo de ventas por mes (ventas-AAAA-MM.json) y otro con los estados
+DIRECTORIO_AGREGADOS = os.path.join(DATOS_DIR, "agregados")
+RUTA_ESTADOS_AGREGADOS = os.path.join(DIRECTORIO_AGREGADOS, "estados.json")
+# Archivo único de versiones anteriores; se reparte por mes la primera vez
+RUTA_AGREGADOS_ANTERIOR = os.path.join(DATOS_DIR, "agregados.json")
+# Últimas lecturas de los agregados: mes (None para todos) -> (firma, datos)
+_cache_agregados = {}
+
+# Códigos del snapshot de pedidos, para validar altas con el diario activo:
+# (firma de pedidos.json, conjunto de códigos)
+_cache_codigos_snapshot = None
+
+# Últimas lecturas del archivo de pedidos entregados: (firma del índice, datos)
+_cache_indice_archivo = None
+_cache_archivados = None
+# Último segmento descomprimido: (nombre, sus detalles_pedidos tal como se leyeron)
+_cache_segmento = None
+
+# Bloqueo entre procesos de todos los archivos de datos (datos/panaderia.lock)
+RUTA_BLOQUEO_DATOS = os.path.join(DATOS_DIR, "panaderia")
+_bloqueo_hilos = threading.RLock()
+_profundidad_bloqueo = 0
+
+# Marca de confirmación de la transacción en curso y sufijo de los temporales
+RUTA_MARCA_TRANSACCION = os.path.join(DATOS_DIR, "transaccion.json")
+SUFIJO_TEMPORAL = ".nuevo"
+
+_recuperacion_revisada = False
+
+# Caché de lectura de los archivos de datos: ruta -> (firma, datos)
+# La firma es (mtime_ns, tamaño) del archivo y, con el diario activo, también
+# la del diario y su estado, porque los datos en caché ya tienen los eventos.
+# En SQLite las entradas usan las mismas rutas y la firma es la de la base.
+RUTAS_EN_CACHE = (RUTA_DATOS, RUTA_PEDIDOS, RUTA_DETALLES_PEDIDOS)
+_cache_lectura = {}
+_contadores_cache = {"aciertos": 0, "fallos": 0}
+# Las cachés se consultan y modifican con este bloqueo tomado (nunca mientras
+# se lee o escribe un archivo entero): el servidor HTTP confirma en un hilo
+# aparte mientras el bucle atiende consultas
+_bloqueo_cache = threading.RLock()
+
+
+class ErrorConflicto(ValueError):
+    """Los eventos de una operación no se pueden aplicar sobre lo que hay ahora en disco"""
+
+
+class ErrorStockInsuficiente(ErrorConflicto):
+    """Con los datos actuales del disco un producto vendido quedaría con stock negativo"""
+
+
+class ErrorPedidoDuplicado(ErrorConflicto):
+    """Un pedido nuevo usa el código de un pedido que ya está guardado"""
+
+
+class ErrorArchivoDanado(ValueError):
+    """El archivo de datos no se pudo decodificar y quedó apartado sin reemplazar"""
+
+    def __init__(self, ruta_archivo, apartados):
+        self.ruta_archivo = ruta_archivo
+        self.apartados = apartados
+        super().__init__(
+            f"No se pudo leer {ruta_archivo}: el archivo dañado se apartó como "
+            f"{', '.join(apartados)}. Restáurelo desde una copia (o mueva el "
+            f"apartado a otra carpeta para empezar con los datos de ejemplo)."
+        )
+
+
+@contextmanager
+def bloqueo_datos():
+    """Mantiene el bloqueo exclusivo de los archivos de datos entre procesos
+
+    Se puede anidar: dentro del mismo proceso solo el primer nivel toma el
+    bloqueo del archivo (los hilos se turnan con un RLock).
+    """
+    global _profundidad_bloqueo
+    with _bloqueo_hilos:
+        _profundidad_bloqueo += 1
+        try:
+            if _profundidad_bloqueo == 1:
+                with bloqueo_archivo(RUTA_BLOQUEO_DATOS):
+                    yield
+            else:
+                yield
+        finally:
+            _profundidad_bloqueo -= 1
+
+def usar_sqlite():
+    """Indica si la configuración selecciona el motor SQLite"""
+    return obtener_opcion("almacenamiento") == "sqlite"
+
+def usar_particiones():
+    """Indica si los pedidos se guardan en archivos mensuales"""
+    return obtener_opcion("almacenamiento") == "mensual"
+
+def usar_diario():
+    """Indica si los cambios de pedidos se registran en el diario"""
+    return bool(obtener_opcion("diario")) and not usar_sqlite() and not usar_particiones()
+
+def usar_instantaneas():
+    """Indica si se usan las instantáneas binarias de los archivos JSON"""
+    return bool(obtener_opcion("instantaneas")) and not usar_sqlite()
+
+def _leer_json(ruta_archivo):
+    """Lee y decodifica un archivo JSON"""
+    with open(ruta_archivo, "r", encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+        metricas.contar_lectura(os.fstat(archivo.fileno()).st_size)
+        return datos
+
+def _leer_json_si_existe(ruta_archivo, por_defecto):
+    """Lee un archivo JSON o devuelve la estructura por defecto si no existe"""
+    try:
+        return _leer_json(ruta_archivo)
+    except FileNotFoundError:
+        return por_defecto
+
+def _firma_archivo(ruta_archivo):
+    """Devuelve (mtime_ns, tamaño) del archivo, o None si no existe"""
+    try:
+        estado = os.stat(ruta_archivo)
+    except FileNotFoundError:
+        return None
+    return (estado.st_mtime_ns, estado.st_size)
+
+def _firma_cache(ruta_archivo):
+    """Firma con la que se valida una entrada de la caché de lectura"""
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        return (_firma_archivo(almacenamiento_sqlite.RUTA_BASE_DATOS),)
+    if usar_diario():
+        return (_firma_archivo(ruta_archivo),
+                _firma_archivo(diario.RUTA_DIARIO),
+                _firma_archivo(diario.RUTA_ESTADO_DIARIO))
+    return (_firma_archivo(ruta_archivo),)
+
+def _preparar(archivo, estructura):
+    """Convierte lo leído en registros y, con el diario activo, le aplica sus eventos
+
+    archivo es "datos", "pedidos" o "detalles".
+    """
+    ARCHIVOS_DATOS[archivo][2](estructura)
+    return _aplicar_diario(archivo, estructura)
+
+def _aplicar_diario(archivo, estructura):
+    """Con el diario activo, aplica sus eventos a una estructura ya convertida"""
+    if usar_diario():
+        ARCHIVOS_DATOS[archivo][3](estructura, diario.leer_eventos(archivo))
+    return estructura
+
+def _leer_registros(archivo, ruta_archivo, por_defecto=None):
+    """Lee un archivo JSON de datos ya convertido en registros (sin el diario)
+
+    Con las instantáneas activas se carga la del archivo si está vigente; si
+    no, se decodifica el JSON y se escribe la instantánea para la próxima
+    vez. Si el archivo no existe se devuelve por_defecto (convertido) o, sin
+    por_defecto, se lanza FileNotFoundError.
+    """
+    convertir = ARCHIVOS_DATOS[archivo][2]
+    try:
+        if not usar_instantaneas():
+            return convertir(_leer_json(ruta_archivo))
+        datos = instantaneas.leer(ruta_archivo)
+        if datos is not None:
+            return datos
+        firma = instantaneas.firma(ruta_archivo)
+        datos = convertir(_leer_json(ruta_archivo))
+    except FileNotFoundError:
+        if por_defecto is None:
+            raise
+        return convertir(por_defecto)
+    instantaneas.escribir(ruta_archivo, datos, firma)
+    return datos
+
+def _cargar_de_sqlite(archivo):
+    """Lee de la base SQLite el archivo indicado ("datos", "pedidos" o "detalles")"""
+    from modulos import almacenamiento_sqlite
+    cargadores = {
+        "datos": almacenamiento_sqlite.cargar_datos,
+        "pedidos": almacenamiento_sqlite.cargar_pedidos,
+        "detalles": almacenamiento_sqlite.cargar_detalles_pedidos,
+    }
+    return _preparar(archivo, cargadores[archivo]())
+
+def _leer_en_cache(archivo, ruta_archivo=None):
+    """Lee un archivo de pedidos (o su tabla en SQLite) usando la caché si no cambió
+
+    Con un acierto se devuelve la misma estructura ya decodificada, sin volver
+    a leer el disco. ruta_archivo permite leer un archivo mensual de ese tipo.
+    """
+    ruta_archivo = ruta_archivo or ARCHIVOS_DATOS[archivo][0]
+    with _bloqueo_cache:
+        firma = _firma_cache(ruta_archivo)
+        entrada = _cache_lectura.get(ruta_archivo)
+        if entrada is not None and entrada[0] == firma:
+            _contadores_cache["aciertos"] += 1
+            return entrada[1]
+        _contadores_cache["fallos"] += 1
+
+    if usar_sqlite():
+        datos = _cargar_de_sqlite(archivo)
+    else:
+        datos = _aplicar_diario(archivo, _leer_registros(archivo, ruta_archivo))
+    _guardar_si_no_cambio(ruta_archivo, firma, datos)
+    return datos
+
+def _guardar_si_no_cambio(ruta_archivo, firma, datos):
+    """Guarda en la caché lo leído, salvo que el archivo haya cambiado mientras se leía"""
+    with _bloqueo_cache:
+        if _firma_cache(ruta_archivo) == firma:
+            _cache_lectura[ruta_archivo] = (firma, datos)
+
+def _actualizar_cache(ruta_archivo, datos):
+    """Guarda en la caché lo que acabamos de escribir nosotros mismos
 
-# Obtener la ruta base del proyecto
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATOS_DIR = os.path.join(BASE_DIR, "datos")
+    Con las instantáneas activas también se reescribe la del archivo.
+    """
+    es_particion = particiones.es_particion(ruta_archivo)
+    if ruta_archivo in RUTAS_EN_CACHE or es_particion:
+        with _bloqueo_cache:
+            _cache_lectura[ruta_archivo] = (_firma_cache(ruta_archivo), datos)
+    if usar_instantaneas() and (ruta_archivo in RUTAS_CON_INSTANTANEA or es_particion):
+        instantaneas.escribir(ruta_archivo, datos)
 
+def _vigente_en_cache(ruta_archivo, estructura):
+    """Indica si estructura es la de la caché y nadie escribió el archivo desde entonces"""
+    with _bloqueo_cache:
+        entrada = _cache_lectura.get(ruta_archivo)
+        return (estructura is not None and entrada is not None and entrada[1] is estructura
+                and entrada[0] == _firma_cache(ruta_archivo))
+
+def estadisticas_cache():
+    """Devuelve los aciertos, fallos y entradas de la caché de lectura"""
+    with _bloqueo_cache:
+        consultas = _contadores_cache["aciertos"] + _contadores_cache["fallos"]
+        return {
+            "aciertos": _contadores_cache["aciertos"],
+            "fallos": _contadores_cache["fallos"],
+            "tasa_aciertos": _contadores_cache["aciertos"] / consultas if consultas else 0.0,
+            "entradas": len(_cache_lectura),
+        }
+
+def vaciar_cache():
+    """Descarta todas las entradas de la caché de lectura"""
+    with _bloqueo_cache:
+        _cache_lectura.clear()
+    olvidar_repositorio()
+
+def _sincronizar_directorio(directorio):
+    """Sincroniza un directorio para que los renombrados queden en disco"""
+    try:
+        descriptor = os.open(directorio, os.O_RDONLY)
+    except OSError:
+        # En Windows no se pueden abrir directorios; el renombrado ya es durable
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+def _escribir_temporal(ruta_archivo, datos, sangria=4):
+    """Escribe los datos en el archivo temporal de ruta_archivo y lo sincroniza"""
+    os.makedirs(os.path.dirname(ruta_archivo), exist_ok=True)
+    temporal = ruta_archivo + SUFIJO_TEMPORAL
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, indent=sangria, ensure_ascii=False, default=a_json)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+        metricas.contar_escritura(os.fstat(archivo.fileno()).st_size)
+    return temporal
+
+def _escribir_json(ruta_archivo, datos, sangria=4):
+    """Escribe los datos en un archivo JSON con formato legible
+
+    Se escribe primero un temporal y luego se renombra, de modo que una
+    interrupción nunca deja el archivo a medio escribir. Con sangria=None se
+    escribe compacto (para archivos grandes que no se leen a mano).
+    """
+    with bloqueo_datos():
+        temporal = _escribir_temporal(ruta_archivo, datos, sangria)
+        os.replace(temporal, ruta_archivo)
+        _sincronizar_directorio(os.path.dirname(ruta_archivo))
+        _actualizar_cache(ruta_archivo, datos)
+
+def confirmar_transaccion(cambios):
+    """Escribe varios archivos JSON de forma que cambien todos o ninguno
+
+    cambios es un diccionario {ruta_archivo: datos}. Pasos:
+    1. Se escribe y sincroniza un temporal por archivo.
+    2. Se escribe la marca de confirmación con la lista de renombrados.
+    3. Se renombra cada temporal sobre su archivo.
+    4. Se borra la marca.
+    Si el proceso se interrumpe antes del paso 2 los temporales se descartan;
+    si se interrumpe después, recuperar_transaccion() completa los renombrados.
+    """
+    with bloqueo_datos():
+        _confirmar_transaccion(cambios)
+
+def _confirmar_transaccion(cambios):
+    """Pasos de confirmar_transaccion(), con el bloqueo ya tomado"""
+    renombrados = []
+    for ruta_archivo, datos in cambios.items():
+        temporal = _escribir_temporal(ruta_archivo, datos)
+        renombrados.append([
+            os.path.relpath(temporal, DATOS_DIR),
+            os.path.relpath(ruta_archivo, DATOS_DIR)
+        ])
+
+    # La transacción queda confirmada cuando la marca está en disco
+    marca_temporal = RUTA_MARCA_TRANSACCION + SUFIJO_TEMPORAL
+    with open(marca_temporal, "w", encoding="utf-8") as archivo:
+        json.dump({"renombrados": renombrados}, archivo)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(marca_temporal, RUTA_MARCA_TRANSACCION)
+    _sincronizar_directorio(DATOS_DIR)
+
+    _aplicar_renombrados(renombrados)
+    os.remove(RUTA_MARCA_TRANSACCION)
+    _sincronizar_directorio(DATOS_DIR)
+
+    for ruta_archivo, datos in cambios.items():
+        _actualizar_cache(ruta_archivo, datos)
+
+def _aplicar_renombrados(renombrados):
+    """Renombra cada temporal sobre su archivo definitivo"""
+    directorios = set()
+    for temporal, destino in renombrados:
+        temporal = os.path.join(DATOS_DIR, temporal)
+        destino = os.path.join(DATOS_DIR, destino)
+        if os.path.exists(temporal):
+            os.replace(temporal, destino)
+        directorios.add(os.path.dirname(destino))
+    for directorio in directorios:
+        _sincronizar_directorio(directorio)
+
+def recuperar_transaccion():
+    """Completa o descarta una transacción interrumpida
+
+    Con marca de confirmación se terminan los renombrados pendientes; sin
+    ella se borran los temporales que hubieran quedado. Devuelve True si
+    había algo que recuperar.
+    """
+    recuperado = False
+    try:
+        with open(RUTA_MARCA_TRANSACCION, "r", encoding="utf-8") as archivo:
+            marca = json.load(archivo)
+        _aplicar_renombrados(marca["renombrados"])
+        os.remove(RUTA_MARCA_TRANSACCION)
+        recuperado = True
+    except FileNotFoundError:
+        pass
+
+    temporales = [
+        ruta_archivo + SUFIJO_TEMPORAL
+        for ruta_archivo in (RUTA_DATOS, RUTA_PEDIDOS, RUTA_DETALLES_PEDIDOS, RUTA_AGREGADOS_ANTERIOR,
+                             diario.RUTA_ESTADO_DIARIO, RUTA_MARCA_TRANSACCION)
+    ]
+    for directorio in (particiones.DIRECTORIO_MESES, archivo_pedidos.DIRECTORIO_ARCHIVO, DIRECTORIO_AGREGADOS):
+        if os.path.isdir(directorio):
+            temporales += [
+                os.path.join(directorio, nombre)
+                for nombre in os.listdir(directorio) if nombre.endswith(SUFIJO_TEMPORAL)
+            ]
+    for temporal in temporales:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+            recuperado = True
+    # El de las secuencias se escribe con su propio bloqueo, no con el de los datos
+    if secuencias.descartar_temporal():
+        recuperado = True
+    return recuperado
+
+def _revisar_recuperacion():
+    """Revisa una sola vez por proceso si quedó una transacción a medias"""
+    global _recuperacion_revisada
+    if not _recuperacion_revisada:
+        _recuperacion_revisada = True
+        # Con el bloqueo tomado: la marca podría ser de otra terminal que está guardando
+        with bloqueo_datos():
+            recuperar_transaccion()
+
+def _apartar_archivo_danado(ruta_archivo):
+    """Renombra un archivo que no se pudo decodificar para no perder su contenido"""
+    destino = f"{ruta_archivo}.danado-{time.strftime('%Y%m%d%H%M%S')}"
+    os.replace(ruta_archivo, destino)
+    return destino
+
+def _guardar_snapshot(ruta_archivo, datos, archivo_diario):
+    """Guarda un archivo completo; con el diario activo, junto con su estado"""
+    if usar_diario():
+        with bloqueo_datos():
+            estado = diario.estado_aplicado(archivo_diario)
+            confirmar_transaccion({ruta_archivo: datos, diario.RUTA_ESTADO_DIARIO: estado})
+    else:
+        _escribir_json(ruta_archivo, datos)
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
 def cargar_datos():
-    """Carga los datos desde el archivo JSON"""
+    """Carga los datos desde el archivo JSON
+
+    Cada llamada devuelve una estructura nueva, que queda en la caché de
+    lectura como la última cargada: mientras nadie escriba el archivo,
+    recargar_datos() y confirmar_cambios() no necesitan volver a leerlo.
+    """
+    if usar_sqlite():
+        firma = _firma_cache(RUTA_DATOS)
+        datos = _cargar_de_sqlite("datos")
+        if not datos["productos"] and len(datos) == 1:
+            return crear_estructura_inicial()
+        obtener_catalogo(datos)
+        with _bloqueo_cache:
+            _cache_lectura[RUTA_DATOS] = (firma, datos)
+        return datos
+
+    _revisar_recuperacion()
     try:
-        ruta_archivo = os.path.join(DATOS_DIR, "datos_panaderia.json")
-        with open(ruta_archivo, "r", encoding="utf-8") as archivo:
-            return json.load(archivo)
+        firma = _firma_cache(RUTA_DATOS)
+        datos = _aplicar_diario("datos", _leer_registros("datos", RUTA_DATOS))
+        # Envolvemos la lista de productos en un catálogo indexado por código
+        obtener_catalogo(datos)
+        _guardar_si_no_cambio(RUTA_DATOS, firma, datos)
+        return datos
     except FileNotFoundError:
+        # Mientras haya un catálogo dañado apartado no se empieza de cero:
+        # los datos de ejemplo ocuparían su lugar sin que nadie lo note
+        apartados = sorted(glob.glob(glob.escape(RUTA_DATOS) + ".danado-*"))
+        if apartados:
+            raise ErrorArchivoDanado(RUTA_DATOS, apartados) from None
         return crear_estructura_inicial()
-    except json.JSONDecodeError:
-        return crear_estructura_inicial()
+    except json.JSONDecodeError as error:
+        # Apartamos el archivo dañado en lugar de sobrescribir el catálogo
+        apartado = _apartar_archivo_danado(RUTA_DATOS)
+        raise ErrorArchivoDanado(RUTA_DATOS, [apartado]) from error
 
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
 def guardar_datos(datos):
-    """Guarda los datos en el archivo JSON"""
-    # Aseguramos que existe el directorio
-    os.makedirs(DATOS_DIR, exist_ok=True)
-    
-    ruta_archivo = os.path.join(DATOS_DIR, "datos_panaderia.json")
-    with open(ruta_archivo, "w", encoding="utf-8") as archivo:
-        json.dump(datos, archivo, indent=4, ensure_ascii=False)
+    """Guarda los datos en el archivo JSON
+
+    Reemplaza el archivo completo con lo que hay en memoria; para guardar
+    cambios sin pisar los de otras terminales se usa confirmar_cambios().
+    """
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        with bloqueo_datos():
+            almacenamiento_sqlite.guardar_datos(datos)
+        return
+
+    _guardar_snapshot(RUTA_DATOS, datos, "datos")
+
+def recargar_datos(datos):
+    """Vuelve a leer los productos sobre el mismo diccionario
+
+    Quien tenga una referencia a datos (el menú principal, una sesión) pasa
+    a ver los cambios que guardaron otras terminales. Si datos es la
+    estructura de la caché y nadie escribió desde entonces, no se lee nada y
+    el catálogo conserva sus índices.
+    """
+    if _vigente_en_cache(RUTA_DATOS, datos):
+        return datos
+    nuevos = cargar_datos()
+    datos.clear()
+    datos.update(nuevos)
+    with _bloqueo_cache:
+        entrada = _cache_lectura.get(RUTA_DATOS)
+        if entrada is not None and entrada[1] is nuevos:
+            _cache_lectura[RUTA_DATOS] = (entrada[0], datos)
+    return datos
 
 def crear_estructura_inicial():
     """Crea la estructura inicial de datos"""
@@ -57,50 +558,990 @@ def crear_estructura_inicial():
         "pedidos": []
     }
     guardar_datos(datos)
+    convertir_productos(datos)
+    obtener_catalogo(datos)
     return datos
 
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
 def cargar_pedidos():
     """Carga los pedidos desde el archivo JSON"""
+    if usar_sqlite():
+        return _leer_en_cache("pedidos")
+
+    _revisar_recuperacion()
+    if usar_particiones():
+        return _cargar_particiones("pedidos")
     try:
-        ruta_pedidos = os.path.join(DATOS_DIR, "pedidos")
-        os.makedirs(ruta_pedidos, exist_ok=True)
-        
-        ruta_archivo = os.path.join(ruta_pedidos, "pedidos.json")
-        with open(ruta_archivo, "r", encoding="utf-8") as archivo:
-            return json.load(archivo)
+        return _leer_en_cache("pedidos")
     except FileNotFoundError:
         datos = {"pedidos": []}
         guardar_pedidos(datos)
         return datos
 
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
 def cargar_detalles_pedidos():
     """Carga los detalles de pedidos desde el archivo JSON"""
+    if usar_sqlite():
+        return _leer_en_cache("detalles")
+
+    _revisar_recuperacion()
+    if usar_particiones():
+        return _cargar_particiones("detalles")
     try:
-        ruta_pedidos = os.path.join(DATOS_DIR, "pedidos")
-        os.makedirs(ruta_pedidos, exist_ok=True)
-        
-        ruta_archivo = os.path.join(ruta_pedidos, "detalles_pedidos.json")
-        with open(ruta_archivo, "r", encoding="utf-8") as archivo:
-            return json.load(archivo)
+        return _leer_en_cache("detalles")
     except FileNotFoundError:
         datos = {"detalles_pedidos": []}
         guardar_detalles_pedidos(datos)
         return datos
 
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def obtener_detalle_pedido(codigo_pedido):
+    """Devuelve el bloque de detalles de un pedido, o None si no existe
+
+    Según la opción "lectura_detalles" se busca en el archivo completo
+    (usando la caché), recorriéndolo bloque a bloque, o con el índice de
+    posiciones. Con el diario activo se aplican los eventos de ese pedido.
+    """
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        detalle_pedido = almacenamiento_sqlite.cargar_detalle_pedido(codigo_pedido)
+        return convertir_detalle_pedido(detalle_pedido) if detalle_pedido else None
+
+    if usar_particiones():
+        # Solo se abren los meses cuyo rango de códigos incluye al pedido
+        _revisar_recuperacion()
+        for mes in particiones.meses_de_codigo(_cargar_manifiesto(), codigo_pedido):
+            for detalle_pedido in _leer_particion("detalles", mes)["detalles_pedidos"]:
+                if detalle_pedido["codigo_pedido"] == codigo_pedido:
+                    return detalle_pedido
+        return None
+
+    modo = obtener_opcion("lectura_detalles")
+    if modo not in ("streaming", "indice"):
+        return obtener_repositorio(datos_detalles=cargar_detalles_pedidos()).detalles(codigo_pedido)
+
+    from modulos import lectura_detalles
+
+    _revisar_recuperacion()
+    try:
+        if modo == "indice":
+            detalle_pedido = lectura_detalles.leer_detalle_indexado(RUTA_DETALLES_PEDIDOS, codigo_pedido)
+        else:
+            detalle_pedido = lectura_detalles.buscar_detalle_en_archivo(RUTA_DETALLES_PEDIDOS, codigo_pedido)
+    except FileNotFoundError:
+        detalle_pedido = None
+    if detalle_pedido is not None:
+        convertir_detalle_pedido(detalle_pedido)
+
+    if usar_diario():
+        eventos = [
+            datos_evento for datos_evento in diario.leer_eventos("detalles")
+            if diario.codigo_pedido_de(datos_evento) == codigo_pedido
+        ]
+        if eventos:
+            estructura = {"detalles_pedidos": [detalle_pedido] if detalle_pedido else []}
+            diario.aplicar_a_detalles(estructura, eventos)
+            detalle_pedido = estructura["detalles_pedidos"][0] if estructura["detalles_pedidos"] else None
+    return detalle_pedido
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
 def guardar_pedidos(datos):
     """Guarda los pedidos en el archivo JSON"""
-    ruta_pedidos = os.path.join(DATOS_DIR, "pedidos")
-    os.makedirs(ruta_pedidos, exist_ok=True)
-    
-    ruta_archivo = os.path.join(ruta_pedidos, "pedidos.json")
-    with open(ruta_archivo, "w", encoding="utf-8") as archivo:
-        json.dump(datos, archivo, indent=4, ensure_ascii=False)
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        with bloqueo_datos():
+            almacenamiento_sqlite.guardar_pedidos(datos)
+        return
+    if usar_particiones():
+        _guardar_particiones(datos_pedidos=datos)
+        return
+
+    _guardar_snapshot(RUTA_PEDIDOS, datos, "pedidos")
 
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
 def guardar_detalles_pedidos(datos):
     """Guarda los detalles de pedidos en el archivo JSON"""
-    ruta_pedidos = os.path.join(DATOS_DIR, "pedidos")
-    os.makedirs(ruta_pedidos, exist_ok=True)
-    
-    ruta_archivo = os.path.join(ruta_pedidos, "detalles_pedidos.json")
-    with open(ruta_archivo, "w", encoding="utf-8") as archivo:
-        json.dump(datos, archivo, indent=4, ensure_ascii=False) 
\ No newline at end of file
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        with bloqueo_datos():
+            almacenamiento_sqlite.guardar_detalles_pedidos(datos)
+        return
+    if usar_particiones():
+        _guardar_particiones(datos_detalles=datos)
+        return
+
+    _guardar_snapshot(RUTA_DETALLES_PEDIDOS, datos, "detalles")
+
+def _leer_actuales(archivos):
+    """Lee de disco, sin la caché, los archivos indicados con el diario aplicado
+
+    archivos es un conjunto con "datos", "pedidos" y/o "detalles". Devuelve
+    copias nuevas que se pueden modificar sin afectar a ninguna sesión.
+    """
+    if usar_sqlite():
+        return {archivo: _cargar_de_sqlite(archivo) for archivo in archivos}
+
+    actuales = {}
+    if usar_particiones():
+        for archivo in archivos & {"pedidos", "detalles"}:
+            actuales[archivo] = _leer_particiones_actuales(archivo)
+        archivos = archivos & {"datos"}
+    for archivo in archivos:
+        ruta_archivo, estructura_vacia, _, _ = ARCHIVOS_DATOS[archivo]
+        actuales[archivo] = _aplicar_diario(archivo, _leer_registros(archivo, ruta_archivo, estructura_vacia()))
+    return actuales
+
+def _error_de_conflicto(tipo, codigo):
+    """Error para un conflicto con el disco: ("stock", producto) o ("pedido", código)"""
+    if tipo == "stock":
+        return ErrorStockInsuficiente(
+            f"No hay suficiente stock de {codigo}: otra terminal lo modificó mientras tanto"
+        )
+    return ErrorPedidoDuplicado(
+        f"Ya existe un pedido con el código {codigo}: otra terminal lo creó mientras tanto"
+    )
+
+def _verificar_stock(datos, eventos):
+    """Comprueba que ningún producto con ventas en los eventos quede con stock negativo"""
+    catalogo = obtener_catalogo(datos)
+    for datos_evento in eventos:
+        if datos_evento["tipo"] != "stock" or datos_evento["delta"] >= 0:
+            continue
+        producto = catalogo.buscar(datos_evento["codigo_producto"])
+        if producto is not None and producto["cantidad_en_stock"] < 0:
+            raise _error_de_conflicto("stock", producto["codigo_producto"])
+
+def _verificar_pedidos_nuevos(eventos, existentes):
+    """Comprueba que los pedidos que crean los eventos no estén ya guardados
+
+    existentes(codigos) devuelve cuáles de esos códigos tienen un pedido en
+    disco antes de la operación. Un alta después de eliminar el mismo código
+    en la misma operación es válida.
+    """
+    nuevos = {
+        diario.codigo_pedido_de(datos_evento) for datos_evento in eventos
+        if datos_evento["tipo"] == "crear_pedido"
+    }
+    if not nuevos:
+        return
+    guardados = set(existentes(nuevos))
+    for datos_evento in eventos:
+        codigo_pedido = diario.codigo_pedido_de(datos_evento)
+        if datos_evento["tipo"] == "crear_pedido":
+            if codigo_pedido in guardados:
+                raise _error_de_conflicto("pedido", codigo_pedido)
+            guardados.add(codigo_pedido)
+        elif datos_evento["tipo"] == "eliminar_pedido":
+            guardados.discard(codigo_pedido)
+
+def _existentes_en(datos_pedidos):
+    """Función para _verificar_pedidos_nuevos() que busca en una estructura de pedidos"""
+    return lambda codigos: {
+        pedido["codigo_pedido"] for pedido in datos_pedidos["pedidos"] if pedido["codigo_pedido"] in codigos
+    }
+
+def _existentes_en_diario(codigos):
+    """Cuáles de los códigos tienen pedido en disco con el diario activo
+
+    Se miran los códigos del snapshot (que solo cambia al compactar, por eso
+    se guardan aparte) y las altas y bajas del diario que aún no incluye. No
+    se usa la caché de lectura: sus estructuras pueden tener cambios de
+    sesiones que todavía no se guardaron.
+    """
+    global _cache_codigos_snapshot
+    firma = _firma_archivo(RUTA_PEDIDOS)
+    entrada = _cache_codigos_snapshot
+    if entrada is None or entrada[0] != firma:
+        snapshot = _leer_json_si_existe(RUTA_PEDIDOS, {"pedidos": []})
+        entrada = _cache_codigos_snapshot = (
+            firma, frozenset(pedido["codigo_pedido"] for pedido in snapshot["pedidos"])
+        )
+    existentes = set(codigos) & entrada[1]
+    for datos_evento in diario.leer_eventos("pedidos"):
+        codigo_pedido = diario.codigo_pedido_de(datos_evento)
+        if codigo_pedido not in codigos:
+            continue
+        if datos_evento["tipo"] == "crear_pedido":
+            existentes.add(codigo_pedido)
+        elif datos_evento["tipo"] == "eliminar_pedido":
+            existentes.discard(codigo_pedido)
+    return existentes
+
+def _conservar_en_cache(archivos, estructuras, firmas):
+    """Deja en la caché, con la firma nueva, las entradas que siguen al día
+
+    Se llama después de guardar solo los eventos (en el diario o en SQLite).
+    Si nadie escribió desde que se leyó una entrada, esa estructura más los
+    eventos (que la sesión ya le aplicó) es justo lo que queda en disco; si
+    la operación no tocaba ese archivo, tampoco cambió. Las demás se
+    descartan.
+    """
+    with _bloqueo_cache:
+        for archivo, estructura in estructuras.items():
+            ruta_archivo = ARCHIVOS_DATOS[archivo][0]
+            entrada = _cache_lectura.pop(ruta_archivo, None)
+            if entrada is not None and entrada[0] == firmas[ruta_archivo] and (
+                    estructura is entrada[1] or archivo not in archivos):
+                _cache_lectura[ruta_archivo] = (_firma_cache(ruta_archivo), entrada[1])
+
+def _adoptar_datos(actuales, datos):
+    """Pasa los productos releídos al diccionario de la sesión, que queda en la caché
+
+    Así quien tenga una referencia a datos (el menú principal) ve lo que hay
+    en disco y la próxima operación no necesita volver a leerlo.
+    """
+    if datos is not None and "datos" in actuales and actuales["datos"] is not datos:
+        datos.clear()
+        datos.update(actuales["datos"])
+        actuales["datos"] = datos
+        with _bloqueo_cache:
+            _cache_lectura[RUTA_DATOS] = (_firma_cache(RUTA_DATOS), datos)
+    return actuales
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def confirmar_cambios(eventos, datos_pedidos=None, datos_detalles=None, datos=None, meses=None):
+    """Guarda una operación leyendo, aplicando sus eventos y escribiendo bajo el bloqueo
+
+    Los eventos (altas de pedidos, deltas de stock, ediciones de productos...)
+    se aplican sobre lo que hay en disco en ese momento y no sobre la copia en
+    memoria de quien los generó, así los cambios de varias terminales se
+    suman en lugar de pisarse. Si un producto vendido en estos eventos
+    quedaría con stock negativo se lanza ErrorStockInsuficiente, y si un
+    pedido nuevo usa un código que ya está guardado, ErrorPedidoDuplicado;
+    en ambos casos no se guarda nada.
+
+    datos, datos_pedidos y datos_detalles son las estructuras en memoria de
+    la sesión, que ya incluyen los eventos. Las que siguen siendo las de la
+    caché de lectura sin que nadie haya escrito desde entonces se guardan
+    tal cual, sin releer el archivo, y quedan en la caché con sus índices;
+    las demás se releen y se les aplican los eventos. Con el diario activo
+    solo se añaden los eventos, y en SQLite cada evento se traduce a
+    sentencias sobre las filas que toca. Con archivos mensuales, meses son
+    los meses que la sesión cargó uno a uno, {mes: (datos_pedidos,
+    datos_detalles)}, y cada archivo del mes se trata igual. Los deltas de
+    los agregados de ventas se guardan en la misma transacción (o en el
+    mismo diario) que los pedidos. Devuelve un diccionario con las estructuras actuales que se
+    leyeron ("datos", "pedidos" y/o "detalles"); los productos releídos se
+    pasan al diccionario datos.
+    """
+    archivos = set()
+    for datos_evento in eventos:
+        archivos.update(diario.ARCHIVOS_POR_EVENTO[datos_evento["tipo"]])
+    # Los agregados se guardan aparte
+    archivos &= set(ARCHIVOS_DATOS)
+    estructuras = {"datos": datos, "pedidos": datos_pedidos, "detalles": datos_detalles}
+
+    with bloqueo_datos():
+        vigentes = {
+            archivo for archivo, estructura in estructuras.items()
+            if _vigente_en_cache(ARCHIVOS_DATOS[archivo][0], estructura)
+        }
+        if usar_sqlite():
+            # Cada evento se traduce a sentencias sobre sus filas, sin leer
+            # las tablas; el stock y los códigos se comprueban ahí
+            from modulos import almacenamiento_sqlite
+            firmas = {ruta_archivo: _firma_cache(ruta_archivo) for ruta_archivo in RUTAS_EN_CACHE}
+            iniciales = None
+            if _deltas_agregados(eventos) and not almacenamiento_sqlite.agregados_iniciados():
+                # La primera vez las tablas de agregados parten de lo calculado
+                iniciales = _agregados_anteriores() or _calcular_agregados()
+            conflicto = almacenamiento_sqlite.aplicar_eventos(eventos, agregados_iniciales=iniciales)
+            if conflicto is not None:
+                raise _error_de_conflicto(*conflicto)
+            if iniciales is not None:
+                _olvidar_agregados_anteriores()
+            _conservar_en_cache(archivos, estructuras, firmas)
+            # Lo que la sesión no tenía al día se relee, ya con los cambios de
+            # las otras terminales
+            actuales = _leer_actuales({
+                archivo for archivo in archivos - vigentes if estructuras[archivo] is not None
+            })
+            for archivo, estructura in actuales.items():
+                _actualizar_cache(ARCHIVOS_DATOS[archivo][0], estructura)
+            return _adoptar_datos(actuales, datos)
+
+        if usar_diario():
+            firmas = {ruta_archivo: _firma_cache(ruta_archivo) for ruta_archivo in RUTAS_EN_CACHE}
+            # Solo hace falta leer los productos, para validar el stock, si la
+            # sesión no tiene ya lo último del disco
+            actuales = _leer_actuales(archivos & {"datos"} - vigentes)
+            if actuales:
+                diario.aplicar_a_datos(actuales["datos"], diario.eventos_de(eventos, "datos"))
+            if "datos" in archivos:
+                _verificar_stock(actuales.get("datos", datos), eventos)
+            if "pedidos" not in vigentes:
+                # Si la sesión no trabajó sobre lo último del disco, su
+                # validación de los códigos nuevos no alcanza
+                _verificar_pedidos_nuevos(eventos, _existentes_en_diario)
+            # Los deltas de los agregados van en el diario con los demás
+            # eventos; si todavía no hay agregados guardados, antes se
+            # guardan los calculados para que tengan sobre qué sumarse
+            if _deltas_agregados(eventos) and not (
+                    os.path.exists(RUTA_ESTADOS_AGREGADOS) or os.path.exists(RUTA_AGREGADOS_ANTERIOR)):
+                _guardar_agregados(_calcular_agregados())
+            diario.registrar(eventos)
+            _conservar_en_cache(archivos, estructuras, firmas)
+            return _adoptar_datos(actuales, datos)
+
+        if usar_particiones():
+            # Solo se leen y reescriben los meses de los pedidos afectados
+            actuales = _leer_actuales(archivos & {"datos"} - vigentes)
+            _verificar_pedidos_nuevos(eventos, _existentes_en_meses)
+            unidos = _unidos_vigentes(archivos, estructuras)
+            cambios = _cambios_particiones(eventos, meses)
+            if actuales:
+                diario.aplicar_a_datos(actuales["datos"], diario.eventos_de(eventos, "datos"))
+            if "datos" in archivos:
+                cambios[RUTA_DATOS] = actuales.get("datos", datos)
+                _verificar_stock(cambios[RUTA_DATOS], eventos)
+            cambios.update(_cambios_agregados(_deltas_agregados(eventos)))
+            confirmar_transaccion(cambios)
+            with _bloqueo_cache:
+                olvidar_particiones()
+                for archivo, estructura in unidos.items():
+                    _cache_lectura[("particiones", archivo)] = (_firma_particiones(archivo), estructura)
+            _olvidar_agregados_anteriores()
+            return _adoptar_datos(actuales, datos)
+
+        # Los archivos que la sesión tiene al día se guardan tal como están
+        actuales = _leer_actuales(archivos - vigentes)
+        if "pedidos" in actuales:
+            _verificar_pedidos_nuevos(eventos, _existentes_en(actuales["pedidos"]))
+        for archivo, estructura in actuales.items():
+            ARCHIVOS_DATOS[archivo][3](estructura, diario.eventos_de(eventos, archivo))
+        if "datos" in archivos:
+            _verificar_stock(actuales.get("datos", datos), eventos)
+
+        # Los archivos de la operación y los meses de agregados que toca se
+        # reemplazan juntos en una transacción
+        cambios = {
+            ARCHIVOS_DATOS[archivo][0]: actuales.get(archivo, estructuras[archivo]) for archivo in archivos
+        }
+        cambios.update(_cambios_agregados(_deltas_agregados(eventos)))
+        confirmar_transaccion(cambios)
+        _olvidar_agregados_anteriores()
+        return _adoptar_datos(actuales, datos)
+
+# Agregados de ventas
+
+def _deltas_agregados(eventos):
+    """Los eventos "agregados" de una operación"""
+    return [datos_evento for datos_evento in eventos if datos_evento["tipo"] == "agregados"]
+
+def _ruta_agregados_mes(mes):
+    """Archivo con las ventas por día de un mes"""
+    return os.path.join(DIRECTORIO_AGREGADOS, f"ventas-{mes}.json")
+
+def _meses_agregados():
+    """Meses que tienen archivo de ventas"""
+    try:
+        nombres = os.listdir(DIRECTORIO_AGREGADOS)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        nombre[len("ventas-"):-len(".json")] for nombre in nombres
+        if nombre.startswith("ventas-") and nombre.endswith(".json")
+    )
+
+def _agregados_anteriores():
+    """Agregados del archivo único de versiones anteriores, o None si no está"""
+    try:
+        return _leer_json(RUTA_AGREGADOS_ANTERIOR)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _olvidar_agregados_anteriores():
+    """Borra el archivo único anterior cuando los agregados ya se guardan de la forma nueva"""
+    if os.path.exists(RUTA_AGREGADOS_ANTERIOR) and (usar_sqlite() or os.path.exists(RUTA_ESTADOS_AGREGADOS)):
+        os.remove(RUTA_AGREGADOS_ANTERIOR)
+
+def _agregados_guardados(meses=None):
+    """Lee los archivos de agregados (solo las ventas de esos meses), sin el diario
+
+    Devuelve (agregados, meses): si todavía no están repartidos por mes se
+    devuelve el archivo único anterior con meses None, porque al guardarlos
+    hay que escribir todos. Si no hay ninguno, o alguno está dañado, None.
+    """
+    try:
+        leidos = {
+            "ventas_por_dia": {},
+            "pedidos_por_estado": _leer_json(RUTA_ESTADOS_AGREGADOS)["pedidos_por_estado"],
+        }
+        for mes in _meses_agregados() if meses is None else meses:
+            ventas_mes = _leer_json_si_existe(_ruta_agregados_mes(mes), {"ventas_por_dia": {}})
+            leidos["ventas_por_dia"].update(ventas_mes["ventas_por_dia"])
+        return leidos, meses
+    except FileNotFoundError:
+        anteriores = _agregados_anteriores()
+        return (anteriores, None) if anteriores is not None else None
+    except json.JSONDecodeError:
+        return None
+
+def _archivos_agregados(datos_agregados, meses=None):
+    """Archivos {ruta: datos} con los pedidos por estado y las ventas de esos meses
+
+    Con meses None se escriben todos, y los meses que ya no tienen ventas
+    quedan vacíos.
+    """
+    por_mes = agregados.dividir_por_mes(datos_agregados)
+    if meses is None:
+        meses = set(por_mes) | set(_meses_agregados())
+    cambios = {_ruta_agregados_mes(mes): por_mes.get(mes, {"ventas_por_dia": {}}) for mes in meses}
+    cambios[RUTA_ESTADOS_AGREGADOS] = {"pedidos_por_estado": datos_agregados["pedidos_por_estado"]}
+    return cambios
+
+def _cambios_agregados(deltas, ya_en_disco=False):
+    """Archivos de agregados que cambian con esos deltas, leyendo solo sus meses
+
+    Se llama con el bloqueo tomado y lo devuelto se escribe en la misma
+    transacción que los pedidos. Si los agregados todavía no están
+    repartidos por mes se parte del archivo único anterior, y si no hay
+    ninguno (o alguno está dañado) se calculan desde cero con los pedidos en
+    disco; en esos casos se escriben todos los meses. ya_en_disco indica que
+    los pedidos en disco ya incluyen los deltas (los del diario), así que el
+    cálculo desde cero no los vuelve a sumar.
+    """
+    if not deltas:
+        return {}
+    meses = {agregados.mes_de_dia(datos_evento["dia"]) for datos_evento in deltas if datos_evento["ventas"]}
+    guardados = _agregados_guardados(meses)
+    if guardados is None:
+        datos_agregados, meses = _calcular_agregados(), None
+        if not ya_en_disco:
+            agregados.aplicar(datos_agregados, deltas)
+    else:
+        datos_agregados, meses = guardados
+        agregados.aplicar(datos_agregados, deltas)
+    return _archivos_agregados(datos_agregados, meses)
+
+def _calcular_agregados():
+    """Calcula los agregados desde cero con los pedidos que hay en disco
+
+    Los pedidos archivados también cuentan: siguen siendo ventas.
+    """
+    actuales = _leer_actuales({"pedidos", "detalles"})
+    return agregados.calcular(*unir_archivados(actuales["pedidos"], actuales["detalles"]))
+
+def _leer_agregados(mes=None):
+    """Agregados guardados con, si el diario está activo, sus deltas pendientes
+
+    Con mes ("AAAA-MM") solo se leen las ventas de ese mes. Devuelve None si
+    todavía no hay agregados guardados (o están dañados).
+    """
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        if not almacenamiento_sqlite.agregados_iniciados():
+            return None
+        return almacenamiento_sqlite.cargar_agregados(mes)
+
+    guardados = _agregados_guardados(None if mes is None else [mes])
+    if guardados is None:
+        return None
+    datos_agregados = guardados[0]
+    if usar_diario():
+        agregados.aplicar(datos_agregados, diario.leer_eventos("agregados"))
+    return agregados.del_mes(datos_agregados, mes) if mes is not None else datos_agregados
+
+def _guardar_agregados(datos_agregados):
+    """Reemplaza todos los agregados guardados (con el bloqueo tomado)"""
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        almacenamiento_sqlite.guardar_agregados(datos_agregados)
+    else:
+        cambios = _archivos_agregados(datos_agregados)
+        if usar_diario():
+            # Los calculados ya incluyen los deltas pendientes del diario
+            cambios[diario.RUTA_ESTADO_DIARIO] = diario.estado_aplicado("agregados")
+        confirmar_transaccion(cambios)
+    _olvidar_agregados_anteriores()
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def cargar_agregados(mes=None):
+    """Devuelve los agregados de ventas; si no existen se calculan y se guardan
+
+    Con mes ("AAAA-MM") solo se leen las ventas de ese mes (los pedidos por
+    estado siempre están completos). Mientras los archivos no cambien se
+    devuelve la misma estructura sin volver a leerlos, así consultar las
+    ventas del día no depende del historial.
+    """
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        firma = (_firma_archivo(almacenamiento_sqlite.RUTA_BASE_DATOS),)
+    else:
+        rutas = [RUTA_ESTADOS_AGREGADOS, RUTA_AGREGADOS_ANTERIOR] + [
+            _ruta_agregados_mes(mes_leido) for mes_leido in (_meses_agregados() if mes is None else [mes])
+        ]
+        if usar_diario():
+            rutas += [diario.RUTA_DIARIO, diario.RUTA_ESTADO_DIARIO]
+        firma = tuple(_firma_archivo(ruta_archivo) for ruta_archivo in rutas)
+    with _bloqueo_cache:
+        entrada = _cache_agregados.get(mes)
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+
+    datos_agregados = _leer_agregados(mes)
+    if datos_agregados is None:
+        datos_agregados = reconstruir_agregados()[0]
+        return agregados.del_mes(datos_agregados, mes) if mes is not None else datos_agregados
+    with _bloqueo_cache:
+        _cache_agregados[mes] = (firma, datos_agregados)
+    return datos_agregados
+
+def reconstruir_agregados(guardar=True):
+    """Recalcula los agregados desde cero y los compara con los guardados
+
+    Devuelve (agregados calculados, lista de diferencias con los guardados).
+    Con guardar=True los guardados se reemplazan por los calculados.
+    """
+    with bloqueo_datos():
+        _revisar_recuperacion()
+        calculados = _calcular_agregados()
+        guardados = _leer_agregados()
+        if guardados is None:
+            diferencias = ["No hay agregados guardados (o están dañados)"]
+        else:
+            diferencias = agregados.comparar(calculados, guardados)
+        if guardar:
+            _guardar_agregados(calculados)
+    return calculados, diferencias
+
+def compactar_diario():
+    """Incorpora los eventos del diario a los archivos JSON y lo vacía
+
+    Devuelve la cantidad de eventos que se compactaron.
+    """
+    with bloqueo_datos():
+        return _compactar_diario()
+
+def _compactar_diario():
+    """Pasos de compactar_diario(), con el bloqueo ya tomado"""
+    estado = diario.cargar_estado()
+    pendientes = estado["secuencia"] - min(estado["aplicado"].values())
+
+    # Cargamos con los eventos aplicados y reescribimos cada snapshot
+    datos = _leer_registros("datos", RUTA_DATOS, {"productos": [], "pedidos": []})
+    diario.aplicar_a_datos(datos, diario.leer_eventos("datos"))
+    datos_pedidos = _leer_registros("pedidos", RUTA_PEDIDOS, {"pedidos": []})
+    diario.aplicar_a_pedidos(datos_pedidos, diario.leer_eventos("pedidos"))
+    datos_detalles = _leer_registros("detalles", RUTA_DETALLES_PEDIDOS, {"detalles_pedidos": []})
+    diario.aplicar_a_detalles(datos_detalles, diario.leer_eventos("detalles"))
+
+    cambios = {
+        RUTA_DETALLES_PEDIDOS: datos_detalles,
+        RUTA_PEDIDOS: datos_pedidos,
+        RUTA_DATOS: datos,
+        diario.RUTA_ESTADO_DIARIO: diario.estado_aplicado("datos", "pedidos", "detalles", "agregados"),
+    }
+    # Los deltas de agregados pendientes pasan a los meses que tocan
+    cambios.update(_cambios_agregados(diario.leer_eventos("agregados"), ya_en_disco=True))
+    confirmar_transaccion(cambios)
+    _olvidar_agregados_anteriores()
+
+    diario.vaciar_si_compactado()
+    return pendientes
+
+# Pedidos en archivos mensuales
+
+def _cargar_manifiesto():
+    """Lee el manifiesto de los archivos mensuales (vacío si todavía no hay)"""
+    return _leer_json_si_existe(particiones.RUTA_MANIFIESTO, particiones.manifiesto_vacio())
+
+def _leer_particion(archivo, mes):
+    """Lee el archivo de un mes usando la caché de lectura"""
+    try:
+        return _leer_en_cache(archivo, particiones.ruta_particion(archivo, mes))
+    except FileNotFoundError:
+        return particiones.estructura_vacia(archivo)
+
+def meses_de_pedido(codigo_pedido):
+    """Meses en los que puede estar guardado un pedido, según el manifiesto"""
+    _revisar_recuperacion()
+    return particiones.meses_de_codigo(_cargar_manifiesto(), codigo_pedido)
+
+def cantidad_pedidos_mensuales():
+    """Cantidad de pedidos guardados en los archivos mensuales, según el manifiesto"""
+    _revisar_recuperacion()
+    return sum(entrada["pedidos"] for entrada in _cargar_manifiesto()["meses"].values())
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def cargar_mes(mes):
+    """Carga los pedidos y los detalles de un solo mes: (datos_pedidos, datos_detalles)
+
+    Se leen con la caché; un mes que todavía no tiene archivos devuelve las
+    estructuras vacías.
+    """
+    _revisar_recuperacion()
+    return _leer_particion("pedidos", mes), _leer_particion("detalles", mes)
+
+def _cargar_particiones(archivo):
+    """Une los archivos mensuales de pedidos o de detalles en una sola estructura
+
+    Cada mes se lee con la caché, así solo se vuelven a leer los meses que
+    cambiaron (normalmente el actual). Si no cambió ninguno se devuelve la
+    misma estructura unida de la vez anterior.
+    """
+    firma = _firma_particiones(archivo)
+    clave_cache = ("particiones", archivo)
+    with _bloqueo_cache:
+        entrada = _cache_lectura.get(clave_cache)
+        if entrada is not None and entrada[0] == firma:
+            _contadores_cache["aciertos"] += 1
+            return entrada[1]
+
+    unidos = particiones.estructura_vacia(archivo)
+    lista = unidos["pedidos" if archivo == "pedidos" else "detalles_pedidos"]
+    for mes, _ in firma:
+        lista.extend(_leer_particion(archivo, mes)["pedidos" if archivo == "pedidos" else "detalles_pedidos"])
+    with _bloqueo_cache:
+        _cache_lectura[clave_cache] = (firma, unidos)
+    return unidos
+
+def _firma_particiones(archivo):
+    """Firma de la unión de los meses: (mes, firma del archivo) de cada mes del manifiesto"""
+    return tuple(
+        (mes, _firma_archivo(particiones.ruta_particion(archivo, mes)))
+        for mes in particiones.meses_ordenados(_cargar_manifiesto())
+    )
+
+def _unidos_vigentes(archivos, estructuras):
+    """Uniones de meses en caché que seguirán al día después de guardar
+
+    Como en _conservar_en_cache(): si nadie escribió ningún mes desde que se
+    armó la unión, la de la sesión (que ya tiene los eventos) o la de un
+    archivo que la operación no toca es justo lo que queda en disco.
+    Devuelve {archivo: unión}.
+    """
+    unidos = {}
+    for archivo in ("pedidos", "detalles"):
+        with _bloqueo_cache:
+            entrada = _cache_lectura.get(("particiones", archivo))
+        if entrada is not None and entrada[0] == _firma_particiones(archivo) and (
+                entrada[1] is estructuras[archivo] or archivo not in archivos):
+            unidos[archivo] = entrada[1]
+    return unidos
+
+def _leer_particiones_actuales(archivo):
+    """Une los archivos mensuales leídos de disco, sin la caché"""
+    unidos = particiones.estructura_vacia(archivo)
+    clave = "pedidos" if archivo == "pedidos" else "detalles_pedidos"
+    for mes in particiones.meses_ordenados(_cargar_manifiesto()):
+        ruta_archivo = particiones.ruta_particion(archivo, mes)
+        unidos[clave].extend(_leer_registros(archivo, ruta_archivo, particiones.estructura_vacia(archivo))[clave])
+    return unidos
+
+def olvidar_particiones():
+    """Descarta la unión de los meses en caché, para que se vuelva a armar
+
+    Se llama después de escribir (los meses escritos ya quedaron en la
+    caché) y cuando una sesión que cambió en memoria los pedidos de un mes
+    necesita todos: la unión anterior no tiene esos cambios.
+    """
+    with _bloqueo_cache:
+        _cache_lectura.pop(("particiones", "pedidos"), None)
+        _cache_lectura.pop(("particiones", "detalles"), None)
+
+def _mes_de_pedido(manifiesto, codigo_pedido):
+    """Mes en el que está guardado un pedido, o None si no está en ninguno"""
+    meses = particiones.meses_de_codigo(manifiesto, codigo_pedido)
+    if len(meses) == 1:
+        return meses[0]
+    # Los rangos de varios meses se superponen: se busca en cada uno
+    for mes in meses:
+        if any(pedido["codigo_pedido"] == codigo_pedido
+               for pedido in _leer_particion("pedidos", mes)["pedidos"]):
+            return mes
+    return None
+
+def _existentes_en_meses(codigos):
+    """Cuáles de los códigos tienen pedido en los archivos mensuales
+
+    Solo se abren los meses cuyo rango de códigos incluye a alguno, y se leen
+    de disco sin la caché (que puede tener cambios aún no guardados).
+    """
+    manifiesto = _cargar_manifiesto()
+    codigos_por_mes = {}
+    existentes = set()
+    for codigo_pedido in codigos:
+        for mes in particiones.meses_de_codigo(manifiesto, codigo_pedido):
+            if mes not in codigos_por_mes:
+                ruta_archivo = particiones.ruta_particion("pedidos", mes)
+                leidos = _leer_registros("pedidos", ruta_archivo, particiones.estructura_vacia("pedidos"))
+                codigos_por_mes[mes] = {pedido["codigo_pedido"] for pedido in leidos["pedidos"]}
+            if codigo_pedido in codigos_por_mes[mes]:
+                existentes.add(codigo_pedido)
+                break
+    return existentes
+
+def _cambios_particiones(eventos, meses=None):
+    """Aplica los eventos de pedidos a los meses que afectan
+
+    Cada evento se aplica al mes de su pedido: el de su fecha para los
+    pedidos nuevos y, para los demás, el que indica el manifiesto. Los
+    archivos de meses que la sesión cargó (meses) y que siguen siendo los de
+    la caché sin que nadie los haya escrito ya tienen los eventos y se
+    guardan tal cual; los demás se leen de disco. Devuelve {ruta_archivo:
+    datos} con los archivos mensuales modificados y el manifiesto.
+    """
+    manifiesto = _cargar_manifiesto()
+    eventos_por_mes = {}
+    meses_nuevos = {}
+    for datos_evento in eventos:
+        if not set(diario.ARCHIVOS_POR_EVENTO[datos_evento["tipo"]]) & {"pedidos", "detalles"}:
+            continue
+        codigo_pedido = diario.codigo_pedido_de(datos_evento)
+        if datos_evento["tipo"] == "crear_pedido":
+            mes = meses_nuevos[codigo_pedido] = particiones.mes_de(datos_evento["pedido"]["fecha_pedido"])
+        else:
+            mes = meses_nuevos.get(codigo_pedido) or _mes_de_pedido(manifiesto, codigo_pedido)
+        if mes is not None:
+            eventos_por_mes.setdefault(mes, []).append(datos_evento)
+    if not eventos_por_mes:
+        return {}
+
+    cambios = {}
+    for mes, eventos_mes in eventos_por_mes.items():
+        modificados = {}
+        de_la_sesion = dict(zip(("pedidos", "detalles"), (meses or {}).get(mes, (None, None))))
+        for archivo in ("pedidos", "detalles"):
+            eventos_archivo = diario.eventos_de(eventos_mes, archivo)
+            if not eventos_archivo:
+                continue
+            ruta_archivo = particiones.ruta_particion(archivo, mes)
+            if _vigente_en_cache(ruta_archivo, de_la_sesion[archivo]):
+                modificados[archivo] = cambios[ruta_archivo] = de_la_sesion[archivo]
+                continue
+            estructura = _leer_registros(archivo, ruta_archivo, particiones.estructura_vacia(archivo))
+            modificados[archivo] = cambios[ruta_archivo] = ARCHIVOS_DATOS[archivo][3](estructura, eventos_archivo)
+        particiones.actualizar_manifiesto(manifiesto, mes, modificados.get("pedidos"), modificados.get("detalles"))
+    cambios[particiones.RUTA_MANIFIESTO] = manifiesto
+    return cambios
+
+def _guardar_particiones(datos_pedidos=None, datos_detalles=None):
+    """Reescribe todos los archivos mensuales a partir de estructuras completas
+
+    El que no se indique se lee de disco. Los meses que quedan sin pedidos se
+    vacían. Todo se escribe en una sola transacción junto con el manifiesto.
+    """
+    with bloqueo_datos():
+        if datos_pedidos is None:
+            datos_pedidos = _leer_particiones_actuales("pedidos")
+        if datos_detalles is None:
+            datos_detalles = _leer_particiones_actuales("detalles")
+
+        anterior = _cargar_manifiesto()
+        manifiesto = particiones.manifiesto_vacio()
+        cambios = {}
+        for mes, (pedidos_mes, detalles_mes) in particiones.dividir(datos_pedidos, datos_detalles).items():
+            particiones.actualizar_manifiesto(manifiesto, mes, pedidos_mes, detalles_mes)
+            cambios[particiones.ruta_particion("pedidos", mes)] = pedidos_mes
+            cambios[particiones.ruta_particion("detalles", mes)] = detalles_mes
+        for mes in anterior["meses"]:
+            if mes not in manifiesto["meses"]:
+                cambios[particiones.ruta_particion("pedidos", mes)] = particiones.estructura_vacia("pedidos")
+                cambios[particiones.ruta_particion("detalles", mes)] = particiones.estructura_vacia("detalles")
+        cambios[particiones.RUTA_MANIFIESTO] = manifiesto
+        confirmar_transaccion(cambios)
+        olvidar_particiones()
+    return manifiesto
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def cargar_pedidos_entre(desde, hasta):
+    """Pedidos con fecha_pedido en [desde, hasta), ordenados por fecha
+
+    Con archivos mensuales solo se abren los meses que se superponen con el
+    rango; con los otros motores se usan los índices de todos los pedidos.
+    """
+    if not usar_particiones():
+        from modulos.indices_pedidos import obtener_indices_pedidos
+        return obtener_indices_pedidos(cargar_pedidos()).entre_fechas(desde, hasta)
+
+    from modulos.indices_pedidos import convertir_fecha
+
+    _revisar_recuperacion()
+    encontrados = []
+    for mes in particiones.meses_entre(_cargar_manifiesto(), desde, hasta):
+        for pedido in _leer_particion("pedidos", mes)["pedidos"]:
+            fecha = convertir_fecha(pedido["fecha_pedido"])
+            if fecha is not None and desde <= fecha < hasta:
+                encontrados.append((fecha, pedido["codigo_pedido"], pedido))
+    encontrados.sort(key=lambda encontrado: encontrado[:2])
+    return [pedido for _, _, pedido in encontrados]
+
+def particionar_pedidos():
+    """Reparte pedidos.json y detalles_pedidos.json en archivos mensuales
+
+    Primero se compacta el diario, si tiene eventos. Los archivos originales
+    no se modifican. Devuelve un resumen con lo que se repartió.
+    """
+    with bloqueo_datos():
+        _revisar_recuperacion()
+        if diario.hay_eventos_pendientes():
+            _compactar_diario()
+        datos_pedidos = _leer_registros("pedidos", RUTA_PEDIDOS, {"pedidos": []})
+        datos_detalles = _leer_registros("detalles", RUTA_DETALLES_PEDIDOS, {"detalles_pedidos": []})
+        manifiesto = _guardar_particiones(datos_pedidos, datos_detalles)
+    return {
+        "meses": particiones.meses_ordenados(manifiesto),
+        "pedidos": len(datos_pedidos["pedidos"]),
+        "lineas": sum(len(bloque["detalles"]) for bloque in datos_detalles["detalles_pedidos"]),
+    }
+
+# Archivo de pedidos entregados
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def cargar_indice_archivo():
+    """Devuelve el índice del archivo de pedidos (vacío si no hay nada archivado)"""
+    global _cache_indice_archivo
+    firma = _firma_archivo(archivo_pedidos.RUTA_INDICE_ARCHIVO)
+    if firma is None:
+        return archivo_pedidos.indice_vacio()
+    entrada = _cache_indice_archivo
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+    indice = _leer_json(archivo_pedidos.RUTA_INDICE_ARCHIVO)
+    _cache_indice_archivo = (firma, indice)
+    return indice
+
+def buscar_pedidos_archivados(texto):
+    """Pedidos archivados cuyo código o cliente contiene el texto (solo lee el índice)"""
+    return archivo_pedidos.buscar(cargar_indice_archivo(), texto)
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def obtener_detalle_archivado(codigo_pedido):
+    """Bloque de detalles de un pedido archivado, o None si no está archivado
+
+    El índice indica el segmento del pedido y solo se descomprime ese.
+    """
+    global _cache_segmento
+    nombre = archivo_pedidos.segmento_de(cargar_indice_archivo(), codigo_pedido)
+    if nombre is None:
+        return None
+    # Los segmentos no cambian una vez escritos: basta recordar el último
+    segmento = _cache_segmento
+    if segmento is None or segmento[0] != nombre:
+        segmento = _cache_segmento = (nombre, archivo_pedidos.leer_segmento(nombre)["detalles_pedidos"])
+    for detalle_pedido in segmento[1]:
+        if detalle_pedido["codigo_pedido"] == codigo_pedido:
+            return convertir_detalle_pedido(dict(detalle_pedido))
+    return None
+
+@metricas.medido(metricas.CATEGORIA_ARCHIVOS)
+def cargar_archivados():
+    """Devuelve (datos_pedidos, datos_detalles) con todos los pedidos archivados
+
+    Descomprime todos los segmentos; lo usan los reportes y el recálculo de
+    los agregados, no las operaciones del día a día.
+    """
+    global _cache_archivados
+    firma = _firma_archivo(archivo_pedidos.RUTA_INDICE_ARCHIVO)
+    entrada = _cache_archivados
+    if entrada is not None and entrada[0] == firma:
+        return entrada[1]
+    datos_pedidos = {"pedidos": []}
+    datos_detalles = {"detalles_pedidos": []}
+    for segmento in cargar_indice_archivo()["segmentos"]:
+        contenido = archivo_pedidos.leer_segmento(segmento["archivo"])
+        datos_pedidos["pedidos"].extend(contenido["pedidos"])
+        datos_detalles["detalles_pedidos"].extend(contenido["detalles_pedidos"])
+    archivados = (convertir_pedidos(datos_pedidos), convertir_detalles(datos_detalles))
+    _cache_archivados = (firma, archivados)
+    return archivados
+
+def unir_archivados(datos_pedidos, datos_detalles):
+    """Pedidos y detalles actuales junto con los archivados
+
+    Un pedido que está en los dos lugares (un archivado interrumpido antes de
+    quitarlo de los archivos de pedidos) se toma una sola vez.
+    """
+    archivados_pedidos, archivados_detalles = cargar_archivados()
+    if not archivados_pedidos["pedidos"]:
+        return datos_pedidos, datos_detalles
+    codigos = {pedido["codigo_pedido"] for pedido in datos_pedidos["pedidos"]}
+    return (
+        {"pedidos": datos_pedidos["pedidos"] + [
+            pedido for pedido in archivados_pedidos["pedidos"] if pedido["codigo_pedido"] not in codigos
+        ]},
+        {"detalles_pedidos": datos_detalles["detalles_pedidos"] + [
+            bloque for bloque in archivados_detalles["detalles_pedidos"] if bloque["codigo_pedido"] not in codigos
+        ]},
+    )
+
+def _quitar_pedidos(archivados, datos_pedidos, datos_detalles):
+    """Quita los pedidos archivados con el motor configurado (bloqueo tomado)
+
+    datos_pedidos y datos_detalles son los que se conservan: con archivos
+    JSON se reescriben completos; en SQLite solo se borran las filas de los
+    pedidos archivados.
+    """
+    if usar_sqlite():
+        from modulos import almacenamiento_sqlite
+        almacenamiento_sqlite.aplicar_eventos([
+            diario.evento("eliminar_pedido", codigo_pedido=pedido["codigo_pedido"])
+            for pedido in archivados["pedidos"]
+        ])
+    elif usar_particiones():
+        _guardar_particiones(datos_pedidos, datos_detalles)
+    else:
+        confirmar_transaccion({RUTA_PEDIDOS: datos_pedidos, RUTA_DETALLES_PEDIDOS: datos_detalles})
+
+def archivar_pedidos(dias=None, compresion=None, hoy=None):
+    """Pasa al archivo los pedidos entregados con más de `dias` días
+
+    Los pedidos y sus detalles se escriben en segmentos comprimidos nuevos,
+    se anotan en el índice y recién entonces se quitan de los archivos de
+    pedidos: si se interrumpe en medio quedan en los dos lugares, nunca en
+    ninguno. Con el diario activo primero se compacta. Devuelve un resumen
+    con los segmentos creados (ninguno si no había nada que archivar).
+    """
+    dias = obtener_opcion("dias_para_archivar") if dias is None else dias
+    compresion = compresion or obtener_opcion("compresion_archivo")
+    limite = (hoy or datetime.now()) - timedelta(days=dias)
+
+    with bloqueo_datos():
+        _revisar_recuperacion()
+        if usar_diario() and diario.hay_eventos_pendientes():
+            _compactar_diario()
+        actuales = _leer_actuales({"pedidos", "detalles"})
+        (pedidos, detalles), conservados = archivo_pedidos.seleccionar(
+            actuales["pedidos"], actuales["detalles"], limite
+        )
+        resumen = {
+            "segmentos": [],
+            "pedidos": len(pedidos["pedidos"]),
+            "lineas": sum(len(bloque["detalles"]) for bloque in detalles["detalles_pedidos"]),
+            "conservados": len(conservados[0]["pedidos"]),
+        }
+        if not pedidos["pedidos"]:
+            return resumen
+
+        indice = _leer_json_si_existe(archivo_pedidos.RUTA_INDICE_ARCHIVO, archivo_pedidos.indice_vacio())
+        for pedidos_segmento, detalles_segmento in archivo_pedidos.dividir_en_segmentos(pedidos, detalles):
+            nombre = archivo_pedidos.nombre_siguiente_segmento(indice, compresion)
+            ruta_segmento = archivo_pedidos.ruta_segmento(nombre)
+            archivo_pedidos.escribir_segmento(
+                ruta_segmento + SUFIJO_TEMPORAL,
+                {"pedidos": pedidos_segmento["pedidos"], "detalles_pedidos": detalles_segmento["detalles_pedidos"]},
+                compresion, default=a_json,
+            )
+            os.replace(ruta_segmento + SUFIJO_TEMPORAL, ruta_segmento)
+            archivo_pedidos.agregar_al_indice(indice, nombre, pedidos_segmento, detalles_segmento)
+            resumen["segmentos"].append(nombre)
+        _sincronizar_directorio(archivo_pedidos.DIRECTORIO_ARCHIVO)
+        _escribir_json(archivo_pedidos.RUTA_INDICE_ARCHIVO, indice, sangria=None)
+
+        _quitar_pedidos(pedidos, *conservados)
+    return resumen
+
+def migrar_json_a_sqlite():
+    """Copia los archivos JSON actuales a la base de datos SQLite
+
+    Se lee directamente de los archivos, sin importar el motor configurado.
+    Devuelve un resumen con la cantidad de registros migrados.
+    """
+    from modulos import almacenamiento_sqlite
+
+    datos = _leer_json_si_existe(RUTA_DATOS, {"productos": [], "pedidos": []})
+    datos_pedidos = _leer_json_si_existe(RUTA_PEDIDOS, {"pedidos": []})
+    datos_detalles = _leer_json_si_existe(RUTA_DETALLES_PEDIDOS, {"detalles_pedidos": []})
+
+    return almacenamiento_sqlite.migrar_desde_json(datos, datos_pedidos, datos_detalles)
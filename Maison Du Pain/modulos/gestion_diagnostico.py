@@ -0,0 +1,86 @@
+"""
+Módulo de diagnóstico
+Muestra las métricas de rendimiento (modulos/metricas.py) y la caché de lectura
+"""
+from rich.console import Console
+from rich.table import Table
+
+from modulos import metricas
+from modulos.gestion_archivos import estadisticas_cache
+
+# Instancia de consola para la visualización
+console = Console()
+
+def _milisegundos(segundos):
+    return f"{segundos * 1000:,.1f}"
+
+def _bytes(cantidad):
+    """Formatea una cantidad de bytes (B, KB, MB o GB)"""
+    for unidad in ("B", "KB", "MB"):
+        if cantidad < 1024:
+            return f"{cantidad:,.0f} {unidad}" if unidad == "B" else f"{cantidad:,.1f} {unidad}"
+        cantidad /= 1024
+    return f"{cantidad:,.1f} GB"
+
+def mostrar_metricas(filas, titulo):
+    """Muestra una tabla con el resumen de métricas (metricas.resumen())"""
+    if not filas:
+        console.print("\n[bold yellow]⚠ Todavía no hay operaciones medidas[/bold yellow]")
+        return
+
+    tabla = Table(title=titulo)
+    tabla.add_column("Operación", style="cyan")
+    tabla.add_column("Llamadas", justify="right")
+    for porcentaje in metricas.PERCENTILES:
+        tabla.add_column(f"p{porcentaje} ms", justify="right")
+    tabla.add_column("Máx. ms", justify="right")
+    tabla.add_column("Total ms", justify="right", style="yellow")
+    tabla.add_column("En archivos", justify="right")
+    tabla.add_column("Leído", justify="right")
+    tabla.add_column("Escrito", justify="right")
+
+    for fila in filas:
+        # Las operaciones de menú muestran qué parte de su tiempo fue cargar y guardar
+        en_archivos = "—"
+        if not fila["operacion"].startswith(metricas.CATEGORIA_ARCHIVOS + ".") and fila["segundos"]:
+            en_archivos = f"{fila['segundos_archivos'] / fila['segundos']:.0%}"
+        tabla.add_row(
+            fila["operacion"],
+            str(fila["llamadas"]),
+            *(_milisegundos(fila[f"p{porcentaje}"]) for porcentaje in metricas.PERCENTILES),
+            _milisegundos(fila["maximo"]),
+            _milisegundos(fila["segundos"]),
+            en_archivos,
+            _bytes(fila["leidos"]),
+            _bytes(fila["escritos"]),
+        )
+    console.print(tabla)
+
+def mostrar_cache():
+    """Muestra los aciertos y fallos de la caché de lectura de pedidos"""
+    cache = estadisticas_cache()
+    tabla = Table(title="🗃️ Caché de lectura de pedidos")
+    tabla.add_column("Aciertos", justify="right")
+    tabla.add_column("Fallos", justify="right")
+    tabla.add_column("Tasa de aciertos", justify="right")
+    tabla.add_column("Entradas", justify="right")
+    tabla.add_row(
+        str(cache["aciertos"]), str(cache["fallos"]), f"{cache['tasa_aciertos']:.0%}", str(cache["entradas"])
+    )
+    console.print(tabla)
+
+def mostrar_diagnostico():
+    """Muestra las métricas de esta sesión y el estado de la caché"""
+    console.print("\n[bold cyan]=== DIAGNÓSTICO ===[/bold cyan]")
+    if metricas.activas():
+        mostrar_metricas(metricas.resumen(), "🩺 Operaciones de esta sesión")
+        console.print(
+            "Tiempos sin contar la espera del usuario; percentiles de las últimas "
+            f"{metricas.VENTANA} llamadas. Registro: {metricas.RUTA_METRICAS}"
+        )
+    else:
+        console.print(
+            "\n[bold yellow]⚠ Las métricas están desactivadas: active la opción \"metricas\" "
+            "en datos/configuracion.json o use MAISON_METRICAS=1[/bold yellow]"
+        )
+    mostrar_cache()
@@ -4,12 +4,31 @@ Maneja operaciones CRUD para pedidos de la panadería
 """
 from rich.console import Console
 from rich.table import Table
-from datetime import datetime
-from modulos.gestion_archivos import cargar_pedidos, cargar_detalles_pedidos, guardar_pedidos, guardar_detalles_pedidos, cargar_datos, guardar_datos
+from datetime import datetime, timedelta
+from modulos.gestion_archivos import (
+    buscar_pedidos_archivados, cargar_indice_archivo, cargar_pedidos, obtener_detalle_archivado,
+    obtener_detalle_pedido
+)
+from modulos.gestion_productos import ORDENES_PRODUCTOS
+from modulos.indices_pedidos import obtener_indices_pedidos
+from modulos import servicios
+from modulos.metricas import medido
+from modulos.paginacion import Paginador, AYUDA_NAVEGACION
+from modulos.secuencias import clave_orden_codigo
+from modulos.servicios import Sesion, ErrorServicio
 
 # Instancia de consola para la visualización
 console = Console()
 
+# Claves por las que se puede ordenar el listado de pedidos
+ORDENES_PEDIDOS = [
+    ("Código", lambda pedido: clave_orden_codigo(pedido["codigo_pedido"])),
+    ("Cliente", lambda pedido: pedido["codigo_cliente"]),
+    ("Fecha", lambda pedido: pedido["fecha_pedido"]),
+    ("Estado", lambda pedido: pedido["estado"]),
+    ("Total", lambda pedido: pedido["total"]),
+]
+
 def mostrar_menu_pedidos():
     """Muestra el menú de gestión de pedidos"""
     console.print("\n[bold cyan]=== GESTIÓN DE PEDIDOS ===[/bold cyan]")
@@ -18,186 +37,149 @@ def mostrar_menu_pedidos():
     console.print("3️⃣ Buscar Pedido")
     console.print("4️⃣ Editar Pedido")
     console.print("5️⃣ Eliminar Pedido")
-    console.print("6️⃣ 🔙 Volver al Menú Principal")
+    console.print("6️⃣ Consultar Pedidos (cliente, estado, fecha)")
+    console.print("7️⃣ 🔙 Volver al Menú Principal")
     return input("\n⚡ Seleccione una opción: ")
 
-def generar_codigo_pedido(datos):
-    """Genera un código único para el pedido"""
-    # Buscamos el último número usado
-    ultimo_numero = 0
-    for pedido in datos["pedidos"]:
-        numero = int(pedido["codigo_pedido"].split("-")[1])
-        if numero > ultimo_numero:
-            ultimo_numero = numero
-    
-    # Generamos el nuevo código
-    nuevo_numero = ultimo_numero + 1
-    return f"PED-{nuevo_numero:03d}"
-
+@medido("pedidos")
 def crear_pedido(datos_productos):
     """Crea un nuevo pedido"""
     console.print("\n[bold green]=== CREAR PEDIDO ===[/bold green]")
     
-    # Cargamos los datos actuales
-    datos_pedidos = cargar_pedidos()
-    datos_detalles = cargar_detalles_pedidos()
+    sesion = Sesion(datos_productos)
     
     # Pedimos los datos del cliente
     codigo_cliente = input("Código del cliente: ")
     
-    # Creamos el pedido
-    pedido = {
-        "codigo_pedido": generar_codigo_pedido(datos_pedidos),
-        "codigo_cliente": codigo_cliente,
-        "fecha_pedido": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "estado": "pendiente",
-        "total": 0.0
-    }
-    
-    # Creamos los detalles del pedido
-    detalles_pedido = {
-        "codigo_pedido": pedido["codigo_pedido"],
-        "detalles": []
-    }
+    # Líneas elegidas y cantidades apartadas por producto (todavía sin descontar)
+    lineas = []
+    reservas = {}
+    
+    # Catálogo paginado; la página elegida se mantiene entre producto y producto
+    columnas = [
+        ("Código", lambda p: p["codigo_producto"], {"style": "cyan", "justify": "center"}),
+        ("Nombre", lambda p: p["nombre"], {"style": "green", "justify": "center"}),
+        ("Stock", lambda p: str(p["cantidad_en_stock"] - reservas.get(p["codigo_producto"], 0)), {"justify": "center"}),
+        ("Precio ($)", lambda p: f"{p['precio_venta']:.2f}", {"justify": "center"}),
+    ]
+    paginador = Paginador(sesion.catalogo, columnas, "📦 Catálogo de Productos", ORDENES_PRODUCTOS)
     
     # Agregamos productos al pedido
     while True:
-        # Mostramos la lista de productos disponibles
+        # Mostramos la página actual de productos disponibles
         console.print("\n[bold cyan]=== PRODUCTOS DISPONIBLES ===[/bold cyan]")
-        tabla = Table(title="📦 Catálogo de Productos")
-        tabla.add_column("Código", style="cyan", justify="center")
-        tabla.add_column("Nombre", style="green", justify="center")
-        tabla.add_column("Stock", justify="center")
-        tabla.add_column("Precio ($)", justify="center")
+        paginador.mostrar()
         
-        for producto in datos_productos["productos"]:
-            tabla.add_row(
-                producto["codigo_producto"],
-                producto["nombre"],
-                str(producto["cantidad_en_stock"]),
-                f"{producto['precio_venta']:.2f}"
-            )
-        console.print(tabla)
-        
-        codigo_producto = input("\nCódigo del producto (o 'fin' para terminar): ")
+        mensaje = "\nCódigo del producto (o 'fin' para terminar): "
+        if paginador.total_paginas > 1:
+            mensaje = f"\n{AYUDA_NAVEGACION}{mensaje}"
+        codigo_producto = input(mensaje)
         if codigo_producto.lower() == 'fin':
             break
         
-        # Buscamos el producto
-        producto_encontrado = None
-        for producto in datos_productos["productos"]:
-            if producto["codigo_producto"].lower() == codigo_producto.lower():
-                producto_encontrado = producto
-                break
+        # Buscamos el producto en el índice del catálogo
+        producto_encontrado = sesion.catalogo.buscar(codigo_producto)
+        
+        # Si no es un código, puede ser un comando para cambiar de página
+        if not producto_encontrado and paginador.procesar_comando(codigo_producto):
+            continue
         
         if not producto_encontrado:
             console.print("\n[bold red]❌ Producto no encontrado. Por favor, use uno de los códigos mostrados en la tabla.[/bold red]")
             continue
         
-        # Pedimos la cantidad
+        # Pedimos la cantidad y la validamos contra el stock que queda
         cantidad = int(input("Cantidad: "))
-        if cantidad > producto_encontrado["cantidad_en_stock"]:
-            console.print("\n[bold red]❌ No hay suficiente stock[/bold red]")
+        codigo_stock = producto_encontrado["codigo_producto"]
+        try:
+            servicios.verificar_linea(sesion, codigo_stock, cantidad, reservas.get(codigo_stock, 0))
+        except ErrorServicio as error:
+            console.print(f"\n[bold red]❌ {error}[/bold red]")
             continue
         
-        # Calculamos el subtotal
-        subtotal = cantidad * producto_encontrado["precio_venta"]
-        
-        # Creamos el detalle
-        detalle = {
-            "numero_linea": len(detalles_pedido["detalles"]) + 1,
-            "codigo_producto": producto_encontrado["codigo_producto"],
-            "cantidad": cantidad,
-            "precio_unidad": producto_encontrado["precio_venta"],
-            "subtotal": subtotal
-        }
-        
-        # Actualizamos el stock
-        producto_encontrado["cantidad_en_stock"] -= cantidad
-        
-        # Agregamos el detalle al pedido
-        detalles_pedido["detalles"].append(detalle)
-        pedido["total"] += subtotal
-    
-    # Agregamos el pedido y sus detalles a las listas
-    datos_pedidos["pedidos"].append(pedido)
-    datos_detalles["detalles_pedidos"].append(detalles_pedido)
+        reservas[codigo_stock] = reservas.get(codigo_stock, 0) + cantidad
+        lineas.append((codigo_stock, cantidad))
     
-    # Guardamos los cambios
-    guardar_pedidos(datos_pedidos)
-    guardar_detalles_pedidos(datos_detalles)
-    guardar_datos(datos_productos)  # Guardamos también los cambios en el stock
+    # Creamos el pedido con sus líneas y guardamos (también los cambios en el stock)
+    try:
+        pedido = servicios.crear_pedido(sesion, codigo_cliente, lineas)
+        sesion.confirmar()
+    except ErrorServicio as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        return
     
-    console.print("\n[bold green]✅ Pedido creado exitosamente![/bold green]")
+    console.print(f"\n[bold green]✅ Pedido {pedido['codigo_pedido']} creado exitosamente![/bold green]")
 
+@medido("pedidos")
 def listar_pedidos():
     """Muestra todos los pedidos en una tabla"""
     datos_pedidos = cargar_pedidos()
-    datos_detalles = cargar_detalles_pedidos()
     
     if not datos_pedidos["pedidos"]:
         console.print("\n[bold yellow]⚠ No hay pedidos registrados[/bold yellow]")
         return
     
-    # Creamos la tabla
-    tabla = Table(title="📋 Lista de Pedidos")
-    tabla.add_column("Código", style="cyan", justify="center")
-    tabla.add_column("Cliente", style="green", justify="center")
-    tabla.add_column("Fecha", style="yellow", justify="center")
-    tabla.add_column("Estado", style="magenta", justify="center")
-    tabla.add_column("Total", justify="center")
-    
-    # Agregamos los pedidos a la tabla
-    for pedido in datos_pedidos["pedidos"]:
-        tabla.add_row(
-            pedido["codigo_pedido"],
-            pedido["codigo_cliente"],
-            pedido["fecha_pedido"],
-            pedido["estado"],
-            f"${pedido['total']:.2f}"
-        )
-    
     console.print("\n📋 --- PEDIDOS DE LA PANADERÍA ---")
-    console.print(tabla)
+    # Mostramos la lista por páginas
+    paginador_pedidos(datos_pedidos["pedidos"], "📋 Lista de Pedidos").navegar()
     
     # Preguntamos si quiere ver los detalles
     if input("\n¿Desea ver los detalles de algún pedido? (s/n): ").lower() == 's':
         codigo = input("Ingrese el código del pedido: ")
-        mostrar_detalles_pedido(codigo, datos_detalles)
+        mostrar_detalles_pedido(codigo)
 
-def mostrar_detalles_pedido(codigo_pedido, datos_detalles):
-    """Muestra los detalles de un pedido específico"""
-    for detalle_pedido in datos_detalles["detalles_pedidos"]:
-        if detalle_pedido["codigo_pedido"] == codigo_pedido:
-            # Creamos la tabla de detalles
-            tabla = Table(title=f"Detalles del Pedido {codigo_pedido}")
-            tabla.add_column("Línea", justify="center")
-            tabla.add_column("Producto", style="cyan", justify="center")
-            tabla.add_column("Cantidad", justify="center")
-            tabla.add_column("Precio Unit.", justify="center")
-            tabla.add_column("Subtotal", justify="center")
-            
-            # Agregamos los detalles a la tabla
-            for detalle in detalle_pedido["detalles"]:
-                tabla.add_row(
-                    str(detalle["numero_linea"]),
-                    detalle["codigo_producto"],
-                    str(detalle["cantidad"]),
-                    f"${detalle['precio_unidad']:.2f}",
-                    f"${detalle['subtotal']:.2f}"
-                )
-            
-            console.print(tabla)
-            return
+@medido("pedidos")
+def mostrar_detalles_pedido(codigo_pedido, sesion=None):
+    """Muestra los detalles de un pedido específico
+
+    Si se recibe una sesión se muestran los detalles que tiene en memoria;
+    si no, se lee solo ese pedido (según la opción "lectura_detalles" de la
+    configuración). Si no está entre los pedidos actuales se busca en el
+    archivo de pedidos entregados.
+    """
+    detalle_pedido = None
+    if sesion is None:
+        detalle_pedido = obtener_detalle_pedido(codigo_pedido)
+    else:
+        detalle_pedido = sesion.detalles_de(codigo_pedido)
+    titulo = f"Detalles del Pedido {codigo_pedido}"
+    if detalle_pedido is None:
+        detalle_pedido = obtener_detalle_archivado(codigo_pedido)
+        titulo += " (archivado)"
+    
+    if detalle_pedido is None:
+        console.print("\n[bold red]❌ Pedido no encontrado[/bold red]")
+        return
+    
+    # Creamos la tabla de detalles: "#" es la posición en el pedido y "Línea"
+    # el número de la línea, que no cambia al quitar otras (el del ticket)
+    tabla = Table(title=titulo)
+    tabla.add_column("#", justify="center", style="dim")
+    tabla.add_column("Línea", justify="center")
+    tabla.add_column("Producto", style="cyan", justify="center")
+    tabla.add_column("Cantidad", justify="center")
+    tabla.add_column("Precio Unit.", justify="center")
+    tabla.add_column("Subtotal", justify="center")
+    
+    # Agregamos los detalles a la tabla
+    for posicion, detalle in enumerate(detalle_pedido["detalles"], start=1):
+        tabla.add_row(
+            str(posicion),
+            str(detalle["numero_linea"]),
+            detalle["codigo_producto"],
+            str(detalle["cantidad"]),
+            f"${detalle['precio_unidad']:.2f}",
+            f"${detalle['subtotal']:.2f}"
+        )
     
-    console.print("\n[bold red]❌ Pedido no encontrado[/bold red]")
+    console.print(tabla)
 
+@medido("pedidos")
 def buscar_pedido():
     """Busca un pedido por código o código de cliente"""
     datos_pedidos = cargar_pedidos()
-    datos_detalles = cargar_detalles_pedidos()
     
-    if not datos_pedidos["pedidos"]:
+    if not datos_pedidos["pedidos"] and not cargar_indice_archivo()["pedidos"]:
         console.print("\n[bold yellow]⚠ No hay pedidos registrados[/bold yellow]")
         return
     
@@ -211,67 +193,119 @@ def buscar_pedido():
     tabla.add_column("Estado", style="magenta", justify="center")
     tabla.add_column("Total", justify="center")
     
-    encontrados = False
-    for pedido in datos_pedidos["pedidos"]:
-        if (busqueda in pedido["codigo_pedido"].lower() or 
-            busqueda in pedido["codigo_cliente"].lower()):
-            tabla.add_row(
-                pedido["codigo_pedido"],
-                pedido["codigo_cliente"],
-                pedido["fecha_pedido"],
-                pedido["estado"],
-                f"${pedido['total']:.2f}"
-            )
-            encontrados = True
-    
-    if encontrados:
+    # Consultamos el índice de texto de los pedidos (resultados por relevancia)
+    resultados = obtener_indices_pedidos(datos_pedidos).buscar_texto(busqueda)
+    # Después, los pedidos archivados que coinciden según el índice del archivo
+    encontrados = {pedido["codigo_pedido"] for pedido in resultados}
+    archivados = [
+        pedido for pedido in buscar_pedidos_archivados(busqueda)
+        if pedido["codigo_pedido"] not in encontrados
+    ]
+    for pedido in resultados:
+        tabla.add_row(
+            pedido["codigo_pedido"],
+            pedido["codigo_cliente"],
+            pedido["fecha_pedido"],
+            pedido["estado"],
+            f"${pedido['total']:.2f}"
+        )
+    for pedido in archivados:
+        tabla.add_row(
+            pedido["codigo_pedido"],
+            pedido["codigo_cliente"],
+            pedido["fecha_pedido"],
+            pedido["estado"] + " (archivado)",
+            f"${pedido['total']:.2f}"
+        )
+    
+    if resultados or archivados:
         console.print(tabla)
         if input("\n¿Desea ver los detalles de algún pedido? (s/n): ").lower() == 's':
             codigo = input("Ingrese el código del pedido: ")
-            mostrar_detalles_pedido(codigo, datos_detalles)
+            mostrar_detalles_pedido(codigo)
     else:
         console.print("\n[bold yellow]⚠ No se encontraron pedidos[/bold yellow]")
 
-def editar_pedido():
+def paginador_pedidos(pedidos, titulo):
+    """Crea la tabla paginada de pedidos"""
+    columnas = [
+        ("Código", lambda p: p["codigo_pedido"], {"style": "cyan", "justify": "center"}),
+        ("Cliente", lambda p: p["codigo_cliente"], {"style": "green", "justify": "center"}),
+        ("Fecha", lambda p: p["fecha_pedido"], {"style": "yellow", "justify": "center"}),
+        ("Estado", lambda p: p["estado"], {"style": "magenta", "justify": "center"}),
+        ("Total", lambda p: f"${p['total']:.2f}", {"justify": "center"}),
+    ]
+    return Paginador(pedidos, columnas, titulo, ORDENES_PEDIDOS)
+
+@medido("pedidos")
+def consultar_pedidos():
+    """Consultas rápidas de pedidos usando los índices por cliente, estado y fecha"""
+    console.print("\n[bold cyan]=== CONSULTAR PEDIDOS ===[/bold cyan]")
+    console.print("1. Pedidos de un cliente")
+    console.print("2. Pedidos pendientes")
+    console.print("3. Pedidos en proceso")
+    console.print("4. Pedidos de hoy")
+    console.print("5. Pedidos entre dos fechas")
+    
+    opcion = input("\n⚡ Seleccione una opción: ")
+    sesion = Sesion()
+    
+    if opcion == "1":
+        codigo_cliente = input("Ingrese el código del cliente: ").strip()
+        pedidos = servicios.pedidos_de_cliente(sesion, codigo_cliente)
+        titulo = f"Pedidos del cliente {codigo_cliente}"
+    elif opcion == "2":
+        pedidos = servicios.pedidos_por_estado(sesion, "pendiente")
+        titulo = "Pedidos pendientes"
+    elif opcion == "3":
+        pedidos = servicios.pedidos_por_estado(sesion, "en_proceso")
+        titulo = "Pedidos en proceso"
+    elif opcion == "4":
+        pedidos = servicios.pedidos_de_hoy(sesion)
+        titulo = "Pedidos de hoy"
+    elif opcion == "5":
+        try:
+            desde = datetime.strptime(input("Fecha inicial (AAAA-MM-DD): ").strip(), "%Y-%m-%d")
+            hasta = datetime.strptime(input("Fecha final (AAAA-MM-DD): ").strip(), "%Y-%m-%d")
+        except ValueError:
+            console.print("\n[bold red]❌ Fecha no válida[/bold red]")
+            return
+        # La fecha final se incluye completa
+        pedidos = servicios.pedidos_entre_fechas(sesion, desde, hasta + timedelta(days=1))
+        titulo = f"Pedidos del {desde:%Y-%m-%d} al {hasta:%Y-%m-%d}"
+    else:
+        console.print("\n[bold red]❌ Opción no válida[/bold red]")
+        return
+    
+    if not pedidos:
+        console.print("\n[bold yellow]⚠ No se encontraron pedidos[/bold yellow]")
+        return
+    
+    paginador_pedidos(pedidos, titulo).navegar()
+    if input("\n¿Desea ver los detalles de algún pedido? (s/n): ").lower() == 's':
+        codigo = input("Ingrese el código del pedido: ")
+        mostrar_detalles_pedido(codigo)
+
+@medido("pedidos")
+def editar_pedido(datos_productos):
     """Edita un pedido existente"""
-    datos_pedidos = cargar_pedidos()
-    datos_detalles = cargar_detalles_pedidos()
-    datos_productos = cargar_datos()
+    sesion = Sesion(datos_productos)
     
-    if not datos_pedidos["pedidos"]:
+    if not sesion.hay_pedidos():
         console.print("\n[bold yellow]⚠ No hay pedidos registrados[/bold yellow]")
         return
     
     codigo = input("\nIngrese el código del pedido a editar: ")
     
-    # Buscamos el pedido
-    pedido_index = None
-    pedido_encontrado = None
-    for i, pedido in enumerate(datos_pedidos["pedidos"]):
-        if pedido["codigo_pedido"] == codigo:
-            pedido_index = i
-            pedido_encontrado = pedido
-            break
-    
-    if pedido_encontrado is None:
-        console.print("\n[bold red]❌ Pedido no encontrado[/bold red]")
-        return
-        
-    # Buscamos los detalles del pedido
-    detalle_pedido_index = None
-    detalle_pedido = None
-    for i, detalle in enumerate(datos_detalles["detalles_pedidos"]):
-        if detalle["codigo_pedido"] == codigo:
-            detalle_pedido_index = i
-            detalle_pedido = detalle
-            break
-    
-    if detalle_pedido is None:
-        console.print("\n[bold red]❌ Detalles del pedido no encontrados[/bold red]")
+    # Buscamos el pedido y sus detalles
+    try:
+        _, detalle_pedido = servicios.obtener_pedido(sesion, codigo)
+    except ErrorServicio as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
         return
     
     # Mostramos los detalles actuales del pedido
-    mostrar_detalles_pedido(codigo, datos_detalles)
+    mostrar_detalles_pedido(codigo, sesion)
     
     # Menú de edición
     console.print("\n[bold cyan]=== OPCIONES DE EDICIÓN ===[/bold cyan]")
@@ -282,239 +316,110 @@ def editar_pedido():
     
     opcion_edicion = input("\n⚡ Seleccione una opción: ")
     
-    # 1. Cambiar estado
-    if opcion_edicion == "1":
-        console.print("\n[bold cyan]Estados disponibles:[/bold cyan]")
-        console.print("1. Pendiente")
-        console.print("2. En proceso")
-        console.print("3. Entregado")
-        
-        opcion = input("\nSeleccione el nuevo estado (1-3): ")
-        if opcion == "1":
-            pedido_encontrado["estado"] = "pendiente"
-        elif opcion == "2":
-            pedido_encontrado["estado"] = "en_proceso"
-        elif opcion == "3":
-            pedido_encontrado["estado"] = "entregado"
-        else:
-            console.print("\n[bold red]❌ Opción no válida[/bold red]")
-            return
-        
-        # Guardamos los cambios
-        guardar_pedidos(datos_pedidos)
-        console.print("\n[bold green]✅ Estado del pedido actualizado exitosamente![/bold green]")
-    
-    # 2. Agregar productos
-    elif opcion_edicion == "2":
-        # Mostramos productos disponibles
-        from modulos.gestion_productos import mostrar_lista_productos
-        mostrar_lista_productos(datos_productos)
-        
-        # Agregamos productos al pedido
-        while True:
-            codigo_producto = input("\nCódigo del producto a agregar (o 'fin' para terminar): ")
-            if codigo_producto.lower() == 'fin':
-                break
+    try:
+        # 1. Cambiar estado
+        if opcion_edicion == "1":
+            console.print("\n[bold cyan]Estados disponibles:[/bold cyan]")
+            console.print("1. Pendiente")
+            console.print("2. En proceso")
+            console.print("3. Entregado")
             
-            # Buscamos el producto
-            producto_encontrado = None
-            for producto in datos_productos["productos"]:
-                if producto["codigo_producto"] == codigo_producto:
-                    producto_encontrado = producto
-                    break
+            opcion = input("\nSeleccione el nuevo estado (1-3): ")
+            estados = {"1": "pendiente", "2": "en_proceso", "3": "entregado"}
+            if opcion not in estados:
+                console.print("\n[bold red]❌ Opción no válida[/bold red]")
+                return
             
-            if not producto_encontrado:
-                console.print("\n[bold red]❌ Producto no encontrado[/bold red]")
-                continue
+            servicios.cambiar_estado(sesion, codigo, estados[opcion])
+            sesion.confirmar()
+            console.print("\n[bold green]✅ Estado del pedido actualizado exitosamente![/bold green]")
+        
+        # 2. Agregar productos
+        elif opcion_edicion == "2":
+            # Mostramos productos disponibles
+            from modulos.gestion_productos import mostrar_lista_productos
+            mostrar_lista_productos(sesion.datos)
             
-            # Pedimos la cantidad
-            cantidad = int(input("Cantidad: "))
-            if cantidad <= 0:
-                console.print("\n[bold red]❌ La cantidad debe ser mayor a cero[/bold red]")
-                continue
+            # Agregamos productos al pedido
+            while True:
+                codigo_producto = input("\nCódigo del producto a agregar (o 'fin' para terminar): ")
+                if codigo_producto.lower() == 'fin':
+                    break
                 
-            if cantidad > producto_encontrado["cantidad_en_stock"]:
-                console.print("\n[bold red]❌ No hay suficiente stock. Disponible: " + 
-                             str(producto_encontrado["cantidad_en_stock"]) + "[/bold red]")
-                continue
+                cantidad = int(input("Cantidad: "))
+                try:
+                    servicios.agregar_linea(sesion, codigo, codigo_producto, cantidad)
+                except ErrorServicio as error:
+                    console.print(f"\n[bold red]❌ {error}[/bold red]")
             
-            # Calculamos el subtotal
-            subtotal = cantidad * producto_encontrado["precio_venta"]
+            # Guardamos los cambios
+            sesion.confirmar()
+            console.print("\n[bold green]✅ Productos agregados al pedido exitosamente![/bold green]")
+        
+        # 3. Cambiar cantidad
+        elif opcion_edicion == "3":
+            if not detalle_pedido["detalles"]:
+                console.print("\n[bold yellow]⚠ Este pedido no tiene productos[/bold yellow]")
+                return
             
-            # Creamos el detalle
-            detalle = {
-                "numero_linea": len(detalle_pedido["detalles"]) + 1,
-                "codigo_producto": producto_encontrado["codigo_producto"],
-                "cantidad": cantidad,
-                "precio_unidad": producto_encontrado["precio_venta"],
-                "subtotal": subtotal
-            }
+            numero_linea = int(input("\nIngrese el número de línea del producto a modificar: "))
+            _, _, detalle_encontrado = servicios.obtener_linea(sesion, codigo, numero_linea)
+            producto_encontrado = servicios.obtener_producto(sesion, detalle_encontrado["codigo_producto"])
             
-            # Actualizamos el stock
-            producto_encontrado["cantidad_en_stock"] -= cantidad
+            # Mostramos la cantidad actual
+            console.print(f"\nProducto: {detalle_encontrado['codigo_producto']}")
+            console.print(f"Cantidad actual: {detalle_encontrado['cantidad']}")
+            console.print(f"Stock disponible: {producto_encontrado['cantidad_en_stock'] + detalle_encontrado['cantidad']}")
             
-            # Agregamos el detalle al pedido
-            detalle_pedido["detalles"].append(detalle)
-            pedido_encontrado["total"] += subtotal
-        
-        # Guardamos los cambios
-        guardar_datos(datos_productos)
-        guardar_pedidos(datos_pedidos)
-        guardar_detalles_pedidos(datos_detalles)
-        console.print("\n[bold green]✅ Productos agregados al pedido exitosamente![/bold green]")
-    
-    # 3. Cambiar cantidad
-    elif opcion_edicion == "3":
-        if not detalle_pedido["detalles"]:
-            console.print("\n[bold yellow]⚠ Este pedido no tiene productos[/bold yellow]")
-            return
-        
-        numero_linea = int(input("\nIngrese el número de línea del producto a modificar: "))
-        
-        # Buscamos el detalle
-        detalle_encontrado = None
-        detalle_index = None
-        for i, detalle in enumerate(detalle_pedido["detalles"]):
-            if detalle["numero_linea"] == numero_linea:
-                detalle_encontrado = detalle
-                detalle_index = i
-                break
-        
-        if detalle_encontrado is None:
-            console.print("\n[bold red]❌ Línea de producto no encontrada[/bold red]")
-            return
-        
-        # Buscamos el producto para verificar stock
-        producto_encontrado = None
-        for producto in datos_productos["productos"]:
-            if producto["codigo_producto"] == detalle_encontrado["codigo_producto"]:
-                producto_encontrado = producto
-                break
-        
-        if producto_encontrado is None:
-            console.print("\n[bold red]❌ Producto no encontrado en inventario[/bold red]")
-            return
-        
-        # Mostramos la cantidad actual
-        console.print(f"\nProducto: {detalle_encontrado['codigo_producto']}")
-        console.print(f"Cantidad actual: {detalle_encontrado['cantidad']}")
-        console.print(f"Stock disponible: {producto_encontrado['cantidad_en_stock'] + detalle_encontrado['cantidad']}")
-        
-        # Pedimos la nueva cantidad
-        nueva_cantidad = int(input("\nNueva cantidad: "))
-        if nueva_cantidad <= 0:
-            console.print("\n[bold red]❌ La cantidad debe ser mayor a cero[/bold red]")
-            return
-        
-        # Verificamos stock disponible (stock actual + cantidad anterior)
-        stock_disponible = producto_encontrado["cantidad_en_stock"] + detalle_encontrado["cantidad"]
-        if nueva_cantidad > stock_disponible:
-            console.print(f"\n[bold red]❌ No hay suficiente stock. Disponible: {stock_disponible}[/bold red]")
-            return
-        
-        # Actualizamos el stock
-        diferencia = nueva_cantidad - detalle_encontrado["cantidad"]
-        producto_encontrado["cantidad_en_stock"] -= diferencia
-        
-        # Actualizamos el total del pedido
-        pedido_encontrado["total"] -= detalle_encontrado["subtotal"]
-        
-        # Actualizamos el detalle
-        detalle_encontrado["cantidad"] = nueva_cantidad
-        detalle_encontrado["subtotal"] = nueva_cantidad * detalle_encontrado["precio_unidad"]
-        
-        # Actualizamos el total del pedido
-        pedido_encontrado["total"] += detalle_encontrado["subtotal"]
-        
-        # Guardamos los cambios
-        guardar_datos(datos_productos)
-        guardar_pedidos(datos_pedidos)
-        guardar_detalles_pedidos(datos_detalles)
-        console.print("\n[bold green]✅ Cantidad actualizada exitosamente![/bold green]")
-    
-    # 4. Eliminar producto
-    elif opcion_edicion == "4":
-        if not detalle_pedido["detalles"]:
-            console.print("\n[bold yellow]⚠ Este pedido no tiene productos[/bold yellow]")
-            return
-        
-        numero_linea = int(input("\nIngrese el número de línea del producto a eliminar: "))
-        
-        # Buscamos el detalle
-        detalle_encontrado = None
-        detalle_index = None
-        for i, detalle in enumerate(detalle_pedido["detalles"]):
-            if detalle["numero_linea"] == numero_linea:
-                detalle_encontrado = detalle
-                detalle_index = i
-                break
+            # Pedimos la nueva cantidad
+            nueva_cantidad = int(input("\nNueva cantidad: "))
+            servicios.cambiar_cantidad(sesion, codigo, numero_linea, nueva_cantidad)
+            sesion.confirmar()
+            console.print("\n[bold green]✅ Cantidad actualizada exitosamente![/bold green]")
+        
+        # 4. Eliminar producto
+        elif opcion_edicion == "4":
+            if not detalle_pedido["detalles"]:
+                console.print("\n[bold yellow]⚠ Este pedido no tiene productos[/bold yellow]")
+                return
+            
+            numero_linea = int(input("\nIngrese el número de línea del producto a eliminar: "))
+            servicios.eliminar_linea(sesion, codigo, numero_linea)
+            sesion.confirmar()
+            console.print("\n[bold green]✅ Producto eliminado del pedido exitosamente![/bold green]")
         
-        if detalle_encontrado is None:
-            console.print("\n[bold red]❌ Línea de producto no encontrada[/bold red]")
+        else:
+            console.print("\n[bold yellow]⚠ Opción no válida[/bold yellow]")
             return
-        
-        # Buscamos el producto para devolver stock
-        for producto in datos_productos["productos"]:
-            if producto["codigo_producto"] == detalle_encontrado["codigo_producto"]:
-                # Devolvemos el stock
-                producto["cantidad_en_stock"] += detalle_encontrado["cantidad"]
-                break
-        
-        # Actualizamos el total del pedido
-        pedido_encontrado["total"] -= detalle_encontrado["subtotal"]
-        
-        # Eliminamos el detalle
-        detalle_pedido["detalles"].pop(detalle_index)
-        
-        # Renumeramos las líneas
-        for i, detalle in enumerate(detalle_pedido["detalles"]):
-            detalle["numero_linea"] = i + 1
-        
-        # Guardamos los cambios
-        guardar_datos(datos_productos)
-        guardar_pedidos(datos_pedidos)
-        guardar_detalles_pedidos(datos_detalles)
-        console.print("\n[bold green]✅ Producto eliminado del pedido exitosamente![/bold green]")
-    
-    else:
-        console.print("\n[bold yellow]⚠ Opción no válida[/bold yellow]")
+    except ErrorServicio as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
         return
         
     # Mostramos los detalles actualizados
     console.print("\n[bold cyan]=== DETALLES ACTUALIZADOS DEL PEDIDO ===[/bold cyan]")
-    mostrar_detalles_pedido(codigo, datos_detalles)
+    mostrar_detalles_pedido(codigo, sesion)
 
-def eliminar_pedido():
+@medido("pedidos")
+def eliminar_pedido(datos_productos):
     """Elimina un pedido del sistema"""
-    datos_pedidos = cargar_pedidos()
-    datos_detalles = cargar_detalles_pedidos()
+    sesion = Sesion(datos_productos)
     
-    if not datos_pedidos["pedidos"]:
+    if not sesion.hay_pedidos():
         console.print("\n[bold yellow]⚠ No hay pedidos registrados[/bold yellow]")
         return
     
     codigo = input("\nIngrese el código del pedido a eliminar: ")
     
-    # Buscamos y eliminamos el pedido
-    for i, pedido in enumerate(datos_pedidos["pedidos"]):
-        if pedido["codigo_pedido"] == codigo:
-            confirmacion = input("¿Está seguro de eliminar este pedido? (s/n): ").lower()
-            if confirmacion == 's':
-                # Eliminamos el pedido
-                datos_pedidos["pedidos"].pop(i)
-                # Eliminamos los detalles
-                for j, detalle in enumerate(datos_detalles["detalles_pedidos"]):
-                    if detalle["codigo_pedido"] == codigo:
-                        datos_detalles["detalles_pedidos"].pop(j)
-                        break
-                
-                # Guardamos los cambios
-                guardar_pedidos(datos_pedidos)
-                guardar_detalles_pedidos(datos_detalles)
-                console.print("\n[bold green]✅ Pedido eliminado exitosamente![/bold green]")
-            return
+    # Buscamos el pedido en el repositorio de pedidos
+    if codigo not in sesion.repositorio_de(codigo):
+        console.print("\n[bold red]❌ Pedido no encontrado[/bold red]")
+        return
     
-    console.print("\n[bold red]❌ Pedido no encontrado[/bold red]")
+    confirmacion = input("¿Está seguro de eliminar este pedido? (s/n): ").lower()
+    if confirmacion == 's':
+        servicios.eliminar_pedido(sesion, codigo)
+        sesion.confirmar()
+        console.print("\n[bold green]✅ Pedido eliminado exitosamente![/bold green]")
 
 def gestionar_pedidos(datos_productos):
     """Gestiona el menú de pedidos"""
@@ -528,10 +433,12 @@ def gestionar_pedidos(datos_productos):
         elif opcion == "3":
             buscar_pedido()
         elif opcion == "4":
-            editar_pedido()
+            editar_pedido(datos_productos)
         elif opcion == "5":
-            eliminar_pedido()
+            eliminar_pedido(datos_productos)
         elif opcion == "6":
+            consultar_pedidos()
+        elif opcion == "7":
             break
         else:
             console.print("\n[bold yellow]⚠ Opción no válida[/bold yellow]") 
\ No newline at end of file
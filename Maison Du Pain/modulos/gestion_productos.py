@@ -4,18 +4,24 @@ Maneja operaciones CRUD para productos de panadería
 """
 from rich.console import Console
 from rich.table import Table
-from datetime import datetime
+from modulos.catalogo import obtener_catalogo
+from modulos import servicios
+from modulos.metricas import medido
+from modulos.paginacion import Paginador
+from modulos.secuencias import clave_orden_codigo
+from modulos.servicios import Sesion, ErrorServicio
 
 # Instancia de consola para la visualización
 console = Console()
 
-def updateQuantityInventory(stock, quantity):
-    """Actualiza la cantidad en inventario de manera segura"""
-    if quantity > 0:
-        stock = stock + quantity
-        return stock
-    else:
-        return stock
+# Claves por las que se pueden ordenar los listados de productos
+ORDENES_PRODUCTOS = [
+    ("Código", lambda producto: clave_orden_codigo(producto["codigo_producto"])),
+    ("Nombre", lambda producto: producto["nombre"].lower()),
+    ("Categoría", lambda producto: (producto["categoria"].lower(), producto["nombre"].lower())),
+    ("Stock", lambda producto: producto["cantidad_en_stock"]),
+    ("Precio de venta", lambda producto: producto["precio_venta"]),
+]
 
 def mostrar_menu_productos():
     """Muestra el menú de gestión de productos"""
@@ -25,87 +31,31 @@ def mostrar_menu_productos():
     console.print("3️⃣ Buscar Producto")
     console.print("4️⃣ Editar Producto")
     console.print("5️⃣ Eliminar Producto")
-    console.print("6️⃣ 🔙 Volver al Menú Principal")
+    console.print("6️⃣ 📦 Reabastecimiento")
+    console.print("7️⃣ 🔙 Volver al Menú Principal")
     return input("\n⚡ Seleccione una opción: ")
 
-def generar_codigo_producto(datos):
-    """Genera un código único para el producto"""
-    # Buscamos el último número usado por categoría
-    ultimos_numeros = {
-        "pan": 0,
-        "pt": 0,  # PT para pasteles
-        "ps": 0   # PS para postres
-    }
-    
-    # Mapeo de categorías completas a códigos
-    mapeo_categorias = {
-        "pan": "PAN",
-        "pastel": "PT",
-        "postre": "PS"
-    }
-    
-    for producto in datos["productos"]:
-        categoria = producto["categoria"].lower()
-        codigo_categoria = mapeo_categorias.get(categoria)
-        if codigo_categoria:
-            # Extraemos el número del código existente
-            partes = producto["codigo_producto"].split("-")
-            if len(partes) == 2:
-                try:
-                    numero = int(partes[1])
-                    categoria_corta = partes[0].lower()
-                    if categoria_corta == "pt" or categoria_corta == "pastel":
-                        ultimos_numeros["pt"] = max(ultimos_numeros["pt"], numero)
-                    elif categoria_corta == "ps" or categoria_corta == "postre":
-                        ultimos_numeros["ps"] = max(ultimos_numeros["ps"], numero)
-                    elif categoria_corta == "pan":
-                        ultimos_numeros["pan"] = max(ultimos_numeros["pan"], numero)
-                except ValueError:
-                    pass
-    
-    # Pedimos la categoría
+def pedir_categoria():
+    """Pide la categoría del producto"""
     console.print("\n[bold cyan]Categorías disponibles:[/bold cyan]")
     console.print("1. Pan")
     console.print("2. Pastel")
     console.print("3. Postre")
     
+    categorias = {"1": "pan", "2": "pastel", "3": "postre"}
     while True:
         opcion = input("\nSeleccione la categoría (1-3): ")
-        if opcion == "1":
-            categoria = "pan"
-            codigo_categoria = "PAN"
-            break
-        elif opcion == "2":
-            categoria = "pastel"
-            codigo_categoria = "PT"
-            break
-        elif opcion == "3":
-            categoria = "postre"
-            codigo_categoria = "PS"
-            break
-        else:
-            console.print("\n[bold red]❌ Opción no válida[/bold red]")
-    
-    # Generamos el nuevo código
-    categoria_corta = codigo_categoria.lower()
-    nuevo_numero = ultimos_numeros[categoria_corta] + 1
-    return f"{codigo_categoria}-{nuevo_numero:03d}"
+        if opcion in categorias:
+            return categorias[opcion]
+        console.print("\n[bold red]❌ Opción no válida[/bold red]")
 
+@medido("productos")
 def agregar_producto(datos):
     """Agrega un nuevo producto al sistema"""
     console.print("\n[bold green]=== AGREGAR PRODUCTO ===[/bold green]")
     
-    # Generamos el código del producto
-    codigo = generar_codigo_producto(datos)
-    
-    # Mapeo de códigos a categorías
-    mapeo_categorias_inverso = {
-        "PAN": "pan",
-        "PT": "pastel",
-        "PS": "postre"
-    }
-    
-    # Pedimos los datos del producto
+    # Pedimos la categoría y los datos del producto
+    categoria = pedir_categoria()
     nombre = input("Nombre del producto: ")
     descripcion = input("Descripción: ")
     proveedor = input("Proveedor: ")
@@ -113,66 +63,54 @@ def agregar_producto(datos):
     precio_venta = float(input("Precio de venta: "))
     precio_proveedor = float(input("Precio del proveedor: "))
     
-    # Obtenemos la categoría del código
-    categoria_codigo = codigo.split("-")[0]
-    categoria = mapeo_categorias_inverso.get(categoria_codigo, "otro")
-    
-    # Creamos el producto
-    producto = {
-        "codigo_producto": codigo,
-        "nombre": nombre,
-        "categoria": categoria,
-        "descripcion": descripcion,
-        "proveedor": proveedor,
-        "cantidad_en_stock": stock,
-        "precio_venta": precio_venta,
-        "precio_proveedor": precio_proveedor
-    }
-    
-    # Agregamos el producto a la lista
-    datos["productos"].append(producto)
-    console.print("\n[bold green]✅ Producto agregado exitosamente![/bold green]")
+    # El servicio asigna el código y agrega el producto al catálogo
+    sesion = Sesion(datos)
+    try:
+        producto = servicios.agregar_producto(
+            sesion, categoria, nombre, descripcion, proveedor,
+            stock, precio_venta, precio_proveedor
+        )
+        sesion.confirmar()
+    except ErrorServicio as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        return
+    console.print(f"\n[bold green]✅ Producto {producto['codigo_producto']} agregado exitosamente![/bold green]")
 
+def paginador_productos(productos, titulo="📦 Lista de Productos"):
+    """Crea la tabla paginada de productos"""
+    columnas = [
+        ("Código", lambda p: p["codigo_producto"], {"style": "cyan", "justify": "center"}),
+        ("Nombre", lambda p: p["nombre"], {"style": "green", "justify": "center"}),
+        ("Categoría", lambda p: p["categoria"], {"style": "yellow", "justify": "center"}),
+        ("Stock", lambda p: str(p["cantidad_en_stock"]), {"justify": "center"}),
+        ("Precio Venta ($)", lambda p: f"{p['precio_venta']:.2f}", {"justify": "center"}),
+        ("Descripción", lambda p: p["descripcion"], {"style": "white", "justify": "center"}),
+    ]
+    return Paginador(productos, columnas, titulo, ORDENES_PRODUCTOS)
+
+@medido("productos")
 def listar_productos(datos):
     """Muestra todos los productos en una tabla"""
     if not datos["productos"]:
         console.print("\n[bold yellow]⚠ No hay productos registrados[/bold yellow]")
         return
     
-    # Creamos la tabla
-    tabla = Table(title="📦 Lista de Productos")
-    tabla.add_column("Código", style="cyan", justify="center")
-    tabla.add_column("Nombre", style="green", justify="center")
-    tabla.add_column("Categoría", style="yellow", justify="center")
-    tabla.add_column("Stock", justify="center")
-    tabla.add_column("Precio Venta ($)", justify="center")
-    tabla.add_column("Descripción", style="white", justify="center")
-    
-    # Agregamos los productos a la tabla
-    for producto in datos["productos"]:
-        tabla.add_row(
-            producto["codigo_producto"],
-            producto["nombre"],
-            producto["categoria"],
-            str(producto["cantidad_en_stock"]),
-            f"{producto['precio_venta']:.2f}",
-            producto["descripcion"]
-        )
-    
     console.print("\n📦 --- PRODUCTOS DE LA PANADERÍA ---")
-    console.print(tabla)
+    # Mostramos la lista por páginas
+    paginador_productos(datos["productos"]).navegar()
     console.print("\n💠 --- OPCIONES ---")
     console.print("🔹 [1] Volver al Menú Principal")
     console.print("🔹 [2] Agregar Producto Nuevo")
     return input("\n⚡ Seleccione una opción [1/2]: ")
 
+@medido("productos")
 def buscar_producto(datos):
-    """Busca un producto por código o nombre"""
+    """Busca un producto por código, nombre o descripción"""
     if not datos["productos"]:
         console.print("\n[bold yellow]⚠ No hay productos registrados[/bold yellow]")
         return
     
-    busqueda = input("\nIngrese código o nombre del producto: ").lower()
+    busqueda = input("\nIngrese código, nombre o descripción del producto: ").lower()
     
     # Creamos la tabla para mostrar resultados
     tabla = Table(title="Resultados de la Búsqueda")
@@ -183,32 +121,34 @@ def buscar_producto(datos):
     tabla.add_column("Precio Venta ($)", justify="center")
     tabla.add_column("Descripción", style="white", justify="center")
     
-    encontrados = False
-    for producto in datos["productos"]:
-        if (busqueda in producto["codigo_producto"].lower() or 
-            busqueda in producto["nombre"].lower()):
-            tabla.add_row(
-                producto["codigo_producto"],
-                producto["nombre"],
-                producto["categoria"],
-                str(producto["cantidad_en_stock"]),
-                f"{producto['precio_venta']:.2f}",
-                producto["descripcion"]
-            )
-            encontrados = True
+    # Consultamos el índice de texto del catálogo (resultados por relevancia)
+    catalogo = obtener_catalogo(datos)
+    resultados = catalogo.buscar_texto(busqueda)
+    
+    # Una sola pasada: llenamos la tabla y anotamos los productos con bajo stock
+    stock_bajo = []
+    for producto in resultados:
+        tabla.add_row(
+            producto["codigo_producto"],
+            producto["nombre"],
+            producto["categoria"],
+            str(producto["cantidad_en_stock"]),
+            f"{producto['precio_venta']:.2f}",
+            producto["descripcion"]
+        )
+        if producto["cantidad_en_stock"] < catalogo.stock_minimo(producto):
+            stock_bajo.append(producto)
     
-    if encontrados:
+    if resultados:
         console.print(tabla)
         
         # Verificar productos con bajo stock
-        for producto in datos["productos"]:
-            if ((busqueda in producto["codigo_producto"].lower() or 
-                busqueda in producto["nombre"].lower()) and 
-                producto["cantidad_en_stock"] < 5):
-                console.print(f"\n[bold red]⚠ ALERTA: El producto {producto['nombre']} tiene stock bajo ({producto['cantidad_en_stock']} unidades)[/bold red]")
+        for producto in stock_bajo:
+            console.print(f"\n[bold red]⚠ ALERTA: El producto {producto['nombre']} tiene stock bajo ({producto['cantidad_en_stock']} unidades)[/bold red]")
     else:
         console.print("\n[bold yellow]⚠ No se encontraron productos[/bold yellow]")
 
+@medido("productos")
 def editar_producto(datos):
     """Edita un producto existente"""
     if not datos["productos"]:
@@ -217,26 +157,32 @@ def editar_producto(datos):
     
     codigo = input("\nIngrese el código del producto a editar: ")
     
-    # Buscamos el producto
-    for producto in datos["productos"]:
-        if producto["codigo_producto"] == codigo:
-            # Pedimos los nuevos datos
-            producto["nombre"] = input("Nuevo nombre: ")
-            producto["descripcion"] = input("Nueva descripción: ")
-            producto["proveedor"] = input("Nuevo proveedor: ")
-            
-            # Actualizamos el stock usando la nueva función
-            cantidad = int(input("Cantidad a agregar/quitar (positivo para agregar, negativo para quitar): "))
-            producto["cantidad_en_stock"] = updateQuantityInventory(producto["cantidad_en_stock"], cantidad)
-            
-            producto["precio_venta"] = float(input("Nuevo precio de venta: "))
-            producto["precio_proveedor"] = float(input("Nuevo precio del proveedor: "))
-            
-            console.print("\n[bold green]✅ Producto editado exitosamente![/bold green]")
-            return
+    # Buscamos el producto en el índice del catálogo
+    if obtener_catalogo(datos).buscar(codigo) is None:
+        console.print("\n[bold red]❌ Producto no encontrado[/bold red]")
+        return
+    
+    # Pedimos los nuevos datos
+    campos = {
+        "nombre": input("Nuevo nombre: "),
+        "descripcion": input("Nueva descripción: "),
+        "proveedor": input("Nuevo proveedor: "),
+    }
+    cantidad = int(input("Cantidad a agregar/quitar (positivo para agregar, negativo para quitar): "))
+    campos["precio_venta"] = float(input("Nuevo precio de venta: "))
+    campos["precio_proveedor"] = float(input("Nuevo precio del proveedor: "))
     
-    console.print("\n[bold red]❌ Producto no encontrado[/bold red]")
+    sesion = Sesion(datos)
+    try:
+        servicios.editar_producto(sesion, codigo, ajuste_stock=cantidad, **campos)
+        sesion.confirmar()
+    except ErrorServicio as error:
+        console.print(f"\n[bold red]❌ {error}[/bold red]")
+        return
+    
+    console.print("\n[bold green]✅ Producto editado exitosamente![/bold green]")
 
+@medido("productos")
 def eliminar_producto(datos):
     """Elimina un producto del sistema"""
     if not datos["productos"]:
@@ -248,36 +194,76 @@ def eliminar_producto(datos):
     
     codigo = input("\nIngrese el código del producto a eliminar: ")
     
-    # Buscamos y eliminamos el producto
-    for i, producto in enumerate(datos["productos"]):
-        if producto["codigo_producto"] == codigo:
-            # Mostramos los detalles del producto a eliminar
-            console.print("\n[bold red]⚠ Producto a eliminar:[/bold red]")
-            tabla = Table(title="Detalles del Producto")
-            tabla.add_column("Código", style="cyan")
-            tabla.add_column("Nombre", style="green")
-            tabla.add_column("Categoría", style="yellow")
-            tabla.add_column("Stock", justify="right")
-            tabla.add_column("Precio Venta", justify="right")
-            tabla.add_column("Precio Proveedor", justify="right")
-            
+    # Buscamos el producto en el índice del catálogo
+    catalogo = obtener_catalogo(datos)
+    producto = catalogo.buscar(codigo)
+    if producto is None:
+        console.print("\n[bold red]❌ Producto no encontrado[/bold red]")
+        return
+    
+    # Mostramos los detalles del producto a eliminar
+    console.print("\n[bold red]⚠ Producto a eliminar:[/bold red]")
+    tabla = Table(title="Detalles del Producto")
+    tabla.add_column("Código", style="cyan")
+    tabla.add_column("Nombre", style="green")
+    tabla.add_column("Categoría", style="yellow")
+    tabla.add_column("Stock", justify="right")
+    tabla.add_column("Precio Venta", justify="right")
+    tabla.add_column("Precio Proveedor", justify="right")
+    
+    tabla.add_row(
+        producto["codigo_producto"],
+        producto["nombre"],
+        producto["categoria"],
+        str(producto["cantidad_en_stock"]),
+        f"${producto['precio_venta']:.2f}",
+        f"${producto['precio_proveedor']:.2f}"
+    )
+    console.print(tabla)
+    
+    confirmacion = input("\n¿Está seguro de eliminar este producto? (s/n): ").lower()
+    if confirmacion == 's':
+        sesion = Sesion(datos)
+        servicios.eliminar_producto(sesion, producto["codigo_producto"])
+        sesion.confirmar()
+        console.print("\n[bold green]✅ Producto eliminado exitosamente![/bold green]")
+
+@medido("productos")
+def mostrar_reabastecimiento(datos):
+    """Muestra los productos con menos stock que su mínimo, agrupados por proveedor"""
+    sesion = Sesion(datos)
+    por_proveedor = servicios.productos_para_reabastecer(sesion)
+    if not por_proveedor:
+        console.print("\n[bold green]✅ Todos los productos tienen al menos su stock mínimo[/bold green]")
+        return
+
+    console.print("\n[bold cyan]=== REABASTECIMIENTO ===[/bold cyan]")
+    for proveedor, productos in por_proveedor.items():
+        tabla = Table(title=f"🚚 {proveedor}")
+        tabla.add_column("Código", style="cyan")
+        tabla.add_column("Nombre", style="green")
+        tabla.add_column("Categoría", style="yellow")
+        tabla.add_column("Stock", justify="right")
+        tabla.add_column("Mínimo", justify="right")
+        tabla.add_column("Faltan", justify="right", style="bold red")
+        tabla.add_column("Costo ($)", justify="right")
+        costo_total = 0.0
+        for producto in productos:
+            minimo = sesion.catalogo.stock_minimo(producto)
+            faltan = minimo - producto["cantidad_en_stock"]
+            costo = faltan * producto["precio_proveedor"]
+            costo_total += costo
             tabla.add_row(
                 producto["codigo_producto"],
                 producto["nombre"],
                 producto["categoria"],
                 str(producto["cantidad_en_stock"]),
-                f"${producto['precio_venta']:.2f}",
-                f"${producto['precio_proveedor']:.2f}"
+                str(minimo),
+                str(faltan),
+                f"{costo:.2f}",
             )
-            console.print(tabla)
-            
-            confirmacion = input("\n¿Está seguro de eliminar este producto? (s/n): ").lower()
-            if confirmacion == 's':
-                datos["productos"].pop(i)
-                console.print("\n[bold green]✅ Producto eliminado exitosamente![/bold green]")
-            return
-    
-    console.print("\n[bold red]❌ Producto no encontrado[/bold red]")
+        tabla.caption = f"Costo para llegar al mínimo: ${costo_total:,.2f}"
+        console.print(tabla)
 
 def mostrar_lista_productos(datos):
     """Muestra la lista de productos sin pedir opciones"""
@@ -285,28 +271,9 @@ def mostrar_lista_productos(datos):
         console.print("\n[bold yellow]⚠ No hay productos registrados[/bold yellow]")
         return
     
-    # Creamos la tabla
-    tabla = Table(title="📦 Lista de Productos")
-    tabla.add_column("Código", style="cyan", justify="center")
-    tabla.add_column("Nombre", style="green", justify="center")
-    tabla.add_column("Categoría", style="yellow", justify="center")
-    tabla.add_column("Stock", justify="center")
-    tabla.add_column("Precio Venta ($)", justify="center")
-    tabla.add_column("Descripción", style="white", justify="center")
-    
-    # Agregamos los productos a la tabla
-    for producto in datos["productos"]:
-        tabla.add_row(
-            producto["codigo_producto"],
-            producto["nombre"],
-            producto["categoria"],
-            str(producto["cantidad_en_stock"]),
-            f"{producto['precio_venta']:.2f}",
-            producto["descripcion"]
-        )
-    
     console.print("\n📦 --- PRODUCTOS DE LA PANADERÍA ---")
-    console.print(tabla)
+    # Mostramos la lista por páginas
+    paginador_productos(datos["productos"]).navegar()
 
 def gestionar_productos(datos):
     """Gestiona el menú de productos"""
@@ -326,6 +293,8 @@ def gestionar_productos(datos):
         elif opcion == "5":
             eliminar_producto(datos)
         elif opcion == "6":
+            mostrar_reabastecimiento(datos)
+        elif opcion == "7":
             break
         else:
             console.print("\n[bold yellow]⚠ Opción no válida[/bold yellow]") 
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Módulo de reportes de ventas
+Muestra los reportes de analisis_ventas en el menú "Reportes"
+"""
+import math
+from datetime import datetime, timedelta
+
+from rich.console import Console
+from rich.table import Table
+
+from modulos.agregados import mes_de_dia, ventas_del_dia
+from modulos.analisis_ventas import (
+    ErrorReporte, cargar_ventas, numpy_disponible, reporte_ventas, rango_mes_anterior
+)
+from modulos.gestion_archivos import cargar_agregados
+
+# Instancia de consola para la visualización
+console = Console()
+
+# Opción del menú -> (agrupación, título)
+REPORTES = {
+    "1": ("producto", "Ventas por producto"),
+    "2": ("categoria", "Ventas por categoría"),
+    "3": ("mes", "Ventas por mes"),
+    "4": ("estado", "Ventas por estado del pedido"),
+}
+
+def mostrar_menu_reportes():
+    """Muestra el menú de reportes"""
+    console.print("\n[bold cyan]=== REPORTES ===[/bold cyan]")
+    console.print("1️⃣ Ventas por Producto")
+    console.print("2️⃣ Ventas por Categoría")
+    console.print("3️⃣ Ventas por Mes")
+    console.print("4️⃣ Ventas por Estado del Pedido")
+    console.print("5️⃣ Ventas de Hoy")
+    console.print("6️⃣ 🔙 Volver al Menú Principal")
+    return input("\n⚡ Seleccione una opción: ")
+
+def pedir_periodo():
+    """Pide el periodo del reporte; devuelve (desde, hasta, descripción) o None"""
+    console.print("\n[bold cyan]Periodo:[/bold cyan]")
+    console.print("1. Todos los pedidos")
+    console.print("2. Mes anterior")
+    console.print("3. Entre dos fechas")
+    opcion = input("\nSeleccione el periodo (1-3): ").strip()
+
+    if opcion == "1":
+        return None, None, "todos los pedidos"
+    if opcion == "2":
+        desde, hasta = rango_mes_anterior()
+        return desde, hasta, f"{desde:%Y-%m}"
+    if opcion == "3":
+        try:
+            desde = datetime.strptime(input("Fecha inicial (AAAA-MM-DD): ").strip(), "%Y-%m-%d")
+            hasta = datetime.strptime(input("Fecha final (AAAA-MM-DD): ").strip(), "%Y-%m-%d")
+        except ValueError:
+            console.print("\n[bold red]❌ Fecha no válida[/bold red]")
+            return None
+        # La fecha final se incluye completa
+        return desde, hasta + timedelta(days=1), f"del {desde:%Y-%m-%d} al {hasta:%Y-%m-%d}"
+    console.print("\n[bold red]❌ Opción no válida[/bold red]")
+    return None
+
+def _dinero(valor):
+    """Formatea un importe; el margen sin costo conocido se muestra como —"""
+    return "—" if math.isnan(valor) else f"${valor:,.2f}"
+
+def mostrar_reporte(filas, totales, titulo, nombres_producto=None):
+    """Muestra las filas de un reporte de ventas en una tabla"""
+    if not filas:
+        console.print("\n[bold yellow]⚠ No hay ventas en ese periodo[/bold yellow]")
+        return
+
+    tabla = Table(title=f"📈 {titulo}")
+    tabla.add_column("Grupo", style="cyan")
+    if nombres_producto is not None:
+        tabla.add_column("Nombre", style="green")
+    tabla.add_column("Unidades", justify="right")
+    tabla.add_column("Ingresos", justify="right", style="yellow")
+    tabla.add_column("Margen", justify="right")
+    tabla.add_column("Margen %", justify="right")
+    tabla.add_column("Pedidos", justify="right")
+    tabla.add_column("Valor medio", justify="right")
+
+    for fila in filas + [totales]:
+        celdas = [fila["grupo"]]
+        if nombres_producto is not None:
+            celdas.append(nombres_producto.get(fila["grupo"], ""))
+        celdas += [
+            f"{fila['unidades']:,.0f}",
+            _dinero(fila["ingresos"]),
+            _dinero(fila["margen"]),
+            "—" if math.isnan(fila["margen_pct"]) else f"{fila['margen_pct']:.1f}%",
+            str(fila["pedidos"]),
+            _dinero(fila["valor_medio_pedido"]),
+        ]
+        tabla.add_row(*celdas, style="bold" if fila is totales else None)
+    console.print(tabla)
+
+def mostrar_ventas_del_dia(dia=None, nombres_producto=None):
+    """Muestra las ventas de un día (hoy por defecto) desde los agregados
+
+    No recorre los pedidos: lee los totales ya acumulados de ese día.
+    """
+    dia = dia or datetime.now().strftime("%Y-%m-%d")
+    agregados = cargar_agregados(mes_de_dia(dia))
+    unidades, ingresos, ventas = ventas_del_dia(agregados, dia)
+    if not ventas:
+        console.print(f"\n[bold yellow]⚠ No hay ventas el {dia}[/bold yellow]")
+    else:
+        tabla = Table(title=f"🧾 Ventas del {dia}")
+        tabla.add_column("Código", style="cyan")
+        if nombres_producto is not None:
+            tabla.add_column("Nombre", style="green")
+        tabla.add_column("Unidades", justify="right")
+        tabla.add_column("Ingresos", justify="right", style="yellow")
+        filas = sorted(ventas.items(), key=lambda venta: venta[1]["ingresos"], reverse=True)
+        for codigo_producto, venta in filas + [("Total", {"unidades": unidades, "ingresos": ingresos})]:
+            celdas = [codigo_producto]
+            if nombres_producto is not None:
+                celdas.append(nombres_producto.get(codigo_producto, ""))
+            celdas += [f"{venta['unidades']:,}", _dinero(venta["ingresos"])]
+            tabla.add_row(*celdas, style="bold" if codigo_producto == "Total" else None)
+        console.print(tabla)
+
+    por_estado = agregados["pedidos_por_estado"]
+    if por_estado:
+        console.print("Pedidos por estado: " + ", ".join(
+            f"{estado} {cantidad}" for estado, cantidad in sorted(por_estado.items())
+        ))
+
+def gestionar_reportes(datos_productos=None):
+    """Gestiona el menú de reportes"""
+    ventas = None
+    while True:
+        opcion = mostrar_menu_reportes()
+
+        if opcion == "6":
+            break
+        if opcion == "5":
+            nombres = None
+            if datos_productos is not None:
+                nombres = {producto["codigo_producto"]: producto["nombre"] for producto in datos_productos["productos"]}
+            mostrar_ventas_del_dia(nombres_producto=nombres)
+            continue
+        if opcion not in REPORTES:
+            console.print("\n[bold yellow]⚠ Opción no válida[/bold yellow]")
+            continue
+        if not numpy_disponible():
+            console.print("\n[bold red]❌ Este reporte necesita NumPy (pip install numpy)[/bold red]")
+            continue
+
+        periodo = pedir_periodo()
+        if periodo is None:
+            continue
+        desde, hasta, descripcion = periodo
+        agrupar, titulo = REPORTES[opcion]
+        try:
+            # Las columnas se cargan una vez y sirven para todos los reportes del menú
+            if ventas is None:
+                ventas = cargar_ventas()
+            filas, totales = reporte_ventas(ventas, agrupar, desde, hasta)
+        except ErrorReporte as error:
+            console.print(f"\n[bold red]❌ {error}[/bold red]")
+            return
+        mostrar_reporte(
+            filas, totales, f"{titulo} ({descripcion})",
+            ventas.nombres_producto if agrupar == "producto" else None,
+        )
@@ -0,0 +1,115 @@
+"""
+Módulo de índice de búsqueda por trigramas
+Permite buscar subcadenas sin recorrer todos los registros
+
+Cada texto indexado se parte en trigramas (grupos de tres caracteres
+consecutivos) y se guarda qué claves contienen cada trigrama. Para buscar
+se intersectan los conjuntos de los trigramas de la consulta y solo se
+verifican esos candidatos.
+"""
+
+
+def normalizar_texto(texto):
+    """Normaliza un texto para indexarlo o buscarlo"""
+    return str(texto).lower()
+
+def trigramas(texto):
+    """Devuelve el conjunto de trigramas de un texto ya normalizado"""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceTrigramas:
+    """Índice invertido de trigramas sobre uno o más campos de texto por clave
+
+    Los campos se indican en orden de importancia: una coincidencia en el
+    primer campo se ordena antes que una en el segundo.
+    """
+
+    def __init__(self):
+        self._claves_por_trigrama = {}
+        self._textos = {}
+
+    def __len__(self):
+        return len(self._textos)
+
+    def __contains__(self, clave):
+        return clave in self._textos
+
+    def agregar(self, clave, *campos):
+        """Indexa los campos de texto de una clave (reemplaza si ya existía)"""
+        if clave in self._textos:
+            self.eliminar(clave)
+        textos = tuple(normalizar_texto(campo) for campo in campos)
+        self._textos[clave] = textos
+        for texto in textos:
+            for trigrama in trigramas(texto):
+                self._claves_por_trigrama.setdefault(trigrama, set()).add(clave)
+
+    def eliminar(self, clave):
+        """Quita una clave del índice"""
+        textos = self._textos.pop(clave, None)
+        if textos is None:
+            return
+        for texto in textos:
+            for trigrama in trigramas(texto):
+                claves = self._claves_por_trigrama.get(trigrama)
+                if claves is not None:
+                    claves.discard(clave)
+                    if not claves:
+                        del self._claves_por_trigrama[trigrama]
+
+    def actualizar(self, clave, *campos):
+        """Vuelve a indexar una clave cuyos textos cambiaron"""
+        self.agregar(clave, *campos)
+
+    def candidatos(self, consulta):
+        """Devuelve las claves que contienen todos los trigramas de la consulta"""
+        consulta = normalizar_texto(consulta)
+        buscados = trigramas(consulta)
+        if not buscados:
+            # Consultas de menos de tres caracteres: no hay trigramas que cruzar
+            return set(self._textos)
+
+        # Intersectamos empezando por el conjunto más pequeño
+        conjuntos = []
+        for trigrama in buscados:
+            claves = self._claves_por_trigrama.get(trigrama)
+            if not claves:
+                return set()
+            conjuntos.append(claves)
+        conjuntos.sort(key=len)
+        resultado = set(conjuntos[0])
+        for claves in conjuntos[1:]:
+            resultado &= claves
+            if not resultado:
+                break
+        return resultado
+
+    def buscar(self, consulta):
+        """Devuelve las claves que contienen la consulta, ordenadas por relevancia
+
+        Primero las coincidencias exactas, luego las que empiezan por la
+        consulta y al final el resto; dentro de cada grupo según el campo
+        (el primero pesa más) y la posición de la coincidencia.
+        """
+        consulta = normalizar_texto(consulta)
+        encontrados = []
+        for clave in self.candidatos(consulta):
+            mejor = None
+            for numero_campo, texto in enumerate(self._textos[clave]):
+                posicion = texto.find(consulta)
+                if posicion == -1:
+                    continue
+                if texto == consulta:
+                    tipo = 0
+                elif posicion == 0:
+                    tipo = 1
+                else:
+                    tipo = 2
+                rango = (tipo, numero_campo, posicion)
+                if mejor is None or rango < mejor:
+                    mejor = rango
+            if mejor is not None:
+                encontrados.append((mejor, self._textos[clave][0], clave))
+        encontrados.sort(key=lambda encontrado: encontrado[:2])
+        return [clave for _, _, clave in encontrados]
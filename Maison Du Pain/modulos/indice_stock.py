@@ -0,0 +1,50 @@
+"""
+Módulo del índice de stock
+Mantiene los productos ordenados por margen sobre su stock mínimo
+"""
+import bisect
+
+
+class IndiceStock:
+    """Claves de productos ordenadas por margen de stock, el más urgente primero
+
+    El margen es el stock actual menos el stock mínimo del producto: si es
+    negativo, el producto está por debajo del mínimo. Cambiar el margen de
+    un producto cuesta dos búsquedas binarias (quitarlo e insertarlo en su
+    nuevo lugar) y bajo_minimo() solo recorre los productos que están por
+    debajo, sin mirar el resto del catálogo.
+    """
+
+    def __init__(self, margenes=None):
+        # clave -> margen, y la lista de (margen, clave) ordenada
+        self._margenes = dict(margenes or {})
+        self._orden = sorted((margen, clave) for clave, margen in self._margenes.items())
+
+    def __len__(self):
+        return len(self._margenes)
+
+    def agregar(self, clave, margen):
+        """Agrega un producto o mueve el que ya estaba a su nuevo margen"""
+        anterior = self._margenes.get(clave)
+        if anterior == margen:
+            return
+        if anterior is not None:
+            self._quitar(anterior, clave)
+        self._margenes[clave] = margen
+        bisect.insort(self._orden, (margen, clave))
+
+    def eliminar(self, clave):
+        """Quita un producto del índice"""
+        margen = self._margenes.pop(clave, None)
+        if margen is not None:
+            self._quitar(margen, clave)
+
+    def _quitar(self, margen, clave):
+        posicion = bisect.bisect_left(self._orden, (margen, clave))
+        if posicion < len(self._orden) and self._orden[posicion] == (margen, clave):
+            del self._orden[posicion]
+
+    def bajo_minimo(self):
+        """Claves con margen negativo, de la que más unidades le faltan a la que menos"""
+        fin = bisect.bisect_left(self._orden, (0, ""))
+        return [clave for _, clave in self._orden[:fin]]
@@ -0,0 +1,134 @@
+"""
+Módulo de índices de pedidos
+Índices en memoria por código, cliente, estado, fecha y texto
+"""
+import bisect
+from datetime import datetime
+
+from modulos.indice_busqueda import IndiceTrigramas
+
+# Formato con el que se guarda fecha_pedido
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+# Índices de los pedidos cargados; se reconstruyen si se cargan otros datos
+_indices_pedidos = None
+
+def convertir_fecha(texto):
+    """Convierte fecha_pedido en datetime (None si no tiene el formato esperado)"""
+    try:
+        return datetime.strptime(texto, FORMATO_FECHA)
+    except (TypeError, ValueError):
+        return None
+
+
+class IndicesPedidos:
+    """Índices en memoria sobre la lista de pedidos cargada
+
+    - por_codigo: pedido por código
+    - por_cliente: pedidos de cada codigo_cliente
+    - por_estado: pedidos agrupados por estado
+    - por_fecha: lista ordenada de (fecha, código) para consultas por rango
+    - texto: trigramas de los códigos de pedido y cliente
+
+    Se mantienen al crear, editar y eliminar pedidos para no recorrer la
+    lista en cada consulta.
+    """
+
+    def __init__(self, datos_pedidos):
+        self.datos_pedidos = datos_pedidos
+        self.lista = datos_pedidos["pedidos"]
+        self.por_codigo = {}
+        self.por_cliente = {}
+        self.por_estado = {}
+        self.por_fecha = []
+        self.texto = IndiceTrigramas()
+        for pedido in self.lista:
+            self.agregar(pedido)
+
+    def corresponde_a(self, datos_pedidos):
+        """Indica si los índices fueron construidos sobre estos datos"""
+        return self.datos_pedidos is datos_pedidos and self.lista is datos_pedidos["pedidos"]
+
+    def agregar(self, pedido):
+        """Indexa un pedido nuevo"""
+        codigo = pedido["codigo_pedido"]
+        self.por_codigo[codigo] = pedido
+        self.por_cliente.setdefault(pedido["codigo_cliente"], {})[codigo] = pedido
+        self.por_estado.setdefault(pedido["estado"], {})[codigo] = pedido
+        fecha = convertir_fecha(pedido["fecha_pedido"])
+        if fecha is not None:
+            # Los pedidos nuevos suelen ser los más recientes: insort agrega al final
+            bisect.insort(self.por_fecha, (fecha, codigo))
+        self.texto.agregar(codigo, codigo, pedido["codigo_cliente"])
+
+    def eliminar(self, pedido):
+        """Quita un pedido de los índices"""
+        codigo = pedido["codigo_pedido"]
+        self.por_codigo.pop(codigo, None)
+        self._quitar_de_grupo(self.por_cliente, pedido["codigo_cliente"], codigo)
+        self._quitar_de_grupo(self.por_estado, pedido["estado"], codigo)
+        fecha = convertir_fecha(pedido["fecha_pedido"])
+        if fecha is not None:
+            posicion = bisect.bisect_left(self.por_fecha, (fecha, codigo))
+            if posicion < len(self.por_fecha) and self.por_fecha[posicion] == (fecha, codigo):
+                del self.por_fecha[posicion]
+        self.texto.eliminar(codigo)
+
+    def cambiar_estado(self, pedido, estado_nuevo):
+        """Cambia el estado del pedido moviéndolo de grupo"""
+        codigo = pedido["codigo_pedido"]
+        self._quitar_de_grupo(self.por_estado, pedido["estado"], codigo)
+        pedido["estado"] = estado_nuevo
+        self.por_estado.setdefault(estado_nuevo, {})[codigo] = pedido
+
+    @staticmethod
+    def _quitar_de_grupo(grupos, clave, codigo):
+        """Quita un pedido de un grupo y borra el grupo si queda vacío"""
+        grupo = grupos.get(clave)
+        if grupo is not None:
+            grupo.pop(codigo, None)
+            if not grupo:
+                del grupos[clave]
+
+    def buscar_texto(self, consulta):
+        """Pedidos cuyo código o código de cliente contienen la consulta, por relevancia"""
+        return [self.por_codigo[codigo] for codigo in self.texto.buscar(consulta)]
+
+    def de_cliente(self, codigo_cliente):
+        """Pedidos de un cliente"""
+        return list(self.por_cliente.get(codigo_cliente, {}).values())
+
+    def con_estado(self, estado):
+        """Pedidos en un estado"""
+        return list(self.por_estado.get(estado, {}).values())
+
+    def entre_fechas(self, desde, hasta):
+        """Pedidos con fecha en [desde, hasta), ordenados por fecha"""
+        inicio = bisect.bisect_left(self.por_fecha, (desde, ""))
+        fin = bisect.bisect_left(self.por_fecha, (hasta, ""))
+        return [self.por_codigo[codigo] for _, codigo in self.por_fecha[inicio:fin]]
+
+
+def obtener_indices_pedidos(datos_pedidos):
+    """Devuelve los índices de los pedidos, construyéndolos si hace falta"""
+    global _indices_pedidos
+    if _indices_pedidos is None or not _indices_pedidos.corresponde_a(datos_pedidos):
+        _indices_pedidos = IndicesPedidos(datos_pedidos)
+    return _indices_pedidos
+
+def indexar_pedido(datos_pedidos, pedido):
+    """Agrega un pedido a los índices si ya estaban construidos para estos datos"""
+    if _indices_pedidos is not None and _indices_pedidos.corresponde_a(datos_pedidos):
+        _indices_pedidos.agregar(pedido)
+
+def desindexar_pedido(datos_pedidos, pedido):
+    """Quita un pedido de los índices si ya estaban construidos para estos datos"""
+    if _indices_pedidos is not None and _indices_pedidos.corresponde_a(datos_pedidos):
+        _indices_pedidos.eliminar(pedido)
+
+def cambiar_estado_pedido(datos_pedidos, pedido, estado):
+    """Cambia el estado de un pedido, también en los índices si ya estaban construidos para estos datos"""
+    if _indices_pedidos is not None and _indices_pedidos.corresponde_a(datos_pedidos):
+        _indices_pedidos.cambiar_estado(pedido, estado)
+    else:
+        pedido["estado"] = estado
@@ -0,0 +1,109 @@
+"""
+Módulo de instantáneas binarias de los archivos de datos
+Copia en pickle (protocolo 5) de cada archivo JSON, para arrancar más rápido
+
+Con la opción "instantaneas" activa, junto a cada archivo de datos (por
+ejemplo datos/pedidos/pedidos.json) se guarda pedidos.json.pkl con lo mismo
+ya convertido en registros. Cargarla evita decodificar el JSON y crear los
+registros uno a uno desde diccionarios.
+
+El archivo tiene dos objetos pickle seguidos: una cabecera y los datos.
+La cabecera guarda la firma del JSON (mtime_ns y tamaño) y el SHA-256 de su
+contenido. La instantánea se usa si la firma coincide o, si el JSON se tocó
+o se copió sin cambiar, si coincide el hash; si no, se descarta y se vuelve
+al JSON. El JSON sigue siendo el archivo que manda: la instantánea se puede
+borrar en cualquier momento.
+
+Solo se leen instantáneas que la aplicación escribió en datos/ (pickle
+puede ejecutar código al cargar un archivo ajeno).
+"""
+import hashlib
+import os
+import pickle
+
+from modulos import metricas
+from modulos.registros import sin_recolector
+
+SUFIJO_INSTANTANEA = ".pkl"
+PROTOCOLO = 5
+# Cambia si cambia el formato de la cabecera o de los registros (2: líneas en LineasPedido)
+VERSION = 2
+
+def ruta_instantanea(ruta_archivo):
+    return ruta_archivo + SUFIJO_INSTANTANEA
+
+def firma(ruta_archivo):
+    """(mtime_ns, tamaño) del archivo JSON"""
+    estado = os.stat(ruta_archivo)
+    return (estado.st_mtime_ns, estado.st_size)
+
+def hash_contenido(ruta_archivo):
+    """SHA-256 del contenido del archivo JSON"""
+    resumen = hashlib.sha256()
+    with open(ruta_archivo, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1 << 20), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()
+
+def leer(ruta_archivo):
+    """Devuelve los datos de la instantánea del archivo, o None si no está vigente
+
+    Lanza FileNotFoundError si no existe el archivo JSON (igual que leerlo).
+    """
+    firma_actual = firma(ruta_archivo)
+    try:
+        with open(ruta_instantanea(ruta_archivo), "rb") as archivo:
+            cabecera = pickle.load(archivo)
+            if cabecera.get("version") != VERSION:
+                return None
+            if tuple(cabecera["firma"]) != firma_actual and cabecera["hash"] != hash_contenido(ruta_archivo):
+                return None
+            with sin_recolector():
+                datos = pickle.load(archivo)
+            metricas.contar_lectura(os.fstat(archivo.fileno()).st_size)
+            return datos
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, EOFError, AttributeError, KeyError, TypeError, ValueError):
+        # Instantánea dañada o de otra versión del programa: se vuelve al JSON
+        return None
+
+def escribir(ruta_archivo, datos, firma_leida=None):
+    """Escribe la instantánea de un archivo JSON recién leído o guardado
+
+    firma_leida es la firma que tenía el JSON antes de leerlo: si otra
+    terminal lo reemplazó mientras tanto, datos ya no le corresponde y no se
+    escribe nada. Las listas se guardan como list (el índice del catálogo
+    se rehace al cargar). Si no se puede escribir, se borra la anterior para
+    no dejar una instantánea vieja.
+    """
+    instantanea = ruta_instantanea(ruta_archivo)
+    temporal = f"{instantanea}.{os.getpid()}.nuevo"
+    try:
+        firma_actual = firma(ruta_archivo)
+        contenido_hash = hash_contenido(ruta_archivo)
+        if firma(ruta_archivo) != firma_actual or firma_leida not in (None, firma_actual):
+            return
+        cabecera = {"version": VERSION, "firma": firma_actual, "hash": contenido_hash}
+        contenido = {
+            clave: list(valor) if isinstance(valor, list) else valor
+            for clave, valor in datos.items()
+        }
+        with open(temporal, "wb") as archivo:
+            pickle.dump(cabecera, archivo, protocol=PROTOCOLO)
+            pickle.dump(contenido, archivo, protocol=PROTOCOLO)
+            metricas.contar_escritura(archivo.tell())
+        os.replace(temporal, instantanea)
+    except (OSError, pickle.PicklingError):
+        for ruta in (temporal, instantanea):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+def borrar(ruta_archivo):
+    """Borra la instantánea de un archivo, si existe"""
+    try:
+        os.remove(ruta_instantanea(ruta_archivo))
+    except FileNotFoundError:
+        pass
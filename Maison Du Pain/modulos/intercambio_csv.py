@@ -0,0 +1,214 @@
+"""
+Módulo de importación y exportación de productos en CSV
+Carga listas de precios grandes sin pasar por el menú
+
+El archivo se lee por tandas de filas y cada tanda se valida columna por
+columna. Las filas con errores se copian a un archivo de rechazos con el
+motivo; las válidas se agregan (o actualizan) y se guardan de una sola vez.
+"""
+import csv
+import math
+import os
+
+from modulos.servicios import (
+    CAMPOS_EDITABLES, CATEGORIAS, ErrorServicio, Sesion, agregar_producto, editar_producto,
+    reservar_codigos_producto
+)
+
+# Filas que se validan juntas
+TAMANO_TANDA = 1000
+
+# Columnas del CSV, en el orden en que se exportan
+COLUMNAS_CSV = [
+    "codigo_producto", "nombre", "categoria", "descripcion", "proveedor",
+    "cantidad_en_stock", "precio_venta", "precio_proveedor"
+]
+
+# Columnas que debe traer un CSV para importarlo (codigo_producto es opcional)
+COLUMNAS_OBLIGATORIAS = COLUMNAS_CSV[1:]
+
+SUFIJO_RECHAZOS = ".rechazos.csv"
+
+def _convertir_entero(texto):
+    """Convierte el texto de una celda en un entero no negativo"""
+    valor = int(texto.strip())
+    if valor < 0:
+        raise ValueError("no puede ser negativo")
+    return valor
+
+def _convertir_precio(texto):
+    """Convierte el texto de una celda en un precio (acepta coma decimal)"""
+    texto = texto.strip()
+    if "," in texto and "." not in texto:
+        texto = texto.replace(",", ".")
+    valor = float(texto)
+    # float() acepta "nan" e "inf", que no son precios
+    if not math.isfinite(valor) or valor < 0:
+        raise ValueError("precio no válido")
+    return valor
+
+def _validar_columna(filas, columna, convertir, errores):
+    """Convierte una columna completa de la tanda
+
+    Devuelve la lista de valores convertidos (None donde hubo error) y anota
+    el motivo en errores[i] para cada fila que falló.
+    """
+    valores = []
+    for i, fila in enumerate(filas):
+        try:
+            valores.append(convertir(fila.get(columna) or ""))
+        except ValueError:
+            valores.append(None)
+            errores[i].append(f"{columna} no válido: {fila.get(columna)!r}")
+    return valores
+
+def validar_tanda(filas, catalogo):
+    """Valida una tanda de filas del CSV
+
+    Devuelve (validas, rechazadas): validas es una lista de productos ya
+    convertidos y rechazadas una lista de (posición en la tanda, fila, motivo).
+    """
+    errores = [[] for _ in filas]
+
+    # Categorías: normalizamos la columna y la comparamos con las conocidas
+    categorias = [(fila.get("categoria") or "").strip().lower() for fila in filas]
+    for i, categoria in enumerate(categorias):
+        if categoria not in CATEGORIAS:
+            errores[i].append(f"categoría no válida: {filas[i].get('categoria')!r}")
+
+    nombres = [(fila.get("nombre") or "").strip() for fila in filas]
+    for i, nombre in enumerate(nombres):
+        if not nombre:
+            errores[i].append("falta el nombre")
+
+    # Los códigos indicados deben existir (se actualiza ese producto)
+    codigos = [(fila.get("codigo_producto") or "").strip() for fila in filas]
+    for i, codigo in enumerate(codigos):
+        if codigo and codigo not in catalogo:
+            errores[i].append(f"código desconocido: {codigo}")
+
+    stocks = _validar_columna(filas, "cantidad_en_stock", _convertir_entero, errores)
+    precios_venta = _validar_columna(filas, "precio_venta", _convertir_precio, errores)
+    precios_proveedor = _validar_columna(filas, "precio_proveedor", _convertir_precio, errores)
+
+    validas = []
+    rechazadas = []
+    for i, fila in enumerate(filas):
+        if errores[i]:
+            rechazadas.append((i, fila, "; ".join(errores[i])))
+            continue
+        validas.append({
+            "codigo_producto": codigos[i],
+            "nombre": nombres[i],
+            "categoria": categorias[i],
+            "descripcion": (fila.get("descripcion") or "").strip(),
+            "proveedor": (fila.get("proveedor") or "").strip(),
+            "cantidad_en_stock": stocks[i],
+            "precio_venta": precios_venta[i],
+            "precio_proveedor": precios_proveedor[i],
+        })
+    return validas, rechazadas
+
+def _leer_tandas(lector):
+    """Agrupa las filas del lector en listas de TAMANO_TANDA"""
+    tanda = []
+    for fila in lector:
+        tanda.append(fila)
+        if len(tanda) == TAMANO_TANDA:
+            yield tanda
+            tanda = []
+    if tanda:
+        yield tanda
+
+def importar_productos_csv(ruta_csv, ruta_rechazos=None, sesion=None):
+    """Importa productos desde un CSV y guarda una sola vez al final
+
+    Las filas sin codigo_producto se agregan con códigos nuevos (reservados
+    en un solo bloque por categoría); las que traen un código existente
+    actualizan ese producto (salvo la categoría, que define el código).
+    Las filas rechazadas se escriben en ruta_rechazos (por defecto, el CSV
+    con sufijo .rechazos.csv) junto con su número de fila y el motivo.
+
+    Devuelve un resumen con agregados, actualizados, rechazados y la ruta
+    del archivo de rechazos (None si no hubo).
+    """
+    if ruta_rechazos is None:
+        ruta_rechazos = os.path.splitext(ruta_csv)[0] + SUFIJO_RECHAZOS
+    if sesion is None:
+        sesion = Sesion()
+    catalogo = sesion.catalogo
+
+    nuevos = []
+    actualizaciones = []
+    rechazados = 0
+    archivo_rechazos = None
+    escritor_rechazos = None
+    try:
+        with open(ruta_csv, "r", encoding="utf-8-sig", newline="") as archivo:
+            lector = csv.DictReader(archivo)
+            faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in (lector.fieldnames or [])]
+            if faltantes:
+                raise ErrorServicio(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+
+            fila_actual = 1  # la fila de encabezados
+            for tanda in _leer_tandas(lector):
+                validas, rechazadas = validar_tanda(tanda, catalogo)
+                for producto in validas:
+                    (actualizaciones if producto["codigo_producto"] else nuevos).append(producto)
+                if rechazadas:
+                    if escritor_rechazos is None:
+                        archivo_rechazos = open(ruta_rechazos, "w", encoding="utf-8", newline="")
+                        escritor_rechazos = csv.writer(archivo_rechazos)
+                        escritor_rechazos.writerow(["fila", "motivo"] + lector.fieldnames)
+                    for posicion, fila, motivo in rechazadas:
+                        escritor_rechazos.writerow(
+                            [fila_actual + posicion + 1, motivo] + [fila.get(c, "") for c in lector.fieldnames]
+                        )
+                    rechazados += len(rechazadas)
+                fila_actual += len(tanda)
+    finally:
+        if archivo_rechazos is not None:
+            archivo_rechazos.close()
+
+    # Un bloque de códigos por categoría para todos los productos nuevos
+    por_categoria = {}
+    for producto in nuevos:
+        por_categoria.setdefault(producto["categoria"], []).append(producto)
+    for categoria, productos in por_categoria.items():
+        codigos = reservar_codigos_producto(sesion.datos, categoria, len(productos))
+        for producto, codigo in zip(productos, codigos):
+            producto["codigo_producto"] = codigo
+
+    for producto in nuevos:
+        agregar_producto(sesion, **producto)
+    for producto in actualizaciones:
+        actual = catalogo.buscar(producto["codigo_producto"])
+        # El CSV trae el stock final; el servicio recibe cuánto cambia
+        ajuste = producto["cantidad_en_stock"] - actual["cantidad_en_stock"]
+        editar_producto(
+            sesion, producto["codigo_producto"], ajuste_stock=ajuste,
+            **{campo: producto[campo] for campo in CAMPOS_EDITABLES}
+        )
+
+    sesion.confirmar()
+    return {
+        "agregados": len(nuevos),
+        "actualizados": len(actualizaciones),
+        "rechazados": rechazados,
+        "rechazos": ruta_rechazos if rechazados else None,
+    }
+
+def exportar_productos_csv(ruta_csv, datos=None):
+    """Escribe el catálogo en un CSV fila por fila; devuelve cuántos productos se exportaron"""
+    if datos is None:
+        datos = Sesion().datos
+    temporal = ruta_csv + ".nuevo"
+    cantidad = 0
+    with open(temporal, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(COLUMNAS_CSV)
+        for producto in datos["productos"]:
+            escritor.writerow([producto.get(columna, "") for columna in COLUMNAS_CSV])
+            cantidad += 1
+    os.replace(temporal, ruta_csv)
+    return cantidad
@@ -0,0 +1,149 @@
+"""
+Módulo de lectura incremental de detalles_pedidos.json
+Recorre los bloques de detalles de uno en uno sin cargar el archivo completo
+
+También mantiene un índice auxiliar con la posición en bytes de cada bloque
+(detalles_pedidos.indice.json) para leer un solo pedido con un seek.
+"""
+import codecs
+import json
+import os
+
+from modulos import metricas
+
+TAMANO_BLOQUE_LECTURA = 64 * 1024
+SUFIJO_INDICE = ".indice.json"
+
+_decodificador = json.JSONDecoder()
+
+# Último índice cargado por archivo, para no releerlo en cada consulta
+_indices_en_memoria = {}
+
+def _iterar_con_posiciones(ruta_archivo):
+    """Genera (inicio, fin, bloque) por cada elemento de "detalles_pedidos"
+
+    inicio y fin son posiciones en bytes dentro del archivo. Se lee por
+    trozos y se decodifica un bloque a la vez, de modo que la memoria usada
+    depende del tamaño de un pedido y no del archivo.
+    """
+    decodificador_utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(ruta_archivo, "rb") as archivo:
+        texto = ""
+        base = 0  # posición en bytes del comienzo de texto
+        fin_archivo = False
+
+        def leer_mas():
+            nonlocal texto, fin_archivo
+            trozo = archivo.read(TAMANO_BLOQUE_LECTURA)
+            metricas.contar_lectura(len(trozo))
+            if not trozo:
+                fin_archivo = True
+                texto += decodificador_utf8.decode(b"", final=True)
+                return False
+            texto += decodificador_utf8.decode(trozo)
+            return True
+
+        def descartar(cantidad):
+            """Quita caracteres del comienzo de texto actualizando la posición en bytes"""
+            nonlocal texto, base
+            base += len(texto[:cantidad].encode("utf-8"))
+            texto = texto[cantidad:]
+
+        # Avanzamos hasta el comienzo de la lista de detalles
+        while True:
+            clave = texto.find('"detalles_pedidos"')
+            if clave != -1:
+                apertura = texto.find("[", clave)
+                if apertura != -1:
+                    descartar(apertura + 1)
+                    break
+            if not leer_mas():
+                return
+
+        while True:
+            # Saltamos espacios y comas entre elementos
+            posicion = 0
+            while True:
+                while posicion < len(texto) and texto[posicion] in " \t\r\n,":
+                    posicion += 1
+                if posicion < len(texto) or not leer_mas():
+                    break
+            descartar(posicion)
+            if not texto or texto[0] == "]":
+                return
+
+            try:
+                bloque, fin = _decodificador.raw_decode(texto)
+            except json.JSONDecodeError:
+                # El bloque continúa en el siguiente trozo del archivo
+                if fin_archivo:
+                    raise
+                leer_mas()
+                continue
+
+            inicio = base
+            descartar(fin)
+            yield inicio, base, bloque
+
+def iterar_detalles_pedidos(ruta_archivo):
+    """Genera los bloques de detalles de pedidos de uno en uno"""
+    for _, _, bloque in _iterar_con_posiciones(ruta_archivo):
+        yield bloque
+
+def buscar_detalle_en_archivo(ruta_archivo, codigo_pedido):
+    """Recorre el archivo hasta encontrar el pedido y se detiene ahí"""
+    for bloque in iterar_detalles_pedidos(ruta_archivo):
+        if bloque["codigo_pedido"] == codigo_pedido:
+            return bloque
+    return None
+
+# Índice auxiliar de posiciones
+
+def _firma(ruta_archivo):
+    """Devuelve [mtime_ns, tamaño] del archivo"""
+    estado = os.stat(ruta_archivo)
+    return [estado.st_mtime_ns, estado.st_size]
+
+def construir_indice(ruta_archivo):
+    """Recorre el archivo una vez y guarda la posición de cada pedido"""
+    firma = _firma(ruta_archivo)
+    posiciones = {
+        bloque["codigo_pedido"]: [inicio, fin]
+        for inicio, fin, bloque in _iterar_con_posiciones(ruta_archivo)
+    }
+    indice = {"firma": firma, "posiciones": posiciones}
+
+    ruta_indice = ruta_archivo + SUFIJO_INDICE
+    temporal = ruta_indice + ".nuevo"
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(indice, archivo, ensure_ascii=False)
+    os.replace(temporal, ruta_indice)
+    _indices_en_memoria[ruta_archivo] = indice
+    return indice
+
+def cargar_indice(ruta_archivo):
+    """Carga el índice de posiciones, reconstruyéndolo si el archivo cambió"""
+    firma = _firma(ruta_archivo)
+    indice = _indices_en_memoria.get(ruta_archivo)
+    if indice is not None and indice["firma"] == firma:
+        return indice
+    try:
+        with open(ruta_archivo + SUFIJO_INDICE, "r", encoding="utf-8") as archivo:
+            indice = json.load(archivo)
+        if indice.get("firma") == firma:
+            _indices_en_memoria[ruta_archivo] = indice
+            return indice
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+    return construir_indice(ruta_archivo)
+
+def leer_detalle_indexado(ruta_archivo, codigo_pedido):
+    """Lee solo el bloque de un pedido usando el índice de posiciones"""
+    posicion = cargar_indice(ruta_archivo)["posiciones"].get(codigo_pedido)
+    if posicion is None:
+        return None
+    inicio, fin = posicion
+    with open(ruta_archivo, "rb") as archivo:
+        archivo.seek(inicio)
+        metricas.contar_lectura(fin - inicio)
+        return json.loads(archivo.read(fin - inicio).decode("utf-8"))
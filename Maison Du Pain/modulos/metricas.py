@@ -0,0 +1,246 @@
+"""
+Módulo de métricas de rendimiento
+Mide cuánto tarda cada carga, guardado y operación de menú, y cuántos bytes lee y escribe
+
+Con la opción "metricas" activa (MAISON_METRICAS=1):
+- Las funciones marcadas con @medido(categoria) registran su duración. A la
+  duración se le descuenta el tiempo esperando al usuario en input(), así una
+  operación de menú mide solo lo que hace el programa.
+- Las lecturas y escrituras de archivos de datos se suman a las operaciones
+  en curso con contar_lectura() / contar_escritura().
+- Las operaciones de menú anotan además cuánto de su tiempo pasaron dentro de
+  operaciones de "archivos": el resto es interfaz (dibujar con rich) y lógica.
+- Por operación se guardan las últimas VENTANA duraciones para calcular los
+  percentiles 50, 95 y 99.
+- Cada operación terminada se añade, en una línea JSON compacta, a
+  datos/metricas.jsonl:
+      {"t": 1718000000.123, "op": "pedidos.crear_pedido", "ms": 41.2, "leidos": 1200, "escritos": 5400, "ms_archivos": 30.5}
+
+Con la opción desactivada las funciones marcadas solo comprueban la opción y
+se llaman directamente.
+"""
+import atexit
+import builtins
+from collections import deque
+from contextlib import contextmanager
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+from modulos.configuracion import DATOS_DIR, obtener_opcion
+
+RUTA_METRICAS = os.path.join(DATOS_DIR, "metricas.jsonl")
+# Al superar este tamaño el registro se renombra a metricas.jsonl.1
+TAMANO_MAXIMO_REGISTRO = 5 * 1024 * 1024
+# Líneas que se juntan antes de escribirlas en el registro
+LINEAS_POR_ESCRITURA = 20
+
+# Duraciones que se conservan por operación para los percentiles
+VENTANA = 1000
+PERCENTILES = (50, 95, 99)
+
+# Categoría de las cargas y guardados (su tiempo se descuenta a las de menú)
+CATEGORIA_ARCHIVOS = "archivos"
+
+_bloqueo = threading.Lock()
+_hilo = threading.local()
+# nombre -> acumulados de la operación en este proceso
+_estadisticas = {}
+_lineas_pendientes = []
+_input_original = None
+_salida_registrada = False
+
+def activas():
+    """Indica si la opción "metricas" está activa"""
+    return bool(obtener_opcion("metricas"))
+
+def _pila():
+    """Operaciones medidas en curso en este hilo (de la más externa a la más interna)"""
+    pila = getattr(_hilo, "pila", None)
+    if pila is None:
+        pila = _hilo.pila = []
+    return pila
+
+def contar_lectura(cantidad):
+    """Suma bytes leídos a las operaciones en curso"""
+    for marco in getattr(_hilo, "pila", ()):
+        marco["leidos"] += cantidad
+
+def contar_escritura(cantidad):
+    """Suma bytes escritos a las operaciones en curso"""
+    for marco in getattr(_hilo, "pila", ()):
+        marco["escritos"] += cantidad
+
+def _input_medido(*argumentos):
+    """input() que descuenta la espera del usuario de las operaciones en curso"""
+    inicio = time.perf_counter()
+    try:
+        return _input_original(*argumentos)
+    finally:
+        espera = time.perf_counter() - inicio
+        for marco in getattr(_hilo, "pila", ()):
+            marco["espera"] += espera
+
+def _preparar():
+    """Reemplaza input() y registra el vaciado del registro al salir (una sola vez)"""
+    global _input_original, _salida_registrada
+    if _input_original is None:
+        _input_original = builtins.input
+        builtins.input = _input_medido
+    if not _salida_registrada:
+        atexit.register(escribir_registro)
+        _salida_registrada = True
+
+@contextmanager
+def operacion(nombre, categoria):
+    """Mide lo que se ejecuta dentro como la operación nombre"""
+    _preparar()
+    pila = _pila()
+    marco = {"categoria": categoria, "leidos": 0, "escritos": 0, "espera": 0.0, "archivos": 0.0}
+    pila.append(marco)
+    inicio = time.perf_counter()
+    try:
+        yield marco
+    finally:
+        segundos = time.perf_counter() - inicio - marco["espera"]
+        pila.pop()
+        # El tiempo de la carga o guardado más externo se anota a las operaciones que la contienen
+        if categoria == CATEGORIA_ARCHIVOS and all(otro["categoria"] != CATEGORIA_ARCHIVOS for otro in pila):
+            for otro in pila:
+                otro["archivos"] += segundos
+        _registrar(nombre, segundos, marco)
+
+def medido(categoria):
+    """Decorador que mide cada llamada a la función cuando las métricas están activas
+
+    La operación se llama "<categoria>.<nombre de la función>".
+    """
+    def decorar(funcion):
+        nombre = f"{categoria}.{funcion.__name__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*argumentos, **opciones):
+            if not activas():
+                return funcion(*argumentos, **opciones)
+            with operacion(nombre, categoria):
+                return funcion(*argumentos, **opciones)
+        return envoltura
+    return decorar
+
+def _acumulado_vacio():
+    return {
+        "llamadas": 0, "segundos": 0.0, "segundos_archivos": 0.0,
+        "leidos": 0, "escritos": 0, "duraciones": deque(maxlen=VENTANA),
+    }
+
+def _acumular(acumulado, segundos, segundos_archivos, leidos, escritos):
+    acumulado["llamadas"] += 1
+    acumulado["segundos"] += segundos
+    acumulado["segundos_archivos"] += segundos_archivos
+    acumulado["leidos"] += leidos
+    acumulado["escritos"] += escritos
+    acumulado["duraciones"].append(segundos)
+
+def _registrar(nombre, segundos, marco):
+    linea = {
+        "t": round(time.time(), 3),
+        "op": nombre,
+        "ms": round(segundos * 1000, 3),
+        "leidos": marco["leidos"],
+        "escritos": marco["escritos"],
+    }
+    if marco["categoria"] != CATEGORIA_ARCHIVOS:
+        linea["ms_archivos"] = round(marco["archivos"] * 1000, 3)
+    with _bloqueo:
+        acumulado = _estadisticas.get(nombre)
+        if acumulado is None:
+            acumulado = _estadisticas[nombre] = _acumulado_vacio()
+        _acumular(acumulado, segundos, marco["archivos"], marco["leidos"], marco["escritos"])
+        _lineas_pendientes.append(json.dumps(linea, separators=(",", ":")))
+        escribir = len(_lineas_pendientes) >= LINEAS_POR_ESCRITURA
+    if escribir:
+        escribir_registro()
+
+def escribir_registro():
+    """Añade las líneas pendientes a datos/metricas.jsonl"""
+    with _bloqueo:
+        if not _lineas_pendientes:
+            return
+        texto = "\n".join(_lineas_pendientes) + "\n"
+        _lineas_pendientes.clear()
+    try:
+        if os.path.getsize(RUTA_METRICAS) > TAMANO_MAXIMO_REGISTRO:
+            os.replace(RUTA_METRICAS, RUTA_METRICAS + ".1")
+    except FileNotFoundError:
+        pass
+    try:
+        with open(RUTA_METRICAS, "a", encoding="utf-8") as archivo:
+            archivo.write(texto)
+    except OSError:
+        # Las métricas nunca deben interrumpir una operación
+        pass
+
+def percentil(ordenados, porcentaje):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return 0.0
+    posicion = max(1, math.ceil(porcentaje / 100 * len(ordenados)))
+    return ordenados[min(posicion, len(ordenados)) - 1]
+
+def _resumir(acumulados):
+    """Filas del resumen, la operación con más tiempo total primero"""
+    filas = []
+    for nombre, acumulado in sorted(acumulados.items(), key=lambda par: par[1]["segundos"], reverse=True):
+        ordenadas = sorted(acumulado["duraciones"])
+        fila = {
+            "operacion": nombre,
+            "llamadas": acumulado["llamadas"],
+            "segundos": acumulado["segundos"],
+            "segundos_archivos": acumulado["segundos_archivos"],
+            "leidos": acumulado["leidos"],
+            "escritos": acumulado["escritos"],
+            "maximo": ordenadas[-1] if ordenadas else 0.0,
+        }
+        for porcentaje in PERCENTILES:
+            fila[f"p{porcentaje}"] = percentil(ordenadas, porcentaje)
+        filas.append(fila)
+    return filas
+
+def resumen():
+    """Resumen de las operaciones medidas en este proceso, la de más tiempo total primero
+
+    Los percentiles y el máximo son de las últimas VENTANA llamadas.
+    """
+    with _bloqueo:
+        return _resumir(_estadisticas)
+
+def resumen_registro(ruta_archivo=RUTA_METRICAS):
+    """Resumen como el de resumen(), calculado con las líneas del registro
+
+    Incluye las sesiones anteriores y las de otras terminales; los
+    percentiles se calculan con las últimas VENTANA líneas de cada operación.
+    """
+    escribir_registro()
+    acumulados = {}
+    try:
+        with open(ruta_archivo, "r", encoding="utf-8") as archivo:
+            for texto in archivo:
+                try:
+                    linea = json.loads(texto)
+                except json.JSONDecodeError:
+                    continue
+                if linea["op"] not in acumulados:
+                    acumulados[linea["op"]] = _acumulado_vacio()
+                _acumular(acumulados[linea["op"]], linea["ms"] / 1000, linea.get("ms_archivos", 0) / 1000,
+                          linea["leidos"], linea["escritos"])
+    except FileNotFoundError:
+        return []
+    return _resumir(acumulados)
+
+def reiniciar():
+    """Olvida lo medido en este proceso (el registro en disco no se toca)"""
+    with _bloqueo:
+        _estadisticas.clear()
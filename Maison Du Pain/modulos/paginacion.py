@@ -0,0 +1,133 @@
+"""
+Módulo de paginación de tablas
+Muestra listas grandes de a una página por vez
+
+Solo se arman las filas de la página visible (un corte de la lista), así
+el tiempo de dibujo no depende de cuántos registros haya.
+"""
+from rich.console import Console
+from rich.table import Table
+
+from modulos.configuracion import obtener_opcion
+
+# Instancia de consola para la visualización
+console = Console()
+
+AYUDA_NAVEGACION = "[>] siguiente  [<] anterior  [p N] ir a página  [o] ordenar  [t N] filas por página"
+
+
+class Paginador:
+    """Tabla paginada sobre una lista de registros
+
+    columnas es una lista de (título, función que da el texto de la celda,
+    opciones de add_column). ordenes es una lista de (nombre, función clave)
+    para ordenar; el orden se calcula una vez al elegirlo y se reutiliza al
+    cambiar de página.
+    """
+
+    def __init__(self, registros, columnas, titulo, ordenes=(), tamano_pagina=None):
+        self.registros = registros
+        self.columnas = columnas
+        self.titulo = titulo
+        self.ordenes = list(ordenes)
+        self.tamano_pagina = max(1, tamano_pagina or obtener_opcion("tamano_pagina"))
+        self.pagina = 1
+        self.orden_actual = None
+        self._ordenados = None
+
+    @property
+    def total_paginas(self):
+        return max(1, -(-len(self.registros) // self.tamano_pagina))
+
+    def ir_a_pagina(self, pagina):
+        """Cambia de página sin salirse del rango"""
+        self.pagina = min(max(1, pagina), self.total_paginas)
+
+    def cambiar_tamano(self, tamano_pagina):
+        """Cambia las filas por página manteniendo visible el primer registro actual"""
+        primero = (self.pagina - 1) * self.tamano_pagina
+        self.tamano_pagina = max(1, tamano_pagina)
+        self.ir_a_pagina(primero // self.tamano_pagina + 1)
+
+    def ordenar(self, numero_orden):
+        """Ordena por la clave número numero_orden (None vuelve al orden original)"""
+        if numero_orden is None:
+            self.orden_actual = None
+            self._ordenados = None
+        else:
+            self.orden_actual = numero_orden
+            clave = self.ordenes[numero_orden][1]
+            self._ordenados = sorted(self.registros, key=clave)
+        self.pagina = 1
+
+    def registros_visibles(self):
+        """Devuelve solo los registros de la página actual"""
+        if self._ordenados is not None and len(self._ordenados) != len(self.registros):
+            # La lista cambió de tamaño desde que se ordenó: se vuelve a ordenar
+            pagina = self.pagina
+            self.ordenar(self.orden_actual)
+            self.ir_a_pagina(pagina)
+        origen = self.registros if self._ordenados is None else self._ordenados
+        inicio = (self.pagina - 1) * self.tamano_pagina
+        return origen[inicio:inicio + self.tamano_pagina]
+
+    def mostrar(self):
+        """Dibuja la página actual"""
+        tabla = Table(title=self.titulo)
+        for titulo, _, opciones in self.columnas:
+            tabla.add_column(titulo, **opciones)
+        for registro in self.registros_visibles():
+            tabla.add_row(*(valor(registro) for _, valor, _ in self.columnas))
+
+        pie = f"Página {self.pagina} de {self.total_paginas} · {len(self.registros)} registros"
+        if self.orden_actual is not None:
+            pie += f" · orden: {self.ordenes[self.orden_actual][0]}"
+        tabla.caption = pie
+        console.print(tabla)
+
+    def elegir_orden(self):
+        """Pregunta por cuál clave ordenar"""
+        console.print("\n[bold cyan]Ordenar por:[/bold cyan]")
+        console.print("0. Orden original")
+        for numero, (nombre, _) in enumerate(self.ordenes, 1):
+            console.print(f"{numero}. {nombre}")
+        opcion = input("\nSeleccione una opción: ").strip()
+        if opcion == "0":
+            self.ordenar(None)
+        elif opcion.isdigit() and 1 <= int(opcion) <= len(self.ordenes):
+            self.ordenar(int(opcion) - 1)
+        else:
+            console.print("\n[bold red]❌ Opción no válida[/bold red]")
+
+    def procesar_comando(self, texto):
+        """Aplica un comando de navegación; devuelve False si el texto no lo es"""
+        texto = texto.strip().lower()
+        partes = texto.split()
+        if texto == ">":
+            self.ir_a_pagina(self.pagina + 1)
+        elif texto == "<":
+            self.ir_a_pagina(self.pagina - 1)
+        elif texto == "o" and self.ordenes:
+            self.elegir_orden()
+        elif len(partes) == 2 and partes[0] == "p" and partes[1].isdigit():
+            self.ir_a_pagina(int(partes[1]))
+        elif len(partes) == 2 and partes[0] == "t" and partes[1].isdigit():
+            self.cambiar_tamano(int(partes[1]))
+        else:
+            return False
+        return True
+
+    def navegar(self):
+        """Muestra la tabla y deja recorrerla hasta que se presione Enter
+
+        Si todo cabe en una página se muestra una sola vez sin preguntar.
+        """
+        while True:
+            self.mostrar()
+            if self.total_paginas == 1:
+                return
+            texto = input(f"\n{AYUDA_NAVEGACION}  [Enter] continuar: ")
+            if not texto.strip():
+                return
+            if not self.procesar_comando(texto):
+                console.print("\n[bold yellow]⚠ Comando no válido[/bold yellow]")
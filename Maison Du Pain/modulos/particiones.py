@@ -0,0 +1,132 @@
+"""
+Módulo de particiones mensuales de pedidos
+Reparte pedidos.json y detalles_pedidos.json en un par de archivos por mes
+
+Con "almacenamiento": "mensual" cada mes (según fecha_pedido) tiene sus
+propios archivos en datos/pedidos/meses/:
+    pedidos_2024-03.json    {"pedidos": [...]}
+    detalles_2024-03.json   {"detalles_pedidos": [...]}
+y un manifiesto (manifiesto.json) con los meses que existen:
+    {
+        "meses": {"2024-03": {"pedidos": 120, "lineas": 410, "desde": 1, "hasta": 120}},
+        "otros_codigos": {"WEB-7": "2024-03"}
+    }
+desde y hasta son el menor y el mayor número de los códigos PED-N del mes:
+como los códigos se asignan en orden, para encontrar el mes de un pedido solo
+se abren los meses cuyo rango lo incluye. Los códigos sin número de la
+secuencia se anotan uno a uno en otros_codigos.
+
+Este módulo solo decide qué va en cada archivo; gestion_archivos los lee y
+escribe (con la caché, el bloqueo y las transacciones de siempre).
+"""
+from datetime import timedelta
+import os
+
+from modulos.configuracion import DATOS_DIR
+from modulos.secuencias import numero_de_codigo
+
+DIRECTORIO_MESES = os.path.join(DATOS_DIR, "pedidos", "meses")
+RUTA_MANIFIESTO = os.path.join(DIRECTORIO_MESES, "manifiesto.json")
+
+# Mes de los pedidos cuya fecha_pedido no tiene el formato esperado
+SIN_FECHA = "sin-fecha"
+
+def manifiesto_vacio():
+    return {"meses": {}, "otros_codigos": {}}
+
+def ruta_particion(archivo, mes):
+    """Ruta del archivo de un mes; archivo es "pedidos" o "detalles" """
+    return os.path.join(DIRECTORIO_MESES, f"{archivo}_{mes}.json")
+
+def es_particion(ruta_archivo):
+    """Indica si la ruta es un archivo mensual de pedidos o de detalles"""
+    return os.path.dirname(ruta_archivo) == DIRECTORIO_MESES and ruta_archivo != RUTA_MANIFIESTO
+
+def estructura_vacia(archivo):
+    return {"pedidos": []} if archivo == "pedidos" else {"detalles_pedidos": []}
+
+def mes_de(fecha_pedido):
+    """Mes AAAA-MM de una fecha_pedido (SIN_FECHA si no tiene ese formato)"""
+    if isinstance(fecha_pedido, str) and len(fecha_pedido) >= 7 and fecha_pedido[4] == "-":
+        mes = fecha_pedido[:7]
+        if mes[:4].isdigit() and mes[5:7].isdigit():
+            return mes
+    return SIN_FECHA
+
+def _numero_pedido(codigo_pedido):
+    """Número de un código PED-N, o None si no es de la secuencia de pedidos"""
+    if not isinstance(codigo_pedido, str) or not codigo_pedido.upper().startswith("PED-"):
+        return None
+    return numero_de_codigo(codigo_pedido)
+
+def meses_ordenados(manifiesto):
+    """Meses del manifiesto en orden cronológico (SIN_FECHA al final)"""
+    return sorted(manifiesto["meses"], key=lambda mes: (mes == SIN_FECHA, mes))
+
+def meses_de_codigo(manifiesto, codigo_pedido):
+    """Meses en los que puede estar el pedido (normalmente uno solo)"""
+    if codigo_pedido in manifiesto["otros_codigos"]:
+        return [manifiesto["otros_codigos"][codigo_pedido]]
+    numero = _numero_pedido(codigo_pedido)
+    if numero is None:
+        return []
+    return [
+        mes for mes in meses_ordenados(manifiesto)
+        if manifiesto["meses"][mes]["desde"] is not None
+        and manifiesto["meses"][mes]["desde"] <= numero <= manifiesto["meses"][mes]["hasta"]
+    ]
+
+def meses_entre(manifiesto, desde, hasta):
+    """Meses que se superponen con el rango de fechas [desde, hasta)"""
+    primero = desde.strftime("%Y-%m") if desde is not None else None
+    # hasta no se incluye: hasta el 1 de abril a las 00:00 no abre abril
+    ultimo = (hasta - timedelta(microseconds=1)).strftime("%Y-%m") if hasta is not None else None
+    return [
+        mes for mes in meses_ordenados(manifiesto)
+        if mes != SIN_FECHA
+        and (primero is None or mes >= primero)
+        and (ultimo is None or mes <= ultimo)
+    ]
+
+def dividir(datos_pedidos, datos_detalles):
+    """Reparte pedidos y detalles por mes: {mes: (datos_pedidos, datos_detalles)}
+
+    Los detalles de pedidos que no existen van al mes SIN_FECHA.
+    """
+    particiones = {}
+    mes_pedido = {}
+    for pedido in datos_pedidos["pedidos"]:
+        mes = mes_de(pedido["fecha_pedido"])
+        mes_pedido[pedido["codigo_pedido"]] = mes
+        particiones.setdefault(mes, (estructura_vacia("pedidos"), estructura_vacia("detalles")))
+        particiones[mes][0]["pedidos"].append(pedido)
+    for detalle_pedido in datos_detalles["detalles_pedidos"]:
+        mes = mes_pedido.get(detalle_pedido["codigo_pedido"], SIN_FECHA)
+        particiones.setdefault(mes, (estructura_vacia("pedidos"), estructura_vacia("detalles")))
+        particiones[mes][1]["detalles_pedidos"].append(detalle_pedido)
+    return particiones
+
+def actualizar_manifiesto(manifiesto, mes, datos_pedidos=None, datos_detalles=None):
+    """Actualiza la entrada de un mes con el contenido que se va a guardar
+
+    Basta pasar el archivo que cambió: los contadores del otro se conservan.
+    """
+    entrada = manifiesto["meses"].setdefault(mes, {"pedidos": 0, "lineas": 0, "desde": None, "hasta": None})
+    if datos_pedidos is not None:
+        # Se quitan los códigos sueltos de este mes y se vuelven a anotar
+        otros = manifiesto["otros_codigos"]
+        for codigo in [codigo for codigo, mes_codigo in otros.items() if mes_codigo == mes]:
+            del otros[codigo]
+        numeros = []
+        for pedido in datos_pedidos["pedidos"]:
+            numero = _numero_pedido(pedido["codigo_pedido"])
+            if numero is None:
+                otros[pedido["codigo_pedido"]] = mes
+            else:
+                numeros.append(numero)
+        entrada["pedidos"] = len(datos_pedidos["pedidos"])
+        entrada["desde"] = min(numeros) if numeros else None
+        entrada["hasta"] = max(numeros) if numeros else None
+    if datos_detalles is not None:
+        entrada["lineas"] = sum(len(bloque["detalles"]) for bloque in datos_detalles["detalles_pedidos"])
+    return manifiesto
@@ -0,0 +1,338 @@
+"""
+Módulo de registros de productos, pedidos y líneas de pedido
+Objetos compactos con __slots__ en lugar de un diccionario por registro
+
+Con millones de líneas cargadas, lo que más memoria ocupa es el diccionario
+de cada registro (con sus claves repetidas). Estos registros guardan los
+campos en __slots__ y se usan igual que un diccionario (registro["campo"],
+get, update, in, dict(registro)), así el resto del sistema no cambia. Los
+textos muy repetidos (códigos de producto, estados, clientes) se internan
+para que haya una sola copia de cada uno.
+
+gestion_archivos convierte al cargar (desde_dict) y al guardar (a_json).
+Con pickle se guardan como la tupla de sus valores (instantáneas binarias).
+
+Las líneas de cada bloque de detalles van en LineasPedido, por numero_linea.
+
+Son clases con __slots__ escritas a mano y no dataclasses: slots=True pide
+Python 3.10, y los registros necesitan igual su propia interfaz de
+diccionario, los campos opcionales y el diccionario extras.
+"""
+from contextlib import contextmanager
+import gc
+from operator import attrgetter, itemgetter
+import sys
+
+
+def _internar(valor):
+    """Interna un texto (una sola copia en memoria); deja igual los demás valores"""
+    return sys.intern(valor) if valor.__class__ is str else valor
+
+
+class Registro:
+    """Base de los registros: acceso por clave sobre los atributos de __slots__
+
+    CAMPOS son los campos del esquema JSON, en el orden en que se guardan.
+    Las claves que no están en CAMPOS se conservan en el diccionario extras,
+    que normalmente es None. Un campo que falta en el JSON no está en el
+    registro (igual que una clave que falta en un diccionario).
+    """
+
+    __slots__ = ("extras",)
+    CAMPOS = ()
+
+    def __init_subclass__(cls, **opciones):
+        super().__init_subclass__(**opciones)
+        cls._conjunto_campos = frozenset(cls.CAMPOS)
+        # Leen todos los campos de una vez (en C) para el caso habitual
+        cls._valores_dict = itemgetter(*cls.CAMPOS)
+        cls._valores_registro = attrgetter(*cls.CAMPOS)
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Crea el registro a partir de un diccionario con el esquema JSON"""
+        if len(datos) == len(cls.CAMPOS):
+            try:
+                return cls(*cls._valores_dict(datos))
+            except KeyError:
+                pass
+        # Faltan campos o hay claves extra
+        registro = cls.__new__(cls)
+        registro.extras = None
+        for clave, valor in datos.items():
+            registro[clave] = valor
+        return registro
+
+    def a_dict(self):
+        """Devuelve el registro como diccionario con el esquema JSON"""
+        try:
+            datos = dict(zip(self.CAMPOS, self._valores_registro(self)))
+        except AttributeError:
+            datos = {campo: getattr(self, campo) for campo in self.CAMPOS if hasattr(self, campo)}
+        if self.extras:
+            datos.update(self.extras)
+        return datos
+
+    # Acceso como diccionario
+
+    def __getitem__(self, clave):
+        if clave in self._conjunto_campos:
+            try:
+                return getattr(self, clave)
+            except AttributeError:
+                raise KeyError(clave) from None
+        if self.extras is not None and clave in self.extras:
+            return self.extras[clave]
+        raise KeyError(clave)
+
+    def __setitem__(self, clave, valor):
+        if clave in self._conjunto_campos:
+            setattr(self, clave, valor)
+        else:
+            if self.extras is None:
+                self.extras = {}
+            self.extras[clave] = valor
+
+    def __delitem__(self, clave):
+        if clave in self._conjunto_campos:
+            try:
+                delattr(self, clave)
+            except AttributeError:
+                raise KeyError(clave) from None
+        elif self.extras is not None and clave in self.extras:
+            del self.extras[clave]
+        else:
+            raise KeyError(clave)
+
+    def __contains__(self, clave):
+        try:
+            self[clave]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, clave, por_defecto=None):
+        try:
+            return self[clave]
+        except KeyError:
+            return por_defecto
+
+    def keys(self):
+        return self.a_dict().keys()
+
+    def values(self):
+        return self.a_dict().values()
+
+    def items(self):
+        return self.a_dict().items()
+
+    def __iter__(self):
+        return iter(self.a_dict())
+
+    def __len__(self):
+        return len(self.a_dict())
+
+    def update(self, otros=(), **campos):
+        """Igual que dict.update"""
+        if hasattr(otros, "keys"):
+            otros = [(clave, otros[clave]) for clave in otros.keys()]
+        for clave, valor in otros:
+            self[clave] = valor
+        for clave, valor in campos.items():
+            self[clave] = valor
+
+    def copy(self):
+        return type(self).desde_dict(self.a_dict())
+
+    def __reduce__(self):
+        """Pickle guarda la clase y la tupla de valores (ver instantaneas.py)"""
+        if self.extras is None:
+            try:
+                return (type(self), self._valores_registro(self))
+            except AttributeError:
+                pass
+        return (type(self).desde_dict, (self.a_dict(),))
+
+    def __eq__(self, otro):
+        if isinstance(otro, (Registro, dict)):
+            return self.a_dict() == dict(otro.items())
+        return NotImplemented
+
+    # Mutables, igual que los diccionarios
+    __hash__ = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.a_dict()!r})"
+
+
+class Producto(Registro):
+    """Producto del catálogo (datos_panaderia.json)"""
+
+    __slots__ = (
+        "codigo_producto", "nombre", "categoria", "descripcion", "proveedor",
+        "cantidad_en_stock", "precio_venta", "precio_proveedor",
+    )
+    CAMPOS = __slots__
+
+    def __init__(self, codigo_producto, nombre, categoria, descripcion, proveedor,
+                 cantidad_en_stock, precio_venta, precio_proveedor):
+        self.extras = None
+        self.codigo_producto = codigo_producto
+        self.nombre = nombre
+        self.categoria = _internar(categoria)
+        self.descripcion = descripcion
+        self.proveedor = _internar(proveedor)
+        self.cantidad_en_stock = cantidad_en_stock
+        self.precio_venta = precio_venta
+        self.precio_proveedor = precio_proveedor
+
+
+class Pedido(Registro):
+    """Cabecera de un pedido (pedidos.json)"""
+
+    __slots__ = ("codigo_pedido", "codigo_cliente", "fecha_pedido", "estado", "total")
+    CAMPOS = __slots__
+
+    def __init__(self, codigo_pedido, codigo_cliente, fecha_pedido, estado, total):
+        self.extras = None
+        self.codigo_pedido = codigo_pedido
+        self.codigo_cliente = _internar(codigo_cliente)
+        self.fecha_pedido = fecha_pedido
+        self.estado = _internar(estado)
+        self.total = total
+
+
+class LineaPedido(Registro):
+    """Línea de un pedido (detalles_pedidos.json)"""
+
+    __slots__ = ("numero_linea", "codigo_producto", "cantidad", "precio_unidad", "subtotal")
+    CAMPOS = __slots__
+
+    def __init__(self, numero_linea, codigo_producto, cantidad, precio_unidad, subtotal):
+        self.extras = None
+        self.numero_linea = numero_linea
+        self.codigo_producto = _internar(codigo_producto)
+        self.cantidad = cantidad
+        self.precio_unidad = precio_unidad
+        self.subtotal = subtotal
+
+
+class LineasPedido:
+    """Líneas de un pedido por numero_linea, en el orden en que se agregaron
+
+    numero_linea identifica la línea (es el número del ticket) y no cambia al
+    quitar otras; la posición que se muestra se calcula al dibujar. Se recorre
+    como la lista de líneas y se guarda en JSON como esa misma lista (ver
+    a_json).
+
+    Al cargar las líneas quedan en una lista, que es lo más compacto. La
+    primera vez que se busca, agrega o quita una línea pasan a un diccionario
+    numero_linea -> línea (que conserva el orden), así buscar, cambiar y
+    quitar una línea no recorre ni desplaza las demás. Solo ocurre con los
+    pedidos que se editan.
+    """
+
+    __slots__ = ("_lineas", "_ultimo")
+
+    def __init__(self, lineas=()):
+        # Una lista recibida se usa tal cual, sin copiarla
+        self._lineas = lineas if lineas.__class__ is list else list(lineas)
+        self._ultimo = None
+
+    def _por_numero(self):
+        """Diccionario numero_linea -> línea (lo arma la primera vez)"""
+        if self._ultimo is None:
+            self._lineas = {linea["numero_linea"]: linea for linea in self._lineas}
+            self._ultimo = max(self._lineas, default=0)
+        return self._lineas
+
+    def __iter__(self):
+        return iter(self._lineas if self._ultimo is None else self._lineas.values())
+
+    def __len__(self):
+        return len(self._lineas)
+
+    def __contains__(self, numero_linea):
+        return numero_linea in self._por_numero()
+
+    def __getitem__(self, numero_linea):
+        return self._por_numero()[numero_linea]
+
+    def get(self, numero_linea, por_defecto=None):
+        return self._por_numero().get(numero_linea, por_defecto)
+
+    def siguiente_numero(self):
+        """Número para una línea nueva (no repite los de líneas quitadas en memoria)"""
+        self._por_numero()
+        return self._ultimo + 1
+
+    def agregar(self, linea):
+        """Agrega la línea al final (o reemplaza la que tenga su número)"""
+        self._por_numero()[linea["numero_linea"]] = linea
+        self._ultimo = max(self._ultimo, linea["numero_linea"])
+
+    def quitar(self, numero_linea):
+        """Quita y devuelve la línea con ese número, o None si no está"""
+        return self._por_numero().pop(numero_linea, None)
+
+    def __reduce__(self):
+        """Pickle guarda la lista de líneas"""
+        return (LineasPedido, (list(self),))
+
+    def __eq__(self, otro):
+        if isinstance(otro, (LineasPedido, list)):
+            return list(self) == list(otro)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LineasPedido({list(self)!r})"
+
+
+@contextmanager
+def sin_recolector():
+    """Pausa el recolector de ciclos mientras se crean muchos registros
+
+    Los registros no forman ciclos; sin la pausa el recolector recorre una y
+    otra vez los objetos ya creados y la conversión tarda casi el doble.
+    """
+    activo = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if activo:
+            gc.enable()
+
+def a_json(valor):
+    """Función default de json.dump: registros como diccionarios y líneas como lista"""
+    if isinstance(valor, Registro):
+        return valor.a_dict()
+    if isinstance(valor, LineasPedido):
+        return list(valor)
+    raise TypeError(f"No se puede convertir a JSON: {type(valor).__name__}")
+
+def convertir_productos(datos):
+    """Convierte en registros los productos de datos (datos_panaderia.json)"""
+    with sin_recolector():
+        datos["productos"] = [Producto.desde_dict(producto) for producto in datos["productos"]]
+    return datos
+
+def convertir_pedidos(datos_pedidos):
+    """Convierte en registros los pedidos de datos_pedidos (pedidos.json)"""
+    with sin_recolector():
+        datos_pedidos["pedidos"] = [Pedido.desde_dict(pedido) for pedido in datos_pedidos["pedidos"]]
+    return datos_pedidos
+
+def convertir_detalle_pedido(detalle_pedido):
+    """Convierte en registros las líneas de un bloque de detalles"""
+    detalle_pedido["detalles"] = LineasPedido([LineaPedido.desde_dict(linea) for linea in detalle_pedido["detalles"]])
+    return detalle_pedido
+
+def convertir_detalles(datos_detalles):
+    """Convierte en registros las líneas de todos los pedidos (detalles_pedidos.json)"""
+    with sin_recolector():
+        for detalle_pedido in datos_detalles["detalles_pedidos"]:
+            convertir_detalle_pedido(detalle_pedido)
+    return datos_detalles
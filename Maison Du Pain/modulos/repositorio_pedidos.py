@@ -0,0 +1,167 @@
+"""
+Módulo del repositorio de pedidos
+Une pedidos.json y detalles_pedidos.json en una sola estructura por codigo_pedido
+"""
+
+# Repositorio de los pedidos cargados; cada lado se rearma si se cargan otros datos
+_repositorio = None
+
+
+class _Lado:
+    """Una de las dos listas del repositorio con su diccionario por código
+
+    El diccionario conserva el orden de la lista. Los cambios se hacen en el
+    diccionario y se pasan a la lista en sincronizar().
+    """
+
+    def __init__(self, estructura, clave):
+        self.estructura = estructura
+        self.clave = clave
+        self.lista = estructura[clave]
+        self.por_codigo = {elemento["codigo_pedido"]: elemento for elemento in self.lista}
+        # Elementos nuevos que solo hay que sumar al final de la lista
+        self.agregados = []
+        # Hubo bajas o reemplazos: la lista se vuelve a armar entera
+        self.rearmar = False
+
+    def corresponde_a(self, estructura):
+        """Indica si el lado fue construido sobre esta estructura"""
+        return self.estructura is estructura and self.lista is estructura[self.clave]
+
+    def guardar(self, elemento):
+        codigo = elemento["codigo_pedido"]
+        anterior = self.por_codigo.get(codigo)
+        # Un reemplazo conserva la posición del elemento anterior
+        self.por_codigo[codigo] = elemento
+        if anterior is None:
+            self.agregados.append(elemento)
+        elif anterior is not elemento:
+            self.rearmar = True
+
+    def eliminar(self, codigo):
+        elemento = self.por_codigo.pop(codigo, None)
+        if elemento is not None:
+            self.rearmar = True
+        return elemento
+
+    def sincronizar(self):
+        """Pasa los cambios a la lista, en su lugar (la misma lista sigue en uso)"""
+        if self.rearmar:
+            self.lista[:] = self.por_codigo.values()
+        elif self.agregados:
+            self.lista.extend(self.agregados)
+        self.agregados = []
+        self.rearmar = False
+
+
+class RepositorioPedidos:
+    """Pedidos y bloques de detalles unidos por codigo_pedido
+
+    - obtener(codigo): el pedido y su bloque de detalles
+    - guardar(pedido, detalles): agrega o reemplaza un pedido con sus líneas
+    - eliminar(codigo): quita un pedido con sus líneas
+
+    Todas en O(1), sin recorrer ni desplazar las listas. Cada archivo es un
+    "lado" del repositorio y puede faltar (por ejemplo, si solo se cargaron
+    los detalles). Las listas de los dos archivos se ponen al día en
+    sincronizar(): los pedidos nuevos se suman al final y, si se eliminó o
+    reemplazó alguno, la lista se arma una sola vez con el orden actual. Las
+    listas se modifican en su lugar, así los índices de pedidos y la caché
+    de lectura que las usan siguen valiendo.
+    """
+
+    def __init__(self, datos_pedidos=None, datos_detalles=None):
+        self._pedidos = None
+        self._detalles = None
+        self.usar(datos_pedidos, datos_detalles)
+
+    @property
+    def datos_pedidos(self):
+        return self._pedidos.estructura if self._pedidos is not None else None
+
+    @property
+    def datos_detalles(self):
+        return self._detalles.estructura if self._detalles is not None else None
+
+    def usar(self, datos_pedidos=None, datos_detalles=None):
+        """Arma los lados de las estructuras indicadas que no correspondan
+
+        Los cambios pendientes del lado anterior se pasan antes a su lista.
+        """
+        if datos_pedidos is not None and (self._pedidos is None or not self._pedidos.corresponde_a(datos_pedidos)):
+            if self._pedidos is not None:
+                self._pedidos.sincronizar()
+            self._pedidos = _Lado(datos_pedidos, "pedidos")
+        if datos_detalles is not None and (
+                self._detalles is None or not self._detalles.corresponde_a(datos_detalles)):
+            if self._detalles is not None:
+                self._detalles.sincronizar()
+            self._detalles = _Lado(datos_detalles, "detalles_pedidos")
+
+    def __contains__(self, codigo_pedido):
+        lado = self._pedidos if self._pedidos is not None else self._detalles
+        return lado is not None and codigo_pedido in lado.por_codigo
+
+    def __len__(self):
+        lado = self._pedidos if self._pedidos is not None else self._detalles
+        return len(lado.por_codigo) if lado is not None else 0
+
+    def pedido(self, codigo_pedido):
+        """Devuelve el pedido con ese código o None"""
+        return self._pedidos.por_codigo.get(codigo_pedido) if self._pedidos is not None else None
+
+    def detalles(self, codigo_pedido):
+        """Devuelve el bloque de detalles del pedido o None"""
+        return self._detalles.por_codigo.get(codigo_pedido) if self._detalles is not None else None
+
+    def obtener(self, codigo_pedido):
+        """Devuelve (pedido, bloque de detalles); el que no exista es None"""
+        return self.pedido(codigo_pedido), self.detalles(codigo_pedido)
+
+    def guardar(self, pedido, detalles):
+        """Agrega el pedido con su bloque de detalles, o reemplaza los que tengan su código"""
+        if self._pedidos is not None:
+            self._pedidos.guardar(pedido)
+        if self._detalles is not None:
+            self._detalles.guardar(detalles)
+
+    def eliminar(self, codigo_pedido):
+        """Quita el pedido y su bloque de detalles; devuelve (pedido, detalles) como obtener()"""
+        pedido = self._pedidos.eliminar(codigo_pedido) if self._pedidos is not None else None
+        detalles = self._detalles.eliminar(codigo_pedido) if self._detalles is not None else None
+        return pedido, detalles
+
+    def sincronizar(self):
+        """Pasa los cambios a las listas y devuelve (datos_pedidos, datos_detalles)
+
+        Es lo que se serializa en pedidos.json y detalles_pedidos.json.
+        """
+        for lado in (self._pedidos, self._detalles):
+            if lado is not None:
+                lado.sincronizar()
+        return self.datos_pedidos, self.datos_detalles
+
+
+def obtener_repositorio(datos_pedidos=None, datos_detalles=None):
+    """Devuelve el repositorio de pedidos, armando los lados que hagan falta"""
+    global _repositorio
+    if _repositorio is None:
+        _repositorio = RepositorioPedidos(datos_pedidos, datos_detalles)
+    else:
+        _repositorio.usar(datos_pedidos, datos_detalles)
+    return _repositorio
+
+def sincronizar_repositorio():
+    """Pasa a las listas los cambios pendientes del repositorio, si está armado"""
+    if _repositorio is not None:
+        _repositorio.sincronizar()
+
+def olvidar_repositorio():
+    """Pasa los cambios pendientes a las listas y suelta el repositorio
+
+    Se llama al vaciar la caché de lectura, para no retener los pedidos ya
+    descartados mientras se leen los nuevos.
+    """
+    global _repositorio
+    sincronizar_repositorio()
+    _repositorio = None
@@ -0,0 +1,121 @@
+"""
+Módulo de secuencias para códigos de pedidos y productos
+Guarda el último número usado por prefijo en datos/secuencias.json
+
+Cada incremento se hace bajo un bloqueo de archivo, así dos terminales que
+crean pedidos a la vez nunca reciben el mismo código.
+"""
+import json
+import os
+
+from modulos.bloqueos import bloqueo_archivo
+from modulos.configuracion import DATOS_DIR
+
+RUTA_SECUENCIAS = os.path.join(DATOS_DIR, "secuencias.json")
+RUTA_TEMPORAL_SECUENCIAS = RUTA_SECUENCIAS + ".nuevo"
+
+# Cantidad mínima de dígitos; los números mayores simplemente usan más dígitos
+ANCHO_MINIMO = 3
+
+def formatear_codigo(prefijo, numero):
+    """Devuelve el código con el número completado con ceros (PED-001, PED-1000)"""
+    return f"{prefijo}-{numero:0{ANCHO_MINIMO}d}"
+
+def numero_de_codigo(codigo):
+    """Devuelve la parte numérica de un código como entero, o None si no tiene"""
+    partes = codigo.rsplit("-", 1)
+    if len(partes) != 2:
+        return None
+    try:
+        return int(partes[1])
+    except ValueError:
+        return None
+
+def clave_orden_codigo(codigo):
+    """Clave para ordenar códigos por prefijo y número (PED-999 antes que PED-1000)"""
+    numero = numero_de_codigo(codigo)
+    prefijo = codigo.rsplit("-", 1)[0]
+    return (prefijo, numero if numero is not None else -1, codigo)
+
+def _leer_secuencias():
+    """Lee el último número usado por prefijo"""
+    try:
+        with open(RUTA_SECUENCIAS, "r", encoding="utf-8") as archivo:
+            return json.load(archivo)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _guardar_secuencias(secuencias):
+    """Reemplaza el archivo de secuencias de una sola vez"""
+    with open(RUTA_TEMPORAL_SECUENCIAS, "w", encoding="utf-8") as archivo:
+        json.dump(secuencias, archivo, indent=4)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+    os.replace(RUTA_TEMPORAL_SECUENCIAS, RUTA_SECUENCIAS)
+
+def descartar_temporal():
+    """Borra el temporal que dejó una escritura interrumpida; devuelve True si había uno
+
+    Si la secuencia está tomada (por otra terminal o por este mismo proceso,
+    que puede estar reservando códigos) el temporal puede estar en uso y no
+    se toca; no se espera, para no trabar a quien la tiene tomada.
+    """
+    with bloqueo_archivo(RUTA_SECUENCIAS, esperar=False) as tomado:
+        if tomado and os.path.exists(RUTA_TEMPORAL_SECUENCIAS):
+            os.remove(RUTA_TEMPORAL_SECUENCIAS)
+            return True
+    return False
+
+def reservar_bloque(prefijo, cantidad, inicializar=None):
+    """Reserva cantidad números consecutivos para el prefijo y los devuelve como range
+
+    inicializar es una función que devuelve el último número ya usado; solo
+    se llama la primera vez que aparece el prefijo (por ejemplo, para tomar
+    en cuenta los códigos que existían antes de las secuencias).
+    """
+    if cantidad < 1:
+        return range(0)
+    with bloqueo_archivo(RUTA_SECUENCIAS):
+        secuencias = _leer_secuencias()
+        if prefijo not in secuencias:
+            secuencias[prefijo] = inicializar() if inicializar else 0
+        primero = secuencias[prefijo] + 1
+        secuencias[prefijo] += cantidad
+        _guardar_secuencias(secuencias)
+    return range(primero, primero + cantidad)
+
+def avanzar_hasta(prefijo, numero, inicializar=None):
+    """Hace que la secuencia del prefijo continúe después de numero
+
+    Se usa cuando un código se eligió fuera de la secuencia (por ejemplo,
+    PED-120 indicado en un lote): así el siguiente código generado no lo
+    repite. Si la secuencia ya pasó de ese número no se modifica.
+    """
+    with bloqueo_archivo(RUTA_SECUENCIAS):
+        secuencias = _leer_secuencias()
+        if prefijo not in secuencias:
+            secuencias[prefijo] = inicializar() if inicializar else 0
+        elif secuencias[prefijo] >= numero:
+            return
+        secuencias[prefijo] = max(secuencias[prefijo], numero)
+        _guardar_secuencias(secuencias)
+
+def siguiente_numero(prefijo, inicializar=None):
+    """Reserva y devuelve el siguiente número del prefijo"""
+    return reservar_bloque(prefijo, 1, inicializar)[0]
+
+def siguiente_codigo(prefijo, inicializar=None):
+    """Reserva y devuelve el siguiente código completo del prefijo"""
+    return formatear_codigo(prefijo, siguiente_numero(prefijo, inicializar))
+
+def ultimo_numero(codigos, prefijos):
+    """Devuelve el mayor número entre los códigos que empiezan con alguno de los prefijos"""
+    prefijos = {prefijo.lower() for prefijo in prefijos}
+    ultimo = 0
+    for codigo in codigos:
+        partes = codigo.split("-")
+        if len(partes) == 2 and partes[0].lower() in prefijos:
+            numero = numero_de_codigo(codigo)
+            if numero is not None and numero > ultimo:
+                ultimo = numero
+    return ultimo
@@ -0,0 +1,727 @@
+"""
+Módulo de servicios del sistema
+Operaciones sobre productos y pedidos sin entrada ni salida por consola
+
+Los menús y la herramienta de lotes usan estas funciones. Cada operación
+valida primero sus datos (si algo no es válido lanza ErrorServicio sin haber
+cambiado nada), luego modifica las estructuras en memoria de la sesión y
+anota los eventos del diario. Nada se guarda hasta llamar a Sesion.confirmar(),
+que aplica esos eventos sobre los datos que hay en disco en ese momento.
+"""
+from datetime import datetime, timedelta
+import inspect
+from itertools import chain
+import math
+
+from modulos.agregados import dia_de
+from modulos.catalogo import obtener_catalogo, normalizar_codigo
+from modulos.diario import evento
+from modulos.gestion_archivos import (
+    cantidad_pedidos_mensuales, cargar_datos, cargar_mes, cargar_pedidos, cargar_detalles_pedidos,
+    cargar_indice_archivo, cargar_pedidos_entre, confirmar_cambios, meses_de_pedido, olvidar_particiones,
+    recargar_datos, usar_particiones, vaciar_cache, ErrorConflicto
+)
+from modulos.indices_pedidos import (
+    FORMATO_FECHA, obtener_indices_pedidos, indexar_pedido, desindexar_pedido, cambiar_estado_pedido
+)
+from modulos.particiones import mes_de
+from modulos.registros import LineaPedido, LineasPedido, Pedido, Producto
+from modulos.repositorio_pedidos import RepositorioPedidos, obtener_repositorio, sincronizar_repositorio
+from modulos.secuencias import (
+    avanzar_hasta, siguiente_codigo, reservar_bloque, formatear_codigo, numero_de_codigo, ultimo_numero
+)
+
+# Estados posibles de un pedido
+ESTADOS_PEDIDO = ("pendiente", "en_proceso", "entregado")
+
+# Prefijo de código de cada categoría de producto
+CATEGORIAS = {"pan": "PAN", "pastel": "PT", "postre": "PS"}
+
+# Prefijos de código por categoría y otros prefijos que se usaron antes
+PREFIJOS_CATEGORIA = {
+    "PAN": ("PAN",),
+    "PT": ("PT", "PASTEL"),
+    "PS": ("PS", "POSTRE"),
+}
+
+# Campos de un producto que se pueden editar directamente
+CAMPOS_EDITABLES = ("nombre", "descripcion", "proveedor", "precio_venta", "precio_proveedor")
+
+
+class ErrorServicio(ValueError):
+    """Error de validación de una operación (el mensaje se puede mostrar al usuario)"""
+
+
+class ErrorNoEncontrado(ErrorServicio):
+    """El producto, pedido o línea indicado no existe"""
+
+
+class Sesion:
+    """Datos cargados y cambios pendientes de una serie de operaciones
+
+    Los archivos se cargan la primera vez que una operación los necesita.
+    Los pedidos con sus detalles se buscan, agregan y eliminan en el
+    repositorio de pedidos; datos_pedidos y datos_detalles devuelven las
+    listas ya al día. confirmar() guarda de una sola vez todo lo hecho desde
+    la última vez.
+
+    Con archivos mensuales, las operaciones sobre un pedido (repositorio_de()
+    y repositorio_para()) cargan solo el mes en que está según el manifiesto,
+    mientras nada haya necesitado todos los pedidos.
+    """
+
+    def __init__(self, datos=None, datos_pedidos=None, datos_detalles=None):
+        self._datos = datos
+        self._datos_pedidos = datos_pedidos
+        self._datos_detalles = datos_detalles
+        self.eventos = []
+        self.modificados = set()
+        # Meses cargados uno a uno: mes -> (datos_pedidos, datos_detalles)
+        self._meses = {}
+
+    @property
+    def datos(self):
+        if self._datos is None:
+            self._datos = cargar_datos()
+        return self._datos
+
+    @property
+    def datos_pedidos(self):
+        if self._datos_pedidos is None:
+            self._soltar_meses()
+            self._datos_pedidos = cargar_pedidos()
+        sincronizar_repositorio()
+        return self._datos_pedidos
+
+    @property
+    def datos_detalles(self):
+        if self._datos_detalles is None:
+            self._soltar_meses()
+            self._datos_detalles = cargar_detalles_pedidos()
+        sincronizar_repositorio()
+        return self._datos_detalles
+
+    @property
+    def repositorio(self):
+        self._soltar_meses()
+        if self._datos_pedidos is None:
+            self._datos_pedidos = cargar_pedidos()
+        if self._datos_detalles is None:
+            self._datos_detalles = cargar_detalles_pedidos()
+        return obtener_repositorio(self._datos_pedidos, self._datos_detalles)
+
+    def _por_meses(self):
+        """Indica si los pedidos se cargan de a un mes (archivos mensuales y nada cargado entero)"""
+        return usar_particiones() and self._datos_pedidos is None and self._datos_detalles is None
+
+    def _soltar_meses(self):
+        """Deja de trabajar mes a mes antes de cargar todos los pedidos
+
+        Los cambios hechos en los meses cargados pasan a sus listas y la unión
+        de todos los meses se vuelve a armar, ya con ellos.
+        """
+        if self._meses:
+            sincronizar_repositorio()
+            olvidar_particiones()
+            self._meses = {}
+
+    def _repositorio_del_mes(self, mes):
+        if mes not in self._meses:
+            self._meses[mes] = cargar_mes(mes)
+        return obtener_repositorio(*self._meses[mes])
+
+    def repositorio_de(self, codigo_pedido):
+        """Repositorio en el que está el pedido
+
+        Con archivos mensuales solo se cargan los meses en los que puede estar
+        según el manifiesto, o los que la sesión ya cargó (puede haberlo
+        creado ella); si no está en ninguno se devuelve un repositorio vacío.
+        """
+        if not self._por_meses():
+            return self.repositorio
+        meses = meses_de_pedido(codigo_pedido)
+        for mes in meses + [mes for mes in self._meses if mes not in meses]:
+            repositorio = self._repositorio_del_mes(mes)
+            if codigo_pedido in repositorio:
+                return repositorio
+        return RepositorioPedidos()
+
+    def repositorio_para(self, pedido):
+        """Repositorio en el que se guarda un pedido nuevo (con archivos mensuales, el de su mes)"""
+        if not self._por_meses():
+            return self.repositorio
+        return self._repositorio_del_mes(mes_de(pedido["fecha_pedido"]))
+
+    def hay_pedidos(self):
+        """Indica si hay algún pedido; con archivos mensuales se mira el manifiesto sin cargarlos"""
+        if self._por_meses():
+            return cantidad_pedidos_mensuales() > 0
+        return bool(self.datos_pedidos["pedidos"])
+
+    @property
+    def catalogo(self):
+        return obtener_catalogo(self.datos)
+
+    @property
+    def indices(self):
+        return obtener_indices_pedidos(self.datos_pedidos)
+
+    def detalles_de(self, codigo_pedido):
+        """Devuelve el bloque de detalles de un pedido o None"""
+        return self.repositorio_de(codigo_pedido).detalles(codigo_pedido)
+
+    def registrar(self, eventos, *archivos):
+        """Anota los eventos de una operación y los archivos que modificó"""
+        self.eventos.extend(eventos)
+        self.modificados.update(archivos)
+
+    def hay_cambios(self):
+        return bool(self.eventos or self.modificados)
+
+    def confirmar(self, descartar_si_falla=True):
+        """Guarda todos los cambios de la sesión en una sola operación
+
+        Los eventos se aplican sobre lo que hay en disco (con el bloqueo entre
+        procesos tomado), así no se pisan los cambios que otra terminal guardó
+        mientras tanto; después la sesión queda con esos datos actuales (si
+        nadie escribió desde que los cargó, son los mismos que ya tenía). Si
+        otra terminal vendió el stock que esta sesión usó (o guardó un pedido
+        con el mismo código), no se guarda nada, se descartan los cambios y
+        se lanza ErrorServicio. Cualquier otro fallo (disco, bloqueo...)
+        también descarta los cambios antes de propagarse, para que no queden
+        en memoria datos que no se guardaron.
+
+        Con descartar_si_falla=False el error se propaga sin tocar la memoria
+        ni la caché: lo usa el escritor del servidor, que guarda en otro hilo
+        y deja el descarte a la sesión del bucle.
+        """
+        if not self.eventos:
+            self.modificados = set()
+            return
+        if self.modificados & {"pedidos", "detalles"}:
+            # Los cambios del repositorio pasan antes a las listas en memoria
+            sincronizar_repositorio()
+        try:
+            actuales = confirmar_cambios(
+                self.eventos,
+                self._datos_pedidos if "pedidos" in self.modificados else None,
+                self._datos_detalles if "detalles" in self.modificados else None,
+                self._datos if "datos" in self.modificados else None,
+                self._meses,
+            )
+        except ErrorConflicto as error:
+            if descartar_si_falla:
+                self.descartar_cambios()
+            raise ErrorServicio(str(error))
+        except Exception:
+            if descartar_si_falla:
+                self.descartar_cambios()
+            raise
+
+        # Los productos se reemplazan en el mismo diccionario, que puede ser
+        # el del menú principal; lo que no se releyó sigue siendo lo de la
+        # sesión, con sus índices
+        if "datos" in actuales and self._datos is not None and actuales["datos"] is not self._datos:
+            self._datos.clear()
+            self._datos.update(actuales["datos"])
+        if "pedidos" in actuales and self._datos_pedidos is not None:
+            self._datos_pedidos = actuales["pedidos"]
+        if "detalles" in actuales and self._datos_detalles is not None:
+            self._datos_detalles = actuales["detalles"]
+        # Los meses guardados quedaron en la caché; los demás se vuelven a pedir
+        self._meses = {}
+        self.eventos = []
+        self.modificados = set()
+
+    def descartar_cambios(self):
+        """Olvida los cambios sin guardar y vuelve a leer lo que hay en disco"""
+        # Las estructuras en memoria pueden ser las mismas de la caché de
+        # lectura: se vacía antes, para que recargar_datos() sí vuelva a leer
+        vaciar_cache()
+        if self._datos is not None:
+            recargar_datos(self._datos)
+        self._datos_pedidos = None
+        self._datos_detalles = None
+        self._meses = {}
+        self.eventos = []
+        self.modificados = set()
+
+# Validaciones
+
+def _validar_cantidad(cantidad):
+    """Verifica que la cantidad sea un entero mayor a cero"""
+    if isinstance(cantidad, bool) or not isinstance(cantidad, int):
+        raise ErrorServicio("La cantidad debe ser un número entero")
+    if cantidad <= 0:
+        raise ErrorServicio("La cantidad debe ser mayor a cero")
+
+def _validar_precio(precio, nombre_campo):
+    """Verifica que un precio sea un número finito no negativo"""
+    if isinstance(precio, bool) or not isinstance(precio, (int, float)):
+        raise ErrorServicio(f"El campo {nombre_campo} debe ser un número")
+    if not math.isfinite(precio):
+        raise ErrorServicio(f"El campo {nombre_campo} debe ser un número finito")
+    if precio < 0:
+        raise ErrorServicio(f"El campo {nombre_campo} no puede ser negativo")
+
+def _validar_codigo_cliente(codigo_cliente):
+    """Verifica que el código de cliente sea un texto no vacío"""
+    if not isinstance(codigo_cliente, str) or not codigo_cliente.strip():
+        raise ErrorServicio("El código de cliente debe ser un texto no vacío")
+
+def _leer_linea(linea):
+    """Acepta una línea como {"codigo_producto", "cantidad"} o como par (código, cantidad)"""
+    if isinstance(linea, dict):
+        try:
+            codigo_producto, cantidad = linea["codigo_producto"], linea["cantidad"]
+        except KeyError as error:
+            raise ErrorServicio(f"Falta el campo {error.args[0]} en una línea del pedido")
+    else:
+        try:
+            codigo_producto, cantidad = linea
+        except (TypeError, ValueError):
+            raise ErrorServicio("Cada línea del pedido debe tener código de producto y cantidad")
+    if not isinstance(codigo_producto, str):
+        raise ErrorServicio("El código de producto debe ser un texto")
+    return codigo_producto, cantidad
+
+def _ajustar_stock(sesion, producto, delta):
+    """Suma delta al stock de un producto y mueve el producto en el índice de stock"""
+    producto["cantidad_en_stock"] += delta
+    sesion.catalogo.actualizar_stock(producto)
+
+def obtener_producto(sesion, codigo_producto):
+    """Devuelve el producto con ese código"""
+    if not isinstance(codigo_producto, str):
+        raise ErrorServicio("El código de producto debe ser un texto")
+    producto = sesion.catalogo.buscar(codigo_producto)
+    if producto is None:
+        raise ErrorNoEncontrado(f"Producto no encontrado: {codigo_producto}")
+    return producto
+
+def verificar_linea(sesion, codigo_producto, cantidad, reservado=0):
+    """Valida una línea nueva y devuelve su producto
+
+    reservado es la cantidad del mismo producto ya apartada para el pedido
+    que todavía no se descontó del stock.
+    """
+    producto = obtener_producto(sesion, codigo_producto)
+    _validar_cantidad(cantidad)
+    disponible = producto["cantidad_en_stock"] - reservado
+    if cantidad > disponible:
+        raise ErrorServicio(f"No hay suficiente stock de {producto['codigo_producto']}. Disponible: {disponible}")
+    return producto
+
+def obtener_pedido(sesion, codigo_pedido):
+    """Devuelve el pedido y su bloque de detalles"""
+    pedido, detalles = sesion.repositorio_de(codigo_pedido).obtener(codigo_pedido)
+    if pedido is None:
+        raise ErrorNoEncontrado(f"Pedido no encontrado: {codigo_pedido}")
+    if detalles is None:
+        raise ErrorNoEncontrado(f"Detalles del pedido no encontrados: {codigo_pedido}")
+    return pedido, detalles
+
+def obtener_linea(sesion, codigo_pedido, numero_linea):
+    """Devuelve el pedido, su bloque de detalles y la línea con ese numero_linea"""
+    pedido, detalles = obtener_pedido(sesion, codigo_pedido)
+    detalle = detalles["detalles"].get(numero_linea)
+    if detalle is None:
+        raise ErrorNoEncontrado(f"Línea de producto no encontrada: {numero_linea}")
+    return pedido, detalles, detalle
+
+# Pedidos
+
+def _evento_agregados(pedido, ventas=(), estados=None):
+    """Evento con lo que una operación suma o resta a los agregados de ventas
+
+    ventas es una lista de (codigo_producto, unidades, ingresos) y estados
+    un diccionario estado -> cambio en la cantidad de pedidos.
+    """
+    return evento("agregados", dia=dia_de(pedido), ventas=list(ventas), estados=estados or {})
+
+def _ultimo_numero_pedido(datos):
+    """Mayor número de código "PED" entre los pedidos, contando también los archivados"""
+    return ultimo_numero(
+        chain((pedido["codigo_pedido"] for pedido in datos["pedidos"]), cargar_indice_archivo()["pedidos"]),
+        ("PED",)
+    )
+
+def generar_codigo_pedido(datos):
+    """Genera un código único para el pedido"""
+    # Tomamos el siguiente número de la secuencia de pedidos; la primera vez
+    # se parte del mayor código existente, contando también los archivados
+    return siguiente_codigo("PED", lambda: _ultimo_numero_pedido(datos))
+
+def _codigo_pedido_usado(sesion, codigo_pedido):
+    """Indica si el código ya es de un pedido, activo o archivado"""
+    return (codigo_pedido in sesion.repositorio_de(codigo_pedido)
+            or codigo_pedido in cargar_indice_archivo()["pedidos"])
+
+def _reservar_codigo_pedido(sesion, codigo_pedido, reservado=False):
+    """Devuelve el código del pedido nuevo: el indicado (ya validado) o el siguiente libre
+
+    Un código "PED-N" indicado hace avanzar la secuencia hasta N, para que
+    ningún código generado después lo repita, salvo que ya se haya tomado
+    de la secuencia (reservado). Un código generado que ya estuviera usado
+    (por un pedido anterior a ese avance) se salta. Los pedidos solo se
+    cargan si la secuencia todavía no existe.
+    """
+    def ultimo():
+        return _ultimo_numero_pedido(sesion.datos_pedidos)
+
+    if codigo_pedido is not None:
+        if reservado:
+            return codigo_pedido
+        numero = numero_de_codigo(codigo_pedido)
+        if numero is not None and codigo_pedido.rsplit("-", 1)[0].upper() == "PED":
+            avanzar_hasta("PED", numero, ultimo)
+        return codigo_pedido
+
+    codigo_pedido = siguiente_codigo("PED", ultimo)
+    while _codigo_pedido_usado(sesion, codigo_pedido):
+        codigo_pedido = siguiente_codigo("PED", ultimo)
+    return codigo_pedido
+
+def crear_pedido(sesion, codigo_cliente, lineas=(), codigo_pedido=None, reservado=False):
+    """Crea un pedido con sus líneas y descuenta el stock; devuelve el pedido
+
+    codigo_pedido permite usar un código elegido a mano (la secuencia "PED"
+    avanza hasta él) o, con reservado=True, uno ya tomado de la secuencia,
+    que no necesita volver a leerla; si no se indica se toma el siguiente
+    libre.
+    """
+    _validar_codigo_cliente(codigo_cliente)
+    if not isinstance(lineas, (list, tuple)):
+        raise ErrorServicio("Las líneas del pedido deben ser una lista")
+    if codigo_pedido is not None and not isinstance(codigo_pedido, str):
+        raise ErrorServicio("El código de pedido debe ser un texto")
+    if codigo_pedido is not None and _codigo_pedido_usado(sesion, codigo_pedido):
+        raise ErrorServicio(f"Ya existe un pedido con el código {codigo_pedido}")
+    # Validamos todas las líneas antes de modificar nada
+    reservas = {}
+    validadas = []
+    for linea in lineas:
+        codigo_producto, cantidad = _leer_linea(linea)
+        clave = normalizar_codigo(codigo_producto)
+        producto = verificar_linea(sesion, codigo_producto, cantidad, reservas.get(clave, 0))
+        reservas[clave] = reservas.get(clave, 0) + cantidad
+        validadas.append((producto, cantidad))
+
+    pedido = Pedido(
+        codigo_pedido=_reservar_codigo_pedido(sesion, codigo_pedido, reservado),
+        codigo_cliente=codigo_cliente,
+        fecha_pedido=datetime.now().strftime(FORMATO_FECHA),
+        estado="pendiente",
+        total=0.0
+    )
+    detalles_pedido = {
+        "codigo_pedido": pedido["codigo_pedido"],
+        "detalles": LineasPedido()
+    }
+
+    # Cambios de stock por producto, para registrarlos como deltas
+    cambios_stock = {}
+    for producto, cantidad in validadas:
+        subtotal = cantidad * producto["precio_venta"]
+        detalles_pedido["detalles"].agregar(LineaPedido(
+            numero_linea=detalles_pedido["detalles"].siguiente_numero(),
+            codigo_producto=producto["codigo_producto"],
+            cantidad=cantidad,
+            precio_unidad=producto["precio_venta"],
+            subtotal=subtotal
+        ))
+        _ajustar_stock(sesion, producto, -cantidad)
+        codigo_stock = producto["codigo_producto"]
+        cambios_stock[codigo_stock] = cambios_stock.get(codigo_stock, 0) - cantidad
+        pedido["total"] += subtotal
+
+    repositorio = sesion.repositorio_para(pedido)
+    repositorio.guardar(pedido, detalles_pedido)
+    indexar_pedido(repositorio.datos_pedidos, pedido)
+
+    eventos = [evento("crear_pedido", pedido=pedido, detalles=detalles_pedido)]
+    eventos += [
+        evento("stock", codigo_producto=codigo_stock, delta=delta)
+        for codigo_stock, delta in cambios_stock.items()
+    ]
+    eventos.append(_evento_agregados(
+        pedido,
+        [(linea["codigo_producto"], linea["cantidad"], linea["subtotal"]) for linea in detalles_pedido["detalles"]],
+        {"pendiente": 1},
+    ))
+    sesion.registrar(eventos, "datos", "pedidos", "detalles")
+    return pedido
+
+def agregar_linea(sesion, codigo_pedido, codigo_producto, cantidad):
+    """Agrega un producto a un pedido existente; devuelve la línea creada"""
+    pedido, detalles = obtener_pedido(sesion, codigo_pedido)
+    producto = verificar_linea(sesion, codigo_producto, cantidad)
+
+    subtotal = cantidad * producto["precio_venta"]
+    detalle = LineaPedido(
+        numero_linea=detalles["detalles"].siguiente_numero(),
+        codigo_producto=producto["codigo_producto"],
+        cantidad=cantidad,
+        precio_unidad=producto["precio_venta"],
+        subtotal=subtotal
+    )
+    _ajustar_stock(sesion, producto, -cantidad)
+    detalles["detalles"].agregar(detalle)
+    pedido["total"] += subtotal
+
+    sesion.registrar([
+        evento("agregar_linea", codigo_pedido=codigo_pedido, linea=detalle, total=pedido["total"]),
+        evento("stock", codigo_producto=detalle["codigo_producto"], delta=-cantidad),
+        _evento_agregados(pedido, [(detalle["codigo_producto"], cantidad, subtotal)]),
+    ], "datos", "pedidos", "detalles")
+    return detalle
+
+def cambiar_cantidad(sesion, codigo_pedido, numero_linea, cantidad):
+    """Cambia la cantidad de una línea ajustando el stock; devuelve la línea"""
+    pedido, _, detalle = obtener_linea(sesion, codigo_pedido, numero_linea)
+    producto = sesion.catalogo.buscar(detalle["codigo_producto"])
+    if producto is None:
+        raise ErrorNoEncontrado(f"Producto no encontrado en inventario: {detalle['codigo_producto']}")
+    _validar_cantidad(cantidad)
+
+    # El stock disponible incluye lo que ya tenía apartado la línea
+    stock_disponible = producto["cantidad_en_stock"] + detalle["cantidad"]
+    if cantidad > stock_disponible:
+        raise ErrorServicio(f"No hay suficiente stock. Disponible: {stock_disponible}")
+
+    diferencia = cantidad - detalle["cantidad"]
+    subtotal_anterior = detalle["subtotal"]
+    _ajustar_stock(sesion, producto, -diferencia)
+    pedido["total"] -= detalle["subtotal"]
+    detalle["cantidad"] = cantidad
+    detalle["subtotal"] = cantidad * detalle["precio_unidad"]
+    pedido["total"] += detalle["subtotal"]
+
+    sesion.registrar([
+        evento("cambiar_cantidad", codigo_pedido=codigo_pedido, numero_linea=numero_linea,
+               cantidad=cantidad, subtotal=detalle["subtotal"], total=pedido["total"]),
+        evento("stock", codigo_producto=producto["codigo_producto"], delta=-diferencia),
+        _evento_agregados(pedido, [(detalle["codigo_producto"], diferencia,
+                                    detalle["subtotal"] - subtotal_anterior)]),
+    ], "datos", "pedidos", "detalles")
+    return detalle
+
+def eliminar_linea(sesion, codigo_pedido, numero_linea):
+    """Quita una línea de un pedido y devuelve su stock; devuelve la línea quitada
+
+    Las demás líneas conservan su numero_linea.
+    """
+    pedido, detalles, detalle = obtener_linea(sesion, codigo_pedido, numero_linea)
+
+    eventos = []
+    producto = sesion.catalogo.buscar(detalle["codigo_producto"])
+    if producto is not None:
+        _ajustar_stock(sesion, producto, detalle["cantidad"])
+        eventos.append(evento("stock", codigo_producto=producto["codigo_producto"],
+                              delta=detalle["cantidad"]))
+
+    pedido["total"] -= detalle["subtotal"]
+    detalles["detalles"].quitar(numero_linea)
+
+    eventos.append(evento("eliminar_linea", codigo_pedido=codigo_pedido, numero_linea=numero_linea,
+                          total=pedido["total"], renumerar=False))
+    eventos.append(_evento_agregados(pedido, [(detalle["codigo_producto"], -detalle["cantidad"],
+                                               -detalle["subtotal"])]))
+    sesion.registrar(eventos, "datos", "pedidos", "detalles")
+    return detalle
+
+def cambiar_estado(sesion, codigo_pedido, estado):
+    """Cambia el estado de un pedido"""
+    if estado not in ESTADOS_PEDIDO:
+        raise ErrorServicio(f"Estado no válido: {estado}")
+    repositorio = sesion.repositorio_de(codigo_pedido)
+    pedido = repositorio.pedido(codigo_pedido)
+    if pedido is None:
+        raise ErrorNoEncontrado(f"Pedido no encontrado: {codigo_pedido}")
+
+    estado_anterior = pedido["estado"]
+    # Cambiamos el estado también en el índice por estado, si está construido
+    cambiar_estado_pedido(repositorio.datos_pedidos, pedido, estado)
+    eventos = [evento("cambiar_estado", codigo_pedido=codigo_pedido, estado=estado)]
+    if estado != estado_anterior:
+        eventos.append(_evento_agregados(pedido, estados={estado_anterior: -1, estado: 1}))
+    sesion.registrar(eventos, "pedidos")
+    return pedido
+
+def eliminar_pedido(sesion, codigo_pedido):
+    """Elimina un pedido y sus detalles; devuelve el pedido eliminado"""
+    repositorio = sesion.repositorio_de(codigo_pedido)
+    if codigo_pedido not in repositorio:
+        raise ErrorNoEncontrado(f"Pedido no encontrado: {codigo_pedido}")
+
+    # Eliminamos el pedido con sus detalles
+    pedido, detalles_pedido = repositorio.eliminar(codigo_pedido)
+    desindexar_pedido(repositorio.datos_pedidos, pedido)
+
+    # Las ventas del pedido se restan de los agregados
+    lineas = detalles_pedido["detalles"] if detalles_pedido is not None else []
+    evento_agregados = _evento_agregados(
+        pedido,
+        [(linea["codigo_producto"], -linea["cantidad"], -linea["subtotal"]) for linea in lineas],
+        {pedido["estado"]: -1},
+    )
+
+    sesion.registrar([evento("eliminar_pedido", codigo_pedido=codigo_pedido), evento_agregados],
+                     "pedidos", "detalles")
+    return pedido
+
+# Consultas de pedidos
+
+def pedidos_de_cliente(sesion, codigo_cliente):
+    """Devuelve los pedidos de un cliente"""
+    return sesion.indices.de_cliente(codigo_cliente)
+
+def pedidos_por_estado(sesion, estado):
+    """Devuelve los pedidos que están en un estado"""
+    return sesion.indices.con_estado(estado)
+
+def pedidos_entre_fechas(sesion, desde, hasta):
+    """Devuelve los pedidos con fecha en [desde, hasta), ordenados por fecha"""
+    if sesion._datos_pedidos is None and usar_particiones():
+        # Sin los pedidos en memoria basta abrir los meses del rango
+        return cargar_pedidos_entre(desde, hasta)
+    return sesion.indices.entre_fechas(desde, hasta)
+
+def pedidos_de_hoy(sesion):
+    """Devuelve los pedidos realizados hoy"""
+    hoy = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return pedidos_entre_fechas(sesion, hoy, hoy + timedelta(days=1))
+
+# Productos
+
+def reservar_codigos_producto(datos, categoria, cantidad):
+    """Reserva cantidad códigos consecutivos para productos de la categoría"""
+    codigo_categoria = CATEGORIAS[categoria]
+    # Tomamos los siguientes números de la secuencia de la categoría; la
+    # primera vez se parte del mayor código existente en el catálogo
+    numeros = reservar_bloque(
+        codigo_categoria,
+        cantidad,
+        lambda: ultimo_numero(
+            (producto["codigo_producto"] for producto in datos["productos"]),
+            PREFIJOS_CATEGORIA[codigo_categoria]
+        )
+    )
+    return [formatear_codigo(codigo_categoria, numero) for numero in numeros]
+
+def generar_codigo_producto(datos, categoria):
+    """Genera un código único para un producto de la categoría"""
+    return reservar_codigos_producto(datos, categoria, 1)[0]
+
+def agregar_producto(sesion, categoria, nombre, descripcion, proveedor,
+                     cantidad_en_stock, precio_venta, precio_proveedor, codigo_producto=None):
+    """Agrega un producto al catálogo; devuelve el producto con su código
+
+    Si no se indica codigo_producto se toma el siguiente de la categoría.
+    """
+    if codigo_producto is not None:
+        if not isinstance(codigo_producto, str) or not codigo_producto.strip():
+            raise ErrorServicio("El código de producto debe ser un texto")
+        if codigo_producto in sesion.catalogo:
+            raise ErrorServicio(f"Ya existe un producto con el código {codigo_producto}")
+    if categoria not in CATEGORIAS:
+        raise ErrorServicio(f"Categoría no válida: {categoria}")
+    if isinstance(cantidad_en_stock, bool) or not isinstance(cantidad_en_stock, int) or cantidad_en_stock < 0:
+        raise ErrorServicio("La cantidad en stock debe ser un entero no negativo")
+    _validar_precio(precio_venta, "precio_venta")
+    _validar_precio(precio_proveedor, "precio_proveedor")
+
+    producto = Producto(
+        codigo_producto=codigo_producto or generar_codigo_producto(sesion.datos, categoria),
+        nombre=nombre,
+        categoria=categoria,
+        descripcion=descripcion,
+        proveedor=proveedor,
+        cantidad_en_stock=cantidad_en_stock,
+        precio_venta=precio_venta,
+        precio_proveedor=precio_proveedor
+    )
+    # Agregamos el producto al catálogo (lista e índice por código)
+    sesion.catalogo.agregar(producto)
+    sesion.registrar([evento("agregar_producto", producto=producto)], "datos")
+    return producto
+
+def editar_producto(sesion, codigo_producto, ajuste_stock=0, **campos):
+    """Edita los campos de un producto y ajusta su stock; devuelve el producto
+
+    ajuste_stock se suma al stock actual (negativo para quitar unidades).
+    """
+    producto = obtener_producto(sesion, codigo_producto)
+    for campo in campos:
+        if campo not in CAMPOS_EDITABLES:
+            raise ErrorServicio(f"Campo no editable: {campo}")
+    for campo in ("precio_venta", "precio_proveedor"):
+        if campo in campos:
+            _validar_precio(campos[campo], campo)
+    if isinstance(ajuste_stock, bool) or not isinstance(ajuste_stock, int):
+        raise ErrorServicio("El ajuste de stock debe ser un número entero")
+    if producto["cantidad_en_stock"] + ajuste_stock < 0:
+        raise ErrorServicio(f"No se pueden quitar {-ajuste_stock} unidades. Disponible: {producto['cantidad_en_stock']}")
+
+    producto.update(campos)
+    # Actualizamos los índices del catálogo con los nuevos datos
+    sesion.catalogo.actualizar(producto)
+
+    # El ajuste de stock se registra como delta, igual que en los pedidos
+    eventos = []
+    if campos:
+        eventos.append(evento("editar_producto", codigo_producto=producto["codigo_producto"], campos=campos))
+    if ajuste_stock:
+        _ajustar_stock(sesion, producto, ajuste_stock)
+        eventos.append(evento("stock", codigo_producto=producto["codigo_producto"], delta=ajuste_stock))
+    sesion.registrar(eventos, "datos")
+    return producto
+
+def eliminar_producto(sesion, codigo_producto):
+    """Elimina un producto del catálogo; devuelve el producto eliminado"""
+    producto = obtener_producto(sesion, codigo_producto)
+    sesion.catalogo.eliminar(producto["codigo_producto"])
+    sesion.registrar([evento("eliminar_producto", codigo_producto=producto["codigo_producto"])], "datos")
+    return producto
+
+def productos_para_reabastecer(sesion):
+    """Productos con menos stock que su mínimo agrupados por proveedor
+
+    Devuelve proveedor -> [productos], el más urgente primero; los proveedores
+    van en el orden de su producto más urgente. Usa el índice de stock del
+    catálogo, sin recorrer los productos que tienen stock suficiente.
+    """
+    por_proveedor = {}
+    for producto in sesion.catalogo.bajo_minimo():
+        por_proveedor.setdefault(producto["proveedor"], []).append(producto)
+    return por_proveedor
+
+# Comandos por lotes
+
+# Operaciones disponibles para la herramienta de lotes
+OPERACIONES = {
+    "crear_pedido": crear_pedido,
+    "agregar_linea": agregar_linea,
+    "cambiar_cantidad": cambiar_cantidad,
+    "eliminar_linea": eliminar_linea,
+    "cambiar_estado": cambiar_estado,
+    "eliminar_pedido": eliminar_pedido,
+    "agregar_producto": agregar_producto,
+    "editar_producto": editar_producto,
+    "eliminar_producto": eliminar_producto,
+}
+
+def aplicar_comando(sesion, comando):
+    """Aplica un comando {"operacion": ..., parámetros...} y devuelve su resultado"""
+    if not isinstance(comando, dict):
+        raise ErrorServicio("Cada comando debe ser un objeto JSON")
+    parametros = dict(comando)
+    nombre = parametros.pop("operacion", None)
+    funcion = OPERACIONES.get(nombre)
+    if funcion is None:
+        raise ErrorServicio(f"Operación desconocida: {nombre}")
+    try:
+        inspect.signature(funcion).bind(sesion, **parametros)
+    except TypeError as error:
+        raise ErrorServicio(f"Parámetros no válidos para {nombre}: {error}")
+    return funcion(sesion, **parametros)
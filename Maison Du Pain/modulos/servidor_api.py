@@ -0,0 +1,471 @@
+"""
+Módulo del servidor HTTP/JSON de Maison du Pain
+API local para que varias tabletas de venta usen los mismos datos
+
+Usa solo asyncio de la biblioteca estándar. Los datos se cargan una vez en
+memoria y las consultas se responden desde ahí, sin esperar al disco. Las
+operaciones que cambian datos se aplican en memoria con los servicios y se
+guardan en segundo plano: un escritor junta los cambios pendientes y los
+confirma de una sola vez en un hilo aparte, y la respuesta se envía cuando
+los cambios ya están guardados.
+
+Las operaciones que descuentan stock toman un asyncio.Lock por producto (y
+otro por pedido) hasta que su cambio queda guardado, de modo que dos ventas
+del mismo producto nunca se validan contra el mismo stock. Si una operación
+falla con un error inesperado (no de validación), la memoria puede haber
+quedado a medio cambiar: se guarda lo que las demás ya habían registrado y
+se vuelve a leer todo del disco.
+
+Rutas:
+    GET    /productos?q=texto&pagina=1&tamano=20
+    GET    /productos/<codigo>
+    GET    /pedidos?q=texto | ?cliente=<codigo> | ?estado=<estado>
+    GET    /pedidos/<codigo>
+    POST   /pedidos                      {"codigo_cliente", "lineas": [...]}
+    PATCH  /pedidos/<codigo>             {"estado"}
+    DELETE /pedidos/<codigo>
+    POST   /pedidos/<codigo>/lineas      {"codigo_producto", "cantidad"}
+    PATCH  /pedidos/<codigo>/lineas/<n>  {"cantidad"}
+    DELETE /pedidos/<codigo>/lineas/<n>
+"""
+import asyncio
+import json
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from modulos import servicios
+from modulos.registros import a_json
+from modulos.secuencias import reservar_bloque, formatear_codigo, ultimo_numero
+from modulos.servicios import Sesion, ErrorServicio, ErrorNoEncontrado
+
+HOST_POR_DEFECTO = "127.0.0.1"
+PUERTO_POR_DEFECTO = 8080
+
+# Tamaño máximo del cuerpo de una petición
+TAMANO_MAXIMO_CUERPO = 1024 * 1024
+
+# Códigos de pedido que se reservan de una vez para no tocar el disco en cada alta
+BLOQUE_CODIGOS_PEDIDO = 50
+
+TEXTOS_ESTADO = {
+    200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+}
+
+
+class ErrorHTTP(Exception):
+    """Error que se responde con un código HTTP y un mensaje"""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _copiar(valor):
+    """Copia independiente de una estructura JSON (para usarla en otro hilo)"""
+    return json.loads(json.dumps(valor))
+
+
+class ServidorPanaderia:
+    """Estado del servidor: datos en memoria, bloqueos y escritor en segundo plano"""
+
+    def __init__(self, sesion=None):
+        self.sesion = sesion or Sesion()
+        # Cargamos todo antes de atender peticiones
+        self.sesion.datos
+        self.sesion.datos_pedidos
+        self.sesion.datos_detalles
+        self._bloqueos = {}
+        self._codigos_pedido = []
+        self._esperando_guardado = []
+        # Una operación falló a medio camino: después de guardar se descarta la memoria
+        self._descartar = False
+        self._hay_cambios = None
+        self._tarea_escritor = None
+        self.guardados = 0
+
+    # Bloqueos por producto y por pedido
+
+    def _bloqueo(self, clave):
+        bloqueo = self._bloqueos.get(clave)
+        if bloqueo is None:
+            bloqueo = self._bloqueos[clave] = asyncio.Lock()
+        return bloqueo
+
+    async def _tomar_bloqueos(self, claves):
+        """Toma los bloqueos en orden fijo para que dos operaciones no se esperen mutuamente"""
+        tomados = []
+        try:
+            for clave in sorted(set(claves)):
+                bloqueo = self._bloqueo(clave)
+                await bloqueo.acquire()
+                tomados.append(bloqueo)
+        except BaseException:
+            for bloqueo in tomados:
+                bloqueo.release()
+            raise
+        return tomados
+
+    @staticmethod
+    def _soltar_bloqueos(tomados):
+        for bloqueo in reversed(tomados):
+            bloqueo.release()
+
+    # Guardado en segundo plano
+
+    def iniciar(self):
+        """Arranca el escritor; se llama dentro del bucle de asyncio"""
+        self._hay_cambios = asyncio.Event()
+        self._tarea_escritor = asyncio.create_task(self._escritor())
+
+    async def detener(self):
+        """Espera a que se guarde lo pendiente y detiene el escritor"""
+        if self._tarea_escritor is not None:
+            await self._esperar_guardado()
+            self._tarea_escritor.cancel()
+            try:
+                await self._tarea_escritor
+            except asyncio.CancelledError:
+                pass
+
+    def _capturar_cambios(self):
+        """Pasa los eventos pendientes a una sesión aparte
+
+        confirmar() aplica los eventos sobre lo que hay en disco, así el hilo
+        que guarda no necesita las estructuras que el bucle sigue modificando:
+        la copia no tiene datos cargados, de modo que no toca el repositorio
+        ni los índices, y las cachés de gestion_archivos que sí actualiza
+        están protegidas por su propio bloqueo.
+        """
+        sesion = self.sesion
+        copia = Sesion()
+        copia.eventos = _copiar(sesion.eventos)
+        sesion.eventos = []
+        sesion.modificados = set()
+        return copia
+
+    async def _escritor(self):
+        """Confirma juntos todos los cambios que se acumularon desde la última vez"""
+        bucle = asyncio.get_running_loop()
+        while True:
+            await self._hay_cambios.wait()
+            self._hay_cambios.clear()
+            esperando, self._esperando_guardado = self._esperando_guardado, []
+            descartar, self._descartar = self._descartar, False
+            copia = self._capturar_cambios()
+            try:
+                # En el hilo solo se guarda: si falla, la memoria y la caché
+                # se descartan aquí, en el bucle, que es quien las usa
+                await bucle.run_in_executor(None, copia.confirmar, False)
+                self.guardados += 1
+            except Exception as error:
+                # Lo que está en memoria ya no coincide con el disco (por
+                # ejemplo, otra terminal vendió ese stock): se descarta todo
+                # lo que no se guardó y se vuelve a leer
+                self._descartar_memoria(esperando, error)
+                continue
+            for futuro in esperando:
+                if not futuro.done():
+                    futuro.set_result(None)
+            if descartar:
+                # Lo registrado antes del error ya quedó guardado; lo que se
+                # registró mientras se guardaba se pierde al volver a leer
+                self._descartar_memoria([], RuntimeError(
+                    "los cambios no se guardaron: otra operación falló y se volvieron a leer los datos"
+                ))
+
+    def _descartar_memoria(self, esperando, error):
+        """Vuelve a leer los datos del disco y rechaza las operaciones que no se guardaron"""
+        esperando += self._esperando_guardado
+        self._esperando_guardado = []
+        self.sesion.descartar_cambios()
+        for futuro in esperando:
+            if not futuro.done():
+                futuro.set_exception(error)
+
+    async def _esperar_guardado(self, descartar=False):
+        """Pide al escritor que guarde lo pendiente y espera a que termine
+
+        Con descartar=True, después de guardar se vuelve a leer todo del disco.
+        """
+        futuro = asyncio.get_running_loop().create_future()
+        self._esperando_guardado.append(futuro)
+        self._descartar = self._descartar or descartar
+        self._hay_cambios.set()
+        await futuro
+
+    async def _siguiente_codigo_pedido(self):
+        """Toma un código de pedido del bloque reservado (reservando otro si se acabó)"""
+        if not self._codigos_pedido:
+            datos_pedidos = self.sesion.datos_pedidos
+            numeros = await asyncio.get_running_loop().run_in_executor(
+                None, reservar_bloque, "PED", BLOQUE_CODIGOS_PEDIDO,
+                lambda: ultimo_numero((p["codigo_pedido"] for p in list(datos_pedidos["pedidos"])), ("PED",))
+            )
+            if not self._codigos_pedido:
+                self._codigos_pedido = [formatear_codigo("PED", numero) for numero in reversed(numeros)]
+        return self._codigos_pedido.pop()
+
+    async def _modificar(self, claves, operacion):
+        """Aplica una operación con sus bloqueos tomados y espera a que quede guardada"""
+        tomados = await self._tomar_bloqueos(claves)
+        try:
+            return await self._aplicar(operacion)
+        finally:
+            self._soltar_bloqueos(tomados)
+
+    async def _aplicar(self, operacion):
+        """Aplica una operación y espera a que quede guardada
+
+        Un ErrorServicio se lanza antes de cambiar nada. Cualquier otro error
+        puede dejar la memoria a medio cambiar, así que se guarda lo que ya
+        estaba registrado y se descarta el resto antes de propagarlo.
+        """
+        try:
+            resultado = operacion()
+        except ErrorServicio:
+            raise
+        except Exception:
+            await self._esperar_guardado(descartar=True)
+            raise
+        await self._esperar_guardado()
+        return resultado
+
+    # Operaciones de la API
+
+    def listar_productos(self, consulta):
+        catalogo = self.sesion.catalogo
+        texto = consulta.get("q", "")
+        productos = catalogo.buscar_texto(texto) if texto else catalogo
+        pagina = max(1, _entero(consulta.get("pagina", "1"), "pagina"))
+        tamano = min(500, max(1, _entero(consulta.get("tamano", "20"), "tamano")))
+        inicio = (pagina - 1) * tamano
+        return {
+            "total": len(productos),
+            "pagina": pagina,
+            "productos": list(productos[inicio:inicio + tamano]),
+        }
+
+    def obtener_producto(self, codigo):
+        return servicios.obtener_producto(self.sesion, codigo)
+
+    def listar_pedidos(self, consulta):
+        sesion = self.sesion
+        if "cliente" in consulta:
+            pedidos = servicios.pedidos_de_cliente(sesion, consulta["cliente"])
+        elif "estado" in consulta:
+            pedidos = servicios.pedidos_por_estado(sesion, consulta["estado"])
+        elif consulta.get("q"):
+            pedidos = sesion.indices.buscar_texto(consulta["q"])
+        else:
+            pedidos = sesion.datos_pedidos["pedidos"]
+        return {"total": len(pedidos), "pedidos": list(pedidos[:500])}
+
+    def obtener_pedido(self, codigo):
+        pedido, detalles = servicios.obtener_pedido(self.sesion, codigo)
+        return dict(pedido.items(), detalles=detalles["detalles"])
+
+    async def crear_pedido(self, cuerpo):
+        codigo_cliente = cuerpo.get("codigo_cliente")
+        servicios._validar_codigo_cliente(codigo_cliente)
+        lineas = cuerpo.get("lineas", [])
+        if not isinstance(lineas, list):
+            raise ErrorServicio("lineas debe ser una lista")
+        codigos = [servicios._leer_linea(linea)[0] for linea in lineas]
+        codigo_pedido = await self._siguiente_codigo_pedido()
+        pedido = await self._modificar(
+            [("producto", servicios.normalizar_codigo(codigo)) for codigo in codigos],
+            lambda: servicios.crear_pedido(
+                self.sesion, codigo_cliente, lineas, codigo_pedido=codigo_pedido, reservado=True
+            )
+        )
+        return self.obtener_pedido(pedido["codigo_pedido"])
+
+    async def cambiar_estado(self, codigo, cuerpo):
+        await self._modificar(
+            [("pedido", codigo)],
+            lambda: servicios.cambiar_estado(self.sesion, codigo, cuerpo.get("estado"))
+        )
+        return self.obtener_pedido(codigo)
+
+    async def eliminar_pedido(self, codigo):
+        pedido = await self._modificar(
+            [("pedido", codigo)],
+            lambda: servicios.eliminar_pedido(self.sesion, codigo)
+        )
+        return pedido
+
+    async def agregar_linea(self, codigo, cuerpo):
+        codigo_producto = cuerpo.get("codigo_producto")
+        if not isinstance(codigo_producto, str):
+            raise ErrorServicio("El código de producto debe ser un texto")
+        await self._modificar(
+            [("pedido", codigo), ("producto", servicios.normalizar_codigo(codigo_producto))],
+            lambda: servicios.agregar_linea(self.sesion, codigo, codigo_producto, cuerpo.get("cantidad"))
+        )
+        return self.obtener_pedido(codigo)
+
+    async def _modificar_linea(self, codigo, numero_linea, operacion):
+        """Bloquea el pedido y el producto de la línea antes de cambiarla
+
+        Los números de línea no se reutilizan: si mientras esperábamos otra
+        petición quitó la línea, la operación lanza ErrorNoEncontrado.
+        """
+        _, _, detalle = servicios.obtener_linea(self.sesion, codigo, numero_linea)
+        tomados = await self._tomar_bloqueos(
+            [("pedido", codigo), ("producto", servicios.normalizar_codigo(detalle["codigo_producto"]))]
+        )
+        try:
+            return await self._aplicar(operacion)
+        finally:
+            self._soltar_bloqueos(tomados)
+
+    async def cambiar_cantidad(self, codigo, numero_linea, cuerpo):
+        await self._modificar_linea(
+            codigo, numero_linea,
+            lambda: servicios.cambiar_cantidad(self.sesion, codigo, numero_linea, cuerpo.get("cantidad"))
+        )
+        return self.obtener_pedido(codigo)
+
+    async def eliminar_linea(self, codigo, numero_linea):
+        await self._modificar_linea(
+            codigo, numero_linea,
+            lambda: servicios.eliminar_linea(self.sesion, codigo, numero_linea)
+        )
+        return self.obtener_pedido(codigo)
+
+    # Enrutamiento
+
+    async def atender(self, metodo, ruta, consulta, cuerpo):
+        """Devuelve (estado, respuesta) para una petición ya leída"""
+        partes = [unquote(parte) for parte in ruta.strip("/").split("/") if parte]
+
+        if partes == ["productos"] and metodo == "GET":
+            return 200, self.listar_productos(consulta)
+        if len(partes) == 2 and partes[0] == "productos" and metodo == "GET":
+            return 200, self.obtener_producto(partes[1])
+
+        if partes == ["pedidos"]:
+            if metodo == "GET":
+                return 200, self.listar_pedidos(consulta)
+            if metodo == "POST":
+                return 201, await self.crear_pedido(cuerpo)
+        elif len(partes) == 2 and partes[0] == "pedidos":
+            if metodo == "GET":
+                return 200, self.obtener_pedido(partes[1])
+            if metodo == "PATCH":
+                return 200, await self.cambiar_estado(partes[1], cuerpo)
+            if metodo == "DELETE":
+                return 200, await self.eliminar_pedido(partes[1])
+        elif len(partes) == 3 and partes[0] == "pedidos" and partes[2] == "lineas":
+            if metodo == "POST":
+                return 201, await self.agregar_linea(partes[1], cuerpo)
+        elif len(partes) == 4 and partes[0] == "pedidos" and partes[2] == "lineas":
+            numero_linea = _entero(partes[3], "número de línea")
+            if metodo == "PATCH":
+                return 200, await self.cambiar_cantidad(partes[1], numero_linea, cuerpo)
+            if metodo == "DELETE":
+                return 200, await self.eliminar_linea(partes[1], numero_linea)
+        else:
+            raise ErrorHTTP(404, f"Ruta no encontrada: {ruta}")
+        raise ErrorHTTP(405, f"Método no permitido: {metodo} {ruta}")
+
+    async def conexion(self, lector, escritor):
+        """Atiende las peticiones de una conexión (con keep-alive)"""
+        try:
+            while True:
+                try:
+                    peticion = await _leer_peticion(lector)
+                except ErrorHTTP as error:
+                    await _responder(escritor, error.estado, {"error": str(error)}, False)
+                    break
+                if peticion is None:
+                    break
+                metodo, destino, cuerpo, mantener = peticion
+                partes_url = urlsplit(destino)
+                consulta = {clave: valores[-1] for clave, valores in parse_qs(partes_url.query).items()}
+                try:
+                    estado, respuesta = await self.atender(metodo, partes_url.path, consulta, cuerpo)
+                except ErrorHTTP as error:
+                    estado, respuesta = error.estado, {"error": str(error)}
+                except ErrorNoEncontrado as error:
+                    estado, respuesta = 404, {"error": str(error)}
+                except ErrorServicio as error:
+                    estado, respuesta = 400, {"error": str(error)}
+                except Exception as error:
+                    estado, respuesta = 500, {"error": f"Error interno: {error}"}
+                await _responder(escritor, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+
+def _entero(texto, nombre):
+    """Convierte un parámetro de la ruta o la consulta en entero"""
+    try:
+        return int(texto)
+    except (TypeError, ValueError):
+        raise ErrorServicio(f"{nombre} debe ser un número entero")
+
+async def _leer_peticion(lector):
+    """Lee una petición HTTP/1.1; devuelve (método, destino, cuerpo, keep-alive) o None"""
+    linea = await lector.readline()
+    if not linea.strip():
+        return None
+    try:
+        metodo, destino, version = linea.decode("latin-1").split()
+    except ValueError:
+        raise ErrorHTTP(400, "Línea de petición no válida")
+
+    cabeceras = {}
+    while True:
+        linea = await lector.readline()
+        if linea in (b"\r\n", b"\n", b""):
+            break
+        clave, _, valor = linea.decode("latin-1").partition(":")
+        cabeceras[clave.strip().lower()] = valor.strip()
+
+    largo = _entero(cabeceras.get("content-length", "0"), "Content-Length")
+    if largo > TAMANO_MAXIMO_CUERPO:
+        raise ErrorHTTP(413, "El cuerpo de la petición es demasiado grande")
+    cuerpo = {}
+    if largo:
+        datos = await lector.readexactly(largo)
+        try:
+            cuerpo = json.loads(datos)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise ErrorHTTP(400, "El cuerpo debe ser JSON")
+        if not isinstance(cuerpo, dict):
+            raise ErrorHTTP(400, "El cuerpo debe ser un objeto JSON")
+
+    conexion = cabeceras.get("connection", "").lower()
+    mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+    return metodo.upper(), destino, cuerpo, mantener
+
+async def _responder(escritor, estado, respuesta, mantener):
+    """Envía una respuesta JSON"""
+    cuerpo = json.dumps(respuesta, ensure_ascii=False, default=a_json).encode("utf-8")
+    cabecera = (
+        f"HTTP/1.1 {estado} {TEXTOS_ESTADO.get(estado, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n"
+        f"Connection: {'keep-alive' if mantener else 'close'}\r\n"
+        "\r\n"
+    )
+    escritor.write(cabecera.encode("latin-1") + cuerpo)
+    await escritor.drain()
+
+async def ejecutar_servidor(host=HOST_POR_DEFECTO, puerto=PUERTO_POR_DEFECTO, al_iniciar=None):
+    """Atiende peticiones hasta que se cancela la tarea"""
+    servidor = ServidorPanaderia()
+    servidor.iniciar()
+    tcp = await asyncio.start_server(servidor.conexion, host, puerto)
+    if al_iniciar is not None:
+        al_iniciar(tcp)
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        await servidor.detener()